@@ -6,10 +6,11 @@ from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from pathlib import Path
 import os
-import threading
 import re
-from pydub import AudioSegment
 import asyncio
+import threading
+import time
+import uuid
 import edge_tts
 
 # ✅ IMPORTS FOR TEMPLATES + RESEARCH
@@ -20,6 +21,20 @@ from src.ai.enhanced_script_generator import enhanced_script_generator
 # ✅ EXISTING IMPORTS
 from src.ai.image_generator import create_image_generator
 from src.editor.ffmpeg_compiler import FFmpegCompiler
+from src.utils.job_queue import job_manager, JobQueueFull
+from src.utils.file_handler import file_handler
+from src.utils.stage_graph import StageGraph
+from src.utils.gemini_pool import gemini_pool
+from src.utils.image_cache import image_cache
+from src.utils.media_library import media_library
+from src.utils.media_probe import audio_duration as get_audio_duration
+from src.utils.narration_timeline import edge_boundary_kwargs, load_timeline, scene_durations, stream_to_file
+from src.utils.pexels_client import pexels_client
+from src.utils.tts_cache import tts_cache
+from src.utils.tts_scheduler import tts_scheduler
+from src.offline.simulator import offline_enabled
+from src.ai.script_stream import ScriptStream
+from config.settings import GEMINI_SETTINGS, BATCH_SETTINGS
 
 app = Flask(__name__)
 
@@ -32,7 +47,8 @@ CORS(app, resources={
     }
 })
 
-progress_state = {
+# Reported by /api/progress before any job has been submitted
+IDLE_PROGRESS_STATE = {
     'status': 'ready',
     'progress': 0,
     'video_path': None,
@@ -50,6 +66,28 @@ print("✅ Edge-TTS ready - No API key needed!")
 print("   💰 FREE & UNLIMITED forever!")
 print("   🎬 10+ professional voices!")
 
+# One event loop serves every narration (all jobs and batch topics)
+_tts_loop = None
+_tts_loop_lock = threading.Lock()
+
+
+def run_tts(coro):
+    """Run an Edge-TTS coroutine on the shared TTS event loop and wait for it"""
+    global _tts_loop
+    with _tts_loop_lock:
+        if _tts_loop is None:
+            _tts_loop = asyncio.new_event_loop()
+            threading.Thread(target=_tts_loop.run_forever, name="edge-tts-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _tts_loop).result()
+
+
+def tts_communicate(text, voice, rate="+10%"):
+    """Edge-TTS Communicate, or the offline stand-in when OFFLINE_BACKENDS includes tts"""
+    if offline_enabled('tts'):
+        from src.offline.tts import OfflineCommunicate
+        return OfflineCommunicate(text, voice, rate=rate)
+    return edge_tts.Communicate(text, voice, rate=rate, **edge_boundary_kwargs())
+
 # ═══════════════════════════════════════════════════════════════
 # HELPER FUNCTIONS
 # ═══════════════════════════════════════════════════════════════
@@ -100,7 +138,7 @@ def get_voice_id(voice_id=None):
     return voice_id
 
 
-def generate_audio_edge(text, voice="en-US-GuyNeural", output_path="narration.mp3"):
+def generate_audio_edge(text, voice="en-US-GuyNeural", output_path="narration.wav", workspace=None):
     """✅ Generate audio using Edge-TTS - FREE, RELIABLE, ALWAYS WORKS!"""
     print(f"\n🎤 Generating audio with Edge-TTS (Microsoft - FREE!)...")
     print(f"   Voice: {voice}")
@@ -110,12 +148,7 @@ def generate_audio_edge(text, voice="en-US-GuyNeural", output_path="narration.mp
     
     try:
         # Generate with Edge-TTS
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        audio_path = loop.run_until_complete(
-            generate_audio_edge_tts(text, voice, output_path)
-        )
-        loop.close()
+        audio_path = run_tts(generate_audio_edge_tts(text, voice, output_path, workspace))
         
         print(f"✅ Edge-TTS generation SUCCESS!")
         print(f"   🎬 Good quality for YouTube - FREE forever!")
@@ -136,142 +169,223 @@ def generate_audio_edge(text, voice="en-US-GuyNeural", output_path="narration.mp
         raise
 
 
-async def generate_audio_edge_tts(text, voice="en-US-GuyNeural", output_path="narration.mp3"):
-    """✅ Edge-TTS fallback - Always works!"""
-    from pydub import AudioSegment
-    
+async def generate_audio_edge_tts(text, voice="en-US-GuyNeural", output_path="narration.wav", workspace=None):
+    """✅ Edge-TTS narration, synthesized per sentence through the TTS cache"""
     print(f"   🎤 Edge-TTS generating...")
     
-    # For long text, use chunking
-    if len(text) > 3000:
-        chunks = _split_text_smart(text, max_chars=2000)
-        print(f"   Split into {len(chunks)} chunks for Edge-TTS")
-        
-        temp_dir = Path("output/temp/edge_chunks")
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate chunks in parallel
-        tasks = []
-        chunk_files = []
-        
-        for i, chunk in enumerate(chunks):
-            chunk_file = temp_dir / f"chunk_{i:03d}.mp3"
-            chunk_files.append(chunk_file)
-            communicate = edge_tts.Communicate(chunk, voice, rate="+10%")
-            tasks.append(communicate.save(str(chunk_file)))
+    await tts_cache.synthesize_async(text, _tts_engine_name(), voice, _edge_synth(voice), output_path, rate="+10%")
+    return str(output_path)
+
+
+def generate_audio_edge_streaming(sentences, voice="en-US-GuyNeural", output_path="narration.wav", workspace=None):
+    """🌊 Edge-TTS narration fed sentence by sentence from a streamed script"""
+    print(f"\n🎤 Streaming narration with Edge-TTS (starts before the script is finished)...")
+    print(f"   Voice: {voice}")
+    
+    return run_tts(generate_audio_edge_tts_streaming(sentences, voice, output_path, workspace))
+
+
+async def generate_audio_edge_tts_streaming(sentences, voice="en-US-GuyNeural", output_path="narration.wav",
+                                            workspace=None):
+    """
+    Synthesize each sentence as soon as it arrives
+    
+    Sentences already in the TTS cache cost nothing; the rest share one
+    adaptive concurrency limit and are retried one by one if they fail.
+    Segments are spliced in script order at the end.
+    """
+    loop = asyncio.get_running_loop()
+    sentence_iter = iter(sentences)
+    synth = _edge_synth(voice)
+    limiter = tts_scheduler.limiter()
+    segments = []
+    tasks = []
+    
+    try:
+        while True:
+            # Sentences arrive from another thread - wait without blocking the loop
+            sentence = await loop.run_in_executor(None, next, sentence_iter, None)
+            if sentence is None:
+                break
+            new_segments = tts_cache.segments(sentence, _tts_engine_name(), voice, rate="+10%")
+            segments.extend(new_segments)
+            tasks.append(asyncio.ensure_future(tts_cache.fill_async(new_segments, synth, limiter=limiter)))
+            if len(segments) == 1:
+                print(f"   🌊 First narration sentence started")
+        
+        if not segments:
+            raise Exception("Script stream produced no narration")
         
         await asyncio.gather(*tasks)
-        
-        # Combine chunks
-        combined = AudioSegment.empty()
-        for chunk_file in chunk_files:
-            if chunk_file.exists():
-                audio_chunk = AudioSegment.from_mp3(str(chunk_file))
-                combined += audio_chunk
-                chunk_file.unlink()
-        
-        combined.export(str(output_path), format="mp3", bitrate="192k")
-    else:
-        # Short text - generate directly
-        communicate = edge_tts.Communicate(text, voice, rate="+10%")
-        await communicate.save(str(output_path))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
     
+    tts_scheduler.finish(limiter)
+    await loop.run_in_executor(None, tts_cache.assemble, segments, output_path)
     return str(output_path)
 
 
-def _split_text_smart(text, max_chars=2000):
-    """Split text at sentence boundaries"""
-    sentences = text.replace('!', '.').replace('?', '.').split('.')
-    sentences = [s.strip() + '.' for s in sentences if s.strip()]
-    
-    chunks = []
-    current_chunk = ""
+def _edge_synth(voice):
+    """Sentence synthesizer for the TTS cache: one Edge-TTS call per sentence (audio + word timings)"""
+    async def synth(sentence, dest):
+        return await stream_to_file(tts_communicate(sentence, voice), dest)
+    return synth
+
+
+def _tts_engine_name():
+    """Cache namespace - stand-in audio must never be reused as real narration"""
+    return "offline-edge" if offline_enabled('tts') else "edge"
+
+
+def scenes_for_images(result, num_scenes, topic, story_type):
+    """Scenes to illustrate: the script's own scenes, else prompts built from its IMAGE: lines or sentences"""
+    if result.get('scenes'):
+        # Use the structured scenes from script generator - BEST QUALITY!
+        scenes = result['scenes'][:num_scenes]
+        print(f"   Using {len(scenes)} varied scenes from script generator")
+        return scenes
     
-    for sentence in sentences:
-        if len(current_chunk) + len(sentence) <= max_chars:
-            current_chunk += " " + sentence
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = sentence
+    # Fallback: Extract image prompts from script
+    script_text = result['script']
+    image_prompts = re.findall(r'IMAGE:\s*(.+?)(?:\n|$)', script_text, re.IGNORECASE)
     
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    if not image_prompts or len(image_prompts) < num_scenes:
+        # Create VARIED prompts based on story progression
+        print(f"   ⚠️  Creating varied prompts (no scenes in result)")
+        story_parts = script_text.split('.')[:num_scenes]
+        image_prompts = []
+        for i, part in enumerate(story_parts):
+            if part.strip():
+                # Use actual story content for variety!
+                image_prompts.append(f"{part.strip()[:100]}")
+            else:
+                image_prompts.append(f"{topic}, scene {i+1}, {story_type} atmosphere")
     
-    return chunks if chunks else [text]
+    # Convert string prompts to scene dictionaries
+    return [
+        {'image_description': prompt, 'content': prompt, 'scene_number': i + 1}
+        for i, prompt in enumerate(image_prompts[:num_scenes])
+    ]
 
 
-def get_audio_duration(audio_path):
-    """Get duration of audio file (MP3 or WAV)"""
-    try:
-        audio_path = str(audio_path)
-
-        if audio_path.endswith('.mp3'):
-            audio = AudioSegment.from_mp3(audio_path)
-        elif audio_path.endswith('.wav'):
-            audio = AudioSegment.from_wav(audio_path)
-        else:
-            # Try to detect format
-            audio = AudioSegment.from_file(audio_path)
-        
-        duration = len(audio) / 1000.0  # Convert to seconds
-        return duration
-    except Exception as e:
-        print(f"❌ Error reading audio: {e}")
-        return 5.0  # Fallback
+def image_durations(audio_path, audio_duration, scenes, num_images):
+    """Seconds per image: cut where each scene's narration ends (narration timing table), else split evenly"""
+    timeline = load_timeline(audio_path)
+    if timeline and len(scenes) == num_images:
+        durations = scene_durations(timeline, [scene.get('narration', '') for scene in scenes])
+        if durations:
+            print(f"   ⏱️ Scene cuts follow the narration timing table")
+            return durations
+    time_per_image = audio_duration / num_images if num_images else 5
+    return [time_per_image] * num_images
 
 
 # ═══════════════════════════════════════════════════════════════
 # BACKGROUND FUNCTIONS
 # ═══════════════════════════════════════════════════════════════
 
-def generate_video_background(data):
-    """Original video generation (without template)"""
-    global progress_state
-
-    try:
-        print(f"\n🎬 Starting generation: {data.get('topic', 'Untitled')}")
-        
-        # Get voice from user (Edge-TTS only)
-        voice_id = get_voice_id(data.get('voice_id'))
-        zoom_effect = data.get('zoom_effect', True)
-        
-        print(f"🎤 Voice Engine: EDGE-TTS (Microsoft)")
-        print(f"🎤 Voice ID: {voice_id}")
-        print(f"🎬 Zoom Effect: {'ENABLED' if zoom_effect else 'DISABLED'}")
+def add_streamed_script_stages(graph, progress_state, script_kwargs, image_gen, voice_id, workspace, prefix=""):
+    """
+    🌊 Streaming mode: script, images and narration all start at once
+    
+    Gemini's streamed text goes through a ScriptStream - sentences feed
+    Edge-TTS and IMAGE: lines feed the image generator while the script is
+    still being written. Produces the same 'script', 'images' and
+    'narration' results as the regular stages (names start with prefix).
+    """
+    stream = ScriptStream()
+    num_scenes = script_kwargs['num_scenes']
+    
+    def script_stage(results):
+        progress_state['status'] = 'Streaming script + images + voice...'
+        progress_state['progress'] = 10
+        result = enhanced_script_generator.stream_with_template(stream, **script_kwargs)
+        print(f"   ✅ Script: {len(result['script'])} characters (streamed)")
+        progress_state['progress'] = 50
+        return result
+    
+    def streamed_images_stage(results):
+        return image_gen.generate_stream(stream.image_descriptions(), num_scenes)
+    
+    def images_stage(results):
+        # Top up scenes that had no IMAGE: line in the script (or whose image failed)
+        result = results[prefix + 'script']
+        images = list(results[prefix + 'streamed_images'])
+        done = {img['scene_number'] for img in images}
+        missing = [scene for scene in result['scenes'][:num_scenes] if scene.get('scene_number') not in done]
+        if missing:
+            characters = {char: f"{char}, character" for char in result.get('characters', [])[:3]}
+            images += image_gen.generate_batch(missing, characters)
+        images.sort(key=lambda img: img['scene_number'])
         
-        # Update progress state
-        progress_state['voice_engine'] = 'edge'
-        progress_state['voice_id'] = voice_id
+        image_paths = [Path(img['filepath']) for img in images if img]
+        print(f"   ✅ Images: {len(image_paths)} generated ({len(done)} while streaming)")
+        return image_paths
+    
+    def narration_stage(results):
+        audio_path = workspace.path("narration.wav")
+        generate_audio_edge_streaming(stream.sentences(), voice_id, str(audio_path), workspace)
         
-        # Script
+        audio_duration = get_audio_duration(audio_path)
+        print(f"   ✅ Audio: {audio_duration:.1f} seconds ({audio_duration/60:.1f} minutes)")
+        return audio_path, audio_duration
+    
+    graph.add_stage(prefix + "script", script_stage, resource="script")
+    graph.add_stage(prefix + "streamed_images", streamed_images_stage, resource="images")
+    graph.add_stage(prefix + "images", images_stage, depends_on=[prefix + "script", prefix + "streamed_images"])
+    graph.add_stage(prefix + "narration", narration_stage, resource="voice")
+    return graph
+
+
+def add_video_stages(graph, progress_state, data, workspace, voice_id, prefix=""):
+    """
+    🔀 Add one video's stages (script → images ‖ narration → video) to a graph
+    
+    Stage names start with prefix so a batch can put many videos in one
+    graph; each stage names the resource it uses (script, images, voice,
+    render) so the graph can cap how many of each run at once. A template
+    and research notes in data ('template', 'research_data') go to the
+    script generator.
+    """
+    zoom_effect = data.get('zoom_effect', True)
+    
+    def script_stage(results):
         progress_state['status'] = 'Generating script...'
         progress_state['progress'] = 10
-        print("📝 Step 1/4: Generating script...")
+        print("📝 Step 1/3: Generating script...")
         
         # 📝 Generate script with Gemini (10/10 quality with improved prompts!)
         result = enhanced_script_generator.generate_with_template(
             topic=data.get('topic', 'Test Story'),
             story_type=data.get('story_type', 'scary_horror'),
-            template=None,  # No template
-            research_data=None,  # No research
+            template=data.get('template'),
+            research_data=data.get('research_data'),
             duration_minutes=int(data.get('duration', 5)),
             num_scenes=int(data.get('num_scenes', 10))  # ✅ User selection!
         )
         
         print(f"   ✅ Script: {len(result['script'])} characters")
         
-        # Images
-        progress_state['status'] = 'Generating images...'
+        # Images and voice only need the script - start both now
+        progress_state['status'] = 'Generating images + voice...'
         progress_state['progress'] = 30
-        print("🎨 Step 2/4: Generating images...")
+        return result
+    
+    def images_stage(results):
+        result = results[prefix + 'script']
+        print("🎨 Step 2/3: Generating images (parallel with voice)...")
         
         image_gen = create_image_generator(
             data.get('image_style', 'cinematic_film'), 
-            data.get('story_type', 'scary_horror')
+            data.get('story_type', 'scary_horror'),
+            workspace
         )
+        scenes = scenes_for_images(result, int(data.get('num_scenes', 10)), data.get('topic', 'Test Story'),
+                                   data.get('story_type', 'scary_horror'))
         characters = {char: f"{char}, character" for char in result.get('characters', [])[:3]}
-        images = image_gen.generate_batch(result['scenes'], characters)
+        images = image_gen.generate_batch(scenes, characters)
         image_paths = [Path(img['filepath']) for img in images if img]
         
         print(f"   ✅ Images: {len(image_paths)} generated")
@@ -279,51 +393,116 @@ def generate_video_background(data):
         for i, img_path in enumerate(image_paths):
             exists = "EXISTS" if img_path.exists() else "MISSING!"
             print(f"      Image {i+1}: {img_path.name} - {exists}")
+        return image_paths
+    
+    def narration_stage(results):
+        print(f"🎤 Step 2/3: Generating voice with Edge-TTS (parallel with images)...")
         
-        # Voice Generation - Edge-TTS
-        progress_state['status'] = 'Generating voice with Edge-TTS...'
-        progress_state['progress'] = 60
-        print(f"🎤 Step 3/4: Generating voice with Edge-TTS (FREE!)...")
-        
-        audio_path = Path("output/temp/narration.mp3")
-        audio_path.parent.mkdir(parents=True, exist_ok=True)
+        audio_path = workspace.path("narration.wav")
         
         # ✅ EDGE-TTS - FREE & UNLIMITED!
         generate_audio_edge(
-            text=result['script'],
+            text=results[prefix + 'script']['script'],
             voice=voice_id,
-            output_path=str(audio_path)
+            output_path=str(audio_path),
+            workspace=workspace
         )
         
         audio_duration = get_audio_duration(audio_path)
         print(f"   ✅ Audio: {audio_duration:.1f} seconds ({audio_duration/60:.1f} minutes)")
+        return audio_path, audio_duration
+    
+    def prepare_images_stage(results):
+        # CPU work on the finished images - overlaps with narration
+        return FFmpegCompiler().prepare_images(results[prefix + 'images'], zoom_effect)
+    
+    def video_stage(results):
+        image_paths = results[prefix + 'prepared_images']
+        audio_path, audio_duration = results[prefix + 'narration']
         
         # Calculate durations - MATCH VIDEO TO AUDIO!
-        time_per_image = audio_duration / len(image_paths) if image_paths else 5
-        durations = [time_per_image] * len(image_paths)
+        durations = image_durations(audio_path, audio_duration, results[prefix + 'script'].get('scenes', []),
+                                    len(image_paths))
         
         # Debug: Show calculation
         print(f"   🔧 Image timing:")
         print(f"      Images: {len(image_paths)}")
-        print(f"      Duration per image: {time_per_image:.1f}s")
+        print(f"      Duration per image: {min(durations, default=0):.1f}-{max(durations, default=0):.1f}s")
         print(f"      Total video duration: {sum(durations):.1f}s ({sum(durations)/60:.1f} minutes)")
         
         # Video
         progress_state['status'] = 'Compiling video...'
         progress_state['progress'] = 80
-        print("🎬 Step 4/4: Compiling video...")
+        print("🎬 Step 3/3: Compiling video...")
 
         compiler = FFmpegCompiler()
         safe_topic = sanitize_filename(data.get('topic', 'video'))
-        output_filename = f"{safe_topic}_video.mp4"
+        output_filename = f"{safe_topic}_{workspace.job_id}_video.mp4"  # Same topic twice never collides
 
-        video_path = compiler.create_video(
+        compiler.create_video(
             image_paths,
             str(audio_path),
             Path(f"output/videos/{output_filename}"),
             durations,
-            zoom_effect=zoom_effect
+            zoom_effect=zoom_effect,
+            workspace=workspace
+        )
+        return output_filename
+    
+    if data.get('stream_script', GEMINI_SETTINGS['stream_script']):
+        print("🌊 Streaming mode: narration and images start while the script is written")
+        image_gen = create_image_generator(
+            data.get('image_style', 'cinematic_film'),
+            data.get('story_type', 'scary_horror'),
+            workspace
         )
+        add_streamed_script_stages(graph, progress_state, {
+            'topic': data.get('topic', 'Test Story'),
+            'story_type': data.get('story_type', 'scary_horror'),
+            'template': data.get('template'),
+            'research_data': data.get('research_data'),
+            'duration_minutes': int(data.get('duration', 5)),
+            'num_scenes': int(data.get('num_scenes', 10)),
+        }, image_gen, voice_id, workspace, prefix)
+    else:
+        # 🔀 Images and narration both depend only on the script, so they overlap
+        graph.add_stage(prefix + "script", script_stage, resource="script")
+        graph.add_stage(prefix + "images", images_stage, depends_on=[prefix + "script"], resource="images")
+        graph.add_stage(prefix + "narration", narration_stage, depends_on=[prefix + "script"], resource="voice")
+    graph.add_stage(prefix + "prepared_images", prepare_images_stage, depends_on=[prefix + "images"])
+    graph.add_stage(prefix + "video", video_stage, depends_on=[prefix + "prepared_images", prefix + "narration"], resource="render")
+    return graph
+
+
+def generate_video_background(progress_state, data):
+    """Original video generation (without template)"""
+
+    workspace = file_handler.create_workspace(progress_state.get('job_id'))
+
+    try:
+        print(f"\n🎬 Starting generation: {data.get('topic', 'Untitled')}")
+        
+        # Get voice from user (Edge-TTS only)
+        voice_id = get_voice_id(data.get('voice_id'))
+        zoom_effect = data.get('zoom_effect', True)
+        
+        print(f"🎤 Voice Engine: EDGE-TTS (Microsoft)")
+        print(f"🎤 Voice ID: {voice_id}")
+        print(f"🎬 Zoom Effect: {'ENABLED' if zoom_effect else 'DISABLED'}")
+        
+        # Update progress state
+        progress_state['voice_engine'] = 'edge'
+        progress_state['voice_id'] = voice_id
+        
+        graph = StageGraph("video")
+        add_video_stages(graph, progress_state, data, workspace, voice_id)
+        
+        try:
+            results = graph.run()
+        finally:
+            progress_state['stage_timings'] = graph.timings()
+        
+        output_filename = results['video']
         
         progress_state['progress'] = 100
         progress_state['status'] = 'complete'
@@ -332,7 +511,8 @@ def generate_video_background(data):
         print(f"\n✅ SUCCESS! Video: {output_filename}")
         print(f"   Voice Engine: Edge-TTS (Microsoft)")
         print(f"   Voice: {voice_id}")
-        print(f"   Zoom Effect: {'ENABLED' if zoom_effect else 'DISABLED'}\n")
+        print(f"   Zoom Effect: {'ENABLED' if zoom_effect else 'DISABLED'}")
+        print(f"   Stage timings: {progress_state['stage_timings']}\n")
         
     except Exception as e:
         progress_state['status'] = 'error'
@@ -340,12 +520,101 @@ def generate_video_background(data):
         print(f"\n❌ ERROR: {e}\n")
         import traceback
         traceback.print_exc()
+    finally:
+        workspace.cleanup()
+
+
+def generate_batch_background(progress_state, data):
+    """
+    📦 Generate one video per topic in a single pipelined stage graph
+    
+    Every topic's stages go into the same graph, capped per resource by
+    BATCH_SETTINGS - so while one video renders, the next topics' scripts,
+    images and narration are already being made. Topics share the Gemini
+    pool, LLM cache, image HTTP session and Edge-TTS loop. A failed topic
+    doesn't stop the others.
+    
+    data: {'topics': [str | {'topic': ..., per-topic overrides}], shared options...}
+    """
+    job_id = progress_state.get('job_id') or f"batch_{uuid.uuid4().hex[:8]}"
+    shared = {key: value for key, value in data.items() if key != 'topics'}
+    voice_id = get_voice_id(data.get('voice_id'))
+    
+    options = [dict(shared, **(entry if isinstance(entry, dict) else {'topic': entry})) for entry in data['topics']]
+    workspaces = [file_handler.create_workspace(f"{job_id}_{i + 1:02d}") for i in range(len(options))]
+    items = [
+        {'topic': opts['topic'], 'voice_id': get_voice_id(opts.get('voice_id')), 'status': 'queued',
+         'progress': 0, 'video_path': None, 'error': None}
+        for opts in options
+    ]
+    
+    progress_state['voice_engine'] = 'edge'
+    progress_state['voice_id'] = voice_id  # Batch default; a topic's own voice_id wins (items[i]['voice_id'])
+    progress_state['items'] = items  # Per-topic progress, updated live by the stages
+    progress_state['completed'] = 0
+    progress_state['status'] = f'Batch: 0/{len(items)} videos done'
+    
+    def done_stage(i):
+        def finish(results):
+            # Free this topic's temp files now instead of at the end of the batch
+            workspaces[i].cleanup()
+            items[i].update(status='complete', progress=100, video_path=results[f"{i + 1}:video"])
+            progress_state['completed'] += 1
+            progress_state['progress'] = int(100 * progress_state['completed'] / len(items))
+            progress_state['status'] = f"Batch: {progress_state['completed']}/{len(items)} videos done"
+            return items[i]['video_path']
+        return finish
+    
+    graph = StageGraph("batch", limits={
+        'script': BATCH_SETTINGS['max_parallel_scripts'],
+        'images': BATCH_SETTINGS['max_parallel_images'],
+        'voice': BATCH_SETTINGS['max_parallel_voice'],
+        'render': BATCH_SETTINGS['max_parallel_renders'],
+    }, fail_fast=False)
+    
+    print(f"\n📦 Batch: {len(items)} topics")
+    for i, item in enumerate(items):
+        prefix = f"{i + 1}:"
+        print(f"   {i + 1}. {item['topic']}")
+        add_video_stages(graph, item, options[i], workspaces[i], item['voice_id'], prefix=prefix)
+        graph.add_stage(prefix + "done", done_stage(i), depends_on=[prefix + "video"])
+    
+    started = time.time()
+    try:
+        graph.run()
+    finally:
+        for workspace in workspaces:
+            workspace.cleanup()
+        progress_state['stage_timings'] = graph.timings()
+    
+    for i, item in enumerate(items):
+        if item['status'] != 'complete':
+            failed = [name for name in graph.failures if name.startswith(f"{i + 1}:")]
+            item['status'] = 'error'
+            item['error'] = "; ".join(f"{name}: {graph.failures[name]}" for name in failed) or 'skipped'
+    
+    elapsed = time.time() - started
+    completed = progress_state['completed']
+    progress_state['failed'] = len(items) - completed
+    progress_state['elapsed_seconds'] = round(elapsed, 1)
+    progress_state['videos_per_hour'] = round(completed * 3600 / elapsed, 2) if elapsed > 0 else 0
+    progress_state['progress'] = 100
+    
+    print(f"\n📦 Batch done: {completed}/{len(items)} videos in {elapsed/60:.1f} minutes "
+          f"({progress_state['videos_per_hour']} videos/hour)")
+    
+    if completed:
+        progress_state['status'] = 'complete'
+    else:
+        progress_state['status'] = 'error'
+        progress_state['error'] = items[0]['error'] if items else 'No topics'
 
 
-def generate_with_template_background(topic, story_type, template, research_data, duration, num_scenes, voice_engine, voice_id, voice_speed=1.0,
-zoom_effect=True):
+def generate_with_template_background(progress_state, topic, story_type, template, research_data, duration, num_scenes, voice_engine, voice_id, voice_speed=1.0,
+zoom_effect=True, stream_script=False):
     """✅ Background generation with template + research + voice selection + zoom effect"""
-    global progress_state
+
+    workspace = file_handler.create_workspace(progress_state.get('job_id'))
 
     try:
         progress_state['status'] = 'generating'
@@ -361,104 +630,27 @@ zoom_effect=True):
         print(f"🎤 Voice: {voice_id}")
         print(f"🎬 Zoom Effect: {'ENABLED' if zoom_effect else 'DISABLED'}")
         
-        # 📝 Generate script with Gemini (improved prompts!)
-        result = enhanced_script_generator.generate_with_template(
-            topic=topic,
-            story_type=story_type,
-            template=template,
-            research_data=research_data,
-            duration_minutes=duration,
-            num_scenes=num_scenes
-        )
-
-        script_text = result['script']
-
-        progress_state['progress'] = 50
-        progress_state['status'] = 'generating_images'
-
-        print("🎨 Generating images...")
-        
-        # ✅ FIX: Use scenes from result if available (MUCH BETTER VARIETY!)
-        if 'scenes' in result and result['scenes']:
-            # Use the structured scenes from script generator - BEST QUALITY!
-            scenes = result['scenes'][:num_scenes]
-            print(f"   Using {len(scenes)} varied scenes from script generator")
-        else:
-            # Fallback: Extract image prompts from script
-            image_prompts = re.findall(r'IMAGE:\s*(.+?)(?:\n|$)', script_text, re.IGNORECASE)
-            
-            if not image_prompts or len(image_prompts) < num_scenes:
-                # Create VARIED prompts based on story progression
-                print(f"   ⚠️  Creating varied prompts (no scenes in result)")
-                story_parts = script_text.split('.')[:num_scenes]
-                image_prompts = []
-                for i, part in enumerate(story_parts):
-                    if part.strip():
-                        # Use actual story content for variety!
-                        image_prompts.append(f"{part.strip()[:100]}")
-                    else:
-                        image_prompts.append(f"{topic}, scene {i+1}, {story_type} atmosphere")
-            
-            # Convert string prompts to scene dictionaries
-            scenes = []
-            for i, prompt in enumerate(image_prompts[:num_scenes]):
-                scenes.append({
-                    'image_description': prompt,
-                    'content': prompt,
-                    'scene_number': i + 1
-                })
-        
-        # Generate images
-        image_gen = create_image_generator('cinematic_film', story_type)
-        characters = {char: f"{char}, character" for char in result.get('characters', [])[:3]}
-        images = image_gen.generate_batch(scenes, characters)
-        image_paths = [Path(img['filepath']) for img in images if img]
-
-        print(f"✅ Generated {len(image_paths)} images")
-        print(f"   🔍 DEBUG: Image paths:")
-        for i, img_path in enumerate(image_paths):
-            exists = "EXISTS" if img_path.exists() else "MISSING!"
-            print(f"      Image {i+1}: {img_path.name} - {exists}")
-        
-        progress_state['progress'] = 70
-        progress_state['status'] = 'generating_voice_edge'
-        
-        print(f"🎤 Generating voice with Edge-TTS (FREE!)...")
-        
-        # Generate audio with Edge-TTS
-        audio_path = Path("output/temp/narration.mp3")
-        audio_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # ✅ EDGE-TTS - FREE & UNLIMITED!
-        generate_audio_edge(
-            text=script_text,
-            voice=voice_id,
-            output_path=str(audio_path)
-        )
-        
-        audio_duration = get_audio_duration(audio_path)
-        print(f"✅ Audio: {audio_duration:.1f} seconds ({audio_duration/60:.1f} minutes)")
-        
-        progress_state['progress'] = 80
-        progress_state['status'] = 'compiling_video'
-
-        print("🎬 Compiling video...")
-
-        # Compile video
-        compiler = FFmpegCompiler()
-        safe_topic = re.sub(r'[^a-zA-Z0-9_\-]', '', topic)[:50]
-        output_filename = f"{safe_topic}_video.mp4"
-
-        time_per_image = audio_duration / len(image_paths) if image_paths else 5
-        durations = [time_per_image] * len(image_paths)
-
-        video_path = compiler.create_video(
-            image_paths,
-            str(audio_path),
-            Path(f"output/videos/{output_filename}"),
-            durations,
-            zoom_effect=zoom_effect
-        )
+        # Same stages as every other video; the template and research go to the script stage
+        graph = StageGraph("template-video")
+        add_video_stages(graph, progress_state, {
+            'topic': topic,
+            'story_type': story_type,
+            'template': template,
+            'research_data': research_data,
+            'duration': duration,
+            'num_scenes': num_scenes,
+            'image_style': 'cinematic_film',
+            'zoom_effect': zoom_effect,
+            'stream_script': stream_script,
+        }, workspace, voice_id)
+        
+        try:
+            results = graph.run()
+        finally:
+            progress_state['stage_timings'] = graph.timings()
+        
+        script_text = results['script']['script']
+        output_filename = results['video']
 
         progress_state['progress'] = 100
         progress_state['status'] = 'complete'
@@ -471,7 +663,8 @@ zoom_effect=True):
         print(f"   Voice: {voice_id}")
         print(f"   Zoom Effect: {'ENABLED' if zoom_effect else 'DISABLED'}")
         print(f"   Template: {'Used' if template else 'Not used'}")
-        print(f"   Research: {'Used' if research_data else 'Not used'}\n")
+        print(f"   Research: {'Used' if research_data else 'Not used'}")
+        print(f"   Stage timings: {progress_state['stage_timings']}\n")
 
     except Exception as e:
         progress_state['status'] = 'error'
@@ -479,6 +672,8 @@ zoom_effect=True):
         print(f"\n❌ ERROR: {e}\n")
         import traceback
         traceback.print_exc()
+    finally:
+        workspace.cleanup()
 
 # ═══════════════════════════════════════════════════════════════
 # API ROUTES
@@ -534,25 +729,71 @@ def generate_video():
     if not data.get('topic'):
         return jsonify({'error': 'Topic is required'}), 400
     
-    global progress_state
-    progress_state = {
-        'status': 'starting',
-        'progress': 0,
-        'video_path': None,
-        'error': None,
-        'voice_engine': None,
-        'voice_id': None,
-    }
+    try:
+        job_id = job_manager.submit(generate_video_background, data)
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+
+    return jsonify({'success': True, 'message': 'Generation started', 'job_id': job_id}), 200
+
+
+@app.route('/api/generate-batch', methods=['POST', 'OPTIONS'])
+def generate_batch():
+    """📦 One job that makes a video for every topic (shared options, optional per-topic overrides)"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    data = request.json or {}
+    topics = data.get('topics')
+    
+    # Validate required fields
+    if not isinstance(topics, list) or not topics:
+        return jsonify({'error': 'topics must be a non-empty list'}), 400
+    if any(not (t.get('topic') if isinstance(t, dict) else t) for t in topics):
+        return jsonify({'error': 'Every topic needs text'}), 400
+    if len(topics) > BATCH_SETTINGS['max_topics']:
+        return jsonify({'error': f"At most {BATCH_SETTINGS['max_topics']} topics per batch"}), 400
     
-    threading.Thread(target=generate_video_background, args=(data,)).start()
-    return jsonify({'success': True, 'message': 'Generation started'}), 200
+    try:
+        job_id = job_manager.submit(generate_batch_background, data, job_type='batch')
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+
+    return jsonify({'success': True, 'message': 'Batch started', 'job_id': job_id, 'topics': len(topics)}), 200
 
 
 @app.route('/api/progress', methods=['GET', 'OPTIONS'])
 def get_progress():
+    """Progress of the most recently submitted job"""
     if request.method == 'OPTIONS':
         return '', 204
-    return jsonify(progress_state), 200
+    return jsonify(job_manager.get_latest() or IDLE_PROGRESS_STATE), 200
+
+
+@app.route('/api/progress/<job_id>', methods=['GET', 'OPTIONS'])
+def get_job_progress(job_id):
+    """Progress of a single job"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    state = job_manager.get(job_id)
+    if state is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(state), 200
+
+
+@app.route('/api/jobs', methods=['GET', 'OPTIONS'])
+def list_jobs():
+    """All known jobs plus worker pool and Gemini key quota statistics"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    return jsonify({
+        'jobs': job_manager.list_jobs(),
+        'stats': job_manager.stats(),
+        'gemini_keys': gemini_pool.stats(),
+        'gemini_latency': gemini_pool.latency_stats(),
+        'gemini_hedging': gemini_pool.hedge_stats
+    }), 200
 
 
 @app.route('/api/video/<path:filename>', methods=['GET', 'OPTIONS'])
@@ -631,8 +872,6 @@ def generate_with_template_endpoint():
     if request.method == 'OPTIONS':
         return '', 204
     
-    global progress_state
-    
     try:
         data = request.json
         
@@ -649,6 +888,7 @@ def generate_with_template_endpoint():
         voice_id = data.get('voice_id')
         voice_speed = float(data.get('voice_speed', 1.0))
         zoom_effect = data.get('zoom_effect', True)  # Default: True for better UX
+        stream_script = data.get('stream_script', GEMINI_SETTINGS['stream_script'])
 
         print(f"\n🎬 Generating with template: {topic}")
         print(f"   Type: {story_type}")
@@ -659,25 +899,21 @@ def generate_with_template_endpoint():
         print(f"   Voice ID: {voice_id}")
         print(f"   Voice Speed: {voice_speed}x")
         print(f"   Zoom Effect: {'ENABLED' if zoom_effect else 'DISABLED'}")
+        print(f"   Streaming Script: {'ENABLED' if stream_script else 'DISABLED'}")
 
-        progress_state = {
-            'status': 'starting',
-            'progress': 0,
-            'video_path': None,
-            'error': None,
-            'voice_engine': None,
-            'voice_id': None,
-        }
-        
-        thread = threading.Thread(
-            target=generate_with_template_background,
-            args=(topic, story_type, template, research_data, duration, num_scenes, voice_engine, voice_id, voice_speed, zoom_effect)
-        )
-        thread.start()
+        try:
+            job_id = job_manager.submit(
+                generate_with_template_background,
+                topic, story_type, template, research_data, duration, num_scenes, voice_engine, voice_id, voice_speed, zoom_effect,
+                stream_script
+            )
+        except JobQueueFull as e:
+            return jsonify({'error': str(e)}), 503
 
         return jsonify({
             'success': True,
             'message': 'Generation started',
+            'job_id': job_id,
             'used_template': template is not None,
             'used_research': research_data is not None,
             'voice_engine': voice_engine,
@@ -696,6 +932,11 @@ def cache_stats_endpoint():
     
     try:
         stats = fact_searcher.get_cache_stats()
+        stats['image_cache'] = image_cache.usage()
+        stats['media_library'] = media_library.usage()
+        stats['pexels'] = dict(pexels_client.stats, quota_remaining=pexels_client.remaining)
+        stats['tts_cache'] = tts_cache.usage()
+        stats['tts_requests'] = tts_scheduler.metrics()
         return jsonify(stats), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -755,6 +996,9 @@ if __name__ == '__main__':
     print("   GET  /api/voices - List all voices")
     print("   POST /api/generate-video - Generate video (quick)")
     print("   POST /api/generate-with-template - Generate with template")
+    print("   POST /api/generate-batch - Generate a video per topic (pipelined)")
+    print("   GET  /api/progress/<job_id> - Progress of one job")
+    print("   GET  /api/jobs - All jobs + worker pool stats")
     print("   POST /api/analyze-script - Extract template")
     print("   POST /api/search-facts - Get research facts")
     print("   GET  /api/cache-stats - Cache statistics")
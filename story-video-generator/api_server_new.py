@@ -202,6 +202,10 @@ def generate_video_background(data):
     """
     Background task: Orchestrate complete generation flow
     Gemini Server 1 → Gemini Server 2 → Colab
+
+    Runs straight through, without the stage graph used by api_server.py and
+    main.py: images, narration and the render all happen on Colab, so
+    locally each step needs the previous one and nothing can overlap.
     """
     global progress_state
 
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+📦 BATCH LAUNCHER - One video per topic, pipelined in a single run
+
+Examples:
+    python batch.py "The haunted lighthouse" "The last train home"
+    python batch.py --file topics.txt --story-type true_crime --scenes 8
+"""
+
+import sys
+from pathlib import Path
+
+# Make sure we can import from the project
+sys.path.insert(0, str(Path(__file__).parent))
+
+import argparse
+import json
+import uuid
+
+
+def read_topics(args):
+    """Topics from the command line plus one per line of --file (# = comment)"""
+    topics = list(args.topics)
+    if args.file:
+        for line in Path(args.file).read_text(encoding='utf-8').splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                topics.append(line)
+    return topics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a video for every topic")
+    parser.add_argument("topics", nargs="*", help="Video topics")
+    parser.add_argument("--file", type=str, help="Text file with one topic per line")
+    parser.add_argument("--story-type", type=str, default="scary_horror", help="Story niche")
+    parser.add_argument("--style", type=str, default="cinematic_film", help="Image style")
+    parser.add_argument("--scenes", type=int, default=10, help="Images per video")
+    parser.add_argument("--duration", type=int, default=5, help="Minutes per video")
+    parser.add_argument("--voice", type=str, default=None, help="Voice name (guy, aria, ...)")
+    parser.add_argument("--no-zoom", action="store_true", help="Disable zoom effect")
+    parser.add_argument("--stream", action="store_true", help="Stream scripts into images + voice")
+    parser.add_argument("--report", type=str, help="Write the batch result as JSON here")
+
+    args = parser.parse_args()
+    topics = read_topics(args)
+    if not topics:
+        parser.error("no topics given (pass them as arguments or with --file)")
+
+    # Same pipeline as POST /api/generate-batch, without the HTTP server
+    from api_server import generate_batch_background
+
+    # Own id per run: workspaces and output files never clash with another batch
+    state = {'job_id': f"batch_{uuid.uuid4().hex[:8]}"}
+    generate_batch_background(state, {
+        'topics': topics,
+        'story_type': args.story_type,
+        'image_style': args.style,
+        'num_scenes': args.scenes,
+        'duration': args.duration,
+        'voice_id': args.voice,
+        'zoom_effect': not args.no_zoom,
+        'stream_script': args.stream,
+    })
+
+    print("\n" + "="*60)
+    for item in state.get('items', []):
+        mark = "✅" if item['status'] == 'complete' else "❌"
+        print(f"{mark} {item['topic']}: {item['video_path'] or item['error']}")
+    print(f"\n📦 {state.get('completed', 0)}/{len(topics)} videos - {state.get('videos_per_hour', 0)} videos/hour")
+    print("="*60 + "\n")
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(state, indent=2, default=str), encoding='utf-8')
+
+    sys.exit(0 if state.get('status') == 'complete' else 1)
@@ -21,10 +21,98 @@ VIDEO_SETTINGS = {
     "bitrate": "8000k"
 }
 
+# One-time image pre-conditioning before rendering (fit to canvas, pre-upscale for zoom)
+PRECONDITION_SETTINGS = {
+    "enabled": os.getenv("IMAGE_PRECONDITION_DISABLED", "0") != "1",
+    "fill": os.getenv("IMAGE_FILL", "blur"),  # "blur" = blurred copy behind the image, "letterbox" = black bars
+    "blur_radius": 40,
+    "zoom_headroom": 1.1,  # Matches the zoompan max zoom, so full zoom is still 1:1 pixels
+    "jpeg_quality": 95,    # Intermediate format: JPEG decodes much faster than PNG
+    "max_workers": int(os.getenv("IMAGE_PRECONDITION_WORKERS", "0")) or None,  # None = one per CPU
+    "max_size_mb": 1024
+}
+
+# Manual uploads / local clips: linked into the job workspace, probed from headers
+INGEST_SETTINGS = {
+    # Tried in order; INGEST_LINK_MODES=copy forces plain copies
+    "link_modes": [m.strip() for m in os.getenv("INGEST_LINK_MODES", "hardlink,reflink,symlink,copy").split(",") if m.strip()],
+    "max_workers": 16,     # Parallel header probes
+    "ffprobe": os.getenv("FFPROBE_PATH", "ffprobe"),
+    "probe_timeout": 30
+}
+
+# Job queue settings (API server worker pool)
+JOB_SETTINGS = {
+    "max_workers": int(os.getenv("JOB_MAX_WORKERS", "2")),       # Renders running at once
+    "max_queue_size": int(os.getenv("JOB_MAX_QUEUE_SIZE", "20")),  # Waiting jobs before rejecting
+    "max_finished_jobs": 100  # Finished jobs kept for /api/progress lookups
+}
+
+# Batch jobs: many topics in one job, pipelined through a single stage graph
+BATCH_SETTINGS = {
+    "max_topics": int(os.getenv("BATCH_MAX_TOPICS", "50")),
+    "max_parallel_scripts": int(os.getenv("BATCH_PARALLEL_SCRIPTS", "2")),  # Gemini calls at once
+    "max_parallel_images": int(os.getenv("BATCH_PARALLEL_IMAGES", "2")),    # Image batches at once
+    "max_parallel_voice": int(os.getenv("BATCH_PARALLEL_VOICE", "2")),      # Narrations at once
+    "max_parallel_renders": int(os.getenv("BATCH_PARALLEL_RENDERS", "1")),  # FFmpeg renders at once
+}
+
 GEMINI_SETTINGS = {
     "model": "gemini-2.5-pro",  # ← MOST POWERFUL!
     "temperature": 0.7,
-    "max_output_tokens": 8192
+    "max_output_tokens": 8192,
+    "stream_script": os.getenv("GEMINI_STREAM_SCRIPT", "0") == "1",  # Default for requests without "stream_script"
+    "structured_scenes": os.getenv("GEMINI_STRUCTURED_SCENES", "1") == "1",  # JSON scenes instead of IMAGE: lines
+    "outline_first_chunks": os.getenv("GEMINI_OUTLINE_FIRST", "1") == "1",  # Long scripts: outline, then parallel sections
+    "section_words": 1500,  # ~10 minutes of narration per section
+    "max_parallel_sections": 4  # Section calls in flight at once
+}
+
+# Gemini client pool (per-key quotas; keys come from api_manager)
+GEMINI_POOL_SETTINGS = {
+    "requests_per_minute": int(os.getenv("GEMINI_RPM", "10")),     # Per key
+    "tokens_per_minute": int(os.getenv("GEMINI_TPM", "250000")),   # Per key
+    "max_attempts": 4,           # Keys tried after 429s before giving up
+    "base_backoff_seconds": 2.0,  # First cooldown after a 429 (doubles each time)
+    "max_backoff_seconds": 60.0,
+    "max_wait_seconds": 120.0    # Longest wait for any key to free up
+}
+
+# Deadlines and hedged requests for Gemini calls
+LLM_HEDGE_SETTINGS = {
+    "enabled": os.getenv("LLM_HEDGING", "1") == "1",
+    "hedge_percentile": 0.9,          # Hedge once a call is slower than p90 of recent calls
+    "min_samples": 5,                 # Observed calls needed before the percentile is trusted
+    "default_hedge_after_seconds": 60.0,  # Hedge delay until then
+    "min_hedge_after_seconds": 5.0,   # Never hedge sooner than this
+    "deadline_seconds": 120.0,        # Default per-call deadline
+    "script_deadline_seconds": 300.0,  # Long script generation calls
+    "latency_window": 200,            # Recent calls kept per model and size bucket
+    "latency_bucket_tokens": [4096, 16384],  # Size buckets (prompt + max output tokens): short calls
+                                             # and long scripts are hedged on their own p90
+    "max_concurrent_calls": 32
+}
+
+# Gemini response cache (identical model + config + prompt => reuse the answer)
+LLM_CACHE_SETTINGS = {
+    "enabled": os.getenv("LLM_CACHE_DISABLED", "0") != "1",  # Set LLM_CACHE_DISABLED=1 to always call the API
+    "ttl_seconds": int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),  # Entries expire after a week
+    "max_entries": 500,  # Least recently used entries are evicted beyond this
+    "max_size_mb": 200
+}
+
+# Content-addressed image store: same prompt + model + size + seed => reuse the file
+IMAGE_CACHE_SETTINGS = {
+    "enabled": os.getenv("IMAGE_CACHE_DISABLED", "0") != "1",  # Set IMAGE_CACHE_DISABLED=1 to always download
+    "max_size_mb": int(os.getenv("IMAGE_CACHE_MAX_MB", "2048"))  # Least recently used images are evicted beyond this
+}
+
+# Per-sentence narration store: same engine + voice + prosody + sentence => reuse the PCM segment
+TTS_CACHE_SETTINGS = {
+    "enabled": os.getenv("TTS_CACHE_DISABLED", "0") != "1",  # Set TTS_CACHE_DISABLED=1 to always synthesize
+    "max_size_mb": int(os.getenv("TTS_CACHE_MAX_MB", "4096")),  # Least recently used segments are evicted beyond this
+    "max_workers": int(os.getenv("TTS_MAX_WORKERS", "8")),  # Sentences at once for thread-based engines (Edge: TTS_SCHEDULER_SETTINGS)
+    "max_sentence_chars": 400  # Longer sentences are split at commas/semicolons
 }
 
 # Script length configurations
@@ -76,6 +164,27 @@ IMAGE_SETTINGS = {
     "format": "PNG"
 }
 
+# Image downloads: AIMD concurrency (grows while the provider keeps up, halves on errors)
+IMAGE_FETCH_SETTINGS = {
+    "initial_concurrency": int(os.getenv("IMAGE_FETCH_CONCURRENCY", "8")),
+    "min_concurrency": 2,
+    "max_concurrency": int(os.getenv("IMAGE_FETCH_MAX_CONCURRENCY", "48")),
+    "latency_tolerance": 3.0,    # Slower than 3x the best latency seen = provider is congested
+    "request_timeout": 180,      # Seconds per image (FLUX takes a while)
+    "max_attempts": 4,           # Per scene, then give up on it
+    "base_backoff_seconds": 2,
+    "max_backoff_seconds": 30
+}
+
+# After a batch: re-request failed scenes and near-duplicate images (new seed)
+IMAGE_DEDUP_SETTINGS = {
+    "enabled": os.getenv("IMAGE_DEDUP_DISABLED", "0") != "1",
+    "dhash_threshold": 10,       # Max differing bits of 64 - both hashes must be this close
+    "phash_threshold": 8,
+    "time_budget_seconds": int(os.getenv("IMAGE_DEDUP_BUDGET", "60")),  # No new round starts after this
+    "max_rounds": 3
+}
+
 # ═══════════════════════════════════════════════════════════════
 # 🎤 VOICE ENGINE SETTINGS - EDGE-TTS ONLY
 # ═══════════════════════════════════════════════════════════════
@@ -140,11 +249,47 @@ def get_voice_engine_and_id(requested_engine=None, requested_voice=None):
 # Voice settings consumed by the Edge-only TTSEngine helper
 VOICE_SETTINGS = EDGE_TTS_SETTINGS.copy()
 
+# Edge-TTS requests (one per uncached sentence): AIMD concurrency, per-request timeout, jittered retries
+TTS_SCHEDULER_SETTINGS = {
+    "initial_concurrency": int(os.getenv("EDGE_TTS_CONCURRENCY", "6")),
+    "min_concurrency": 1,
+    "max_concurrency": int(os.getenv("EDGE_TTS_MAX_CONCURRENCY", "16")),  # Websocket sessions open at once
+    "latency_tolerance": 4.0,    # Slower than 4x the best request seen = service is throttling
+    "chunk_timeout": float(os.getenv("EDGE_TTS_TIMEOUT", "60")),  # Seconds per request before it's retried
+    "max_attempts": 4,           # Per sentence, then the narration fails
+    "base_backoff_seconds": 1.0,
+    "max_backoff_seconds": 20.0,
+    "latency_window": 500        # Recent requests kept for the latency metrics
+}
+
 # Pexels API settings
 PEXELS_SETTINGS = {
     "orientation": "landscape",
     "size": "large",
-    "per_page": 15
+    "per_page": 15,
+    "max_concurrency": int(os.getenv("PEXELS_MAX_CONCURRENCY", "16")),  # Keyword searches in flight at once
+    "timeout": 10,
+    "max_attempts": 3,             # 429s are retried after the rate-limit reset
+    "rate_limit_reserve": 5,       # Requests left unused per window (X-Ratelimit-Remaining)
+    "max_rate_wait_seconds": 30,   # Longest wait for a quota reset before giving up on a search
+    "cache_ttl_seconds": int(os.getenv("PEXELS_CACHE_TTL", str(24 * 3600)))  # Search responses reused for a day
+}
+
+# Stock media downloads: streamed to disk in chunks, resumed with HTTP Range
+DOWNLOAD_SETTINGS = {
+    "max_parallel": int(os.getenv("DOWNLOAD_MAX_PARALLEL", "4")),
+    "chunk_size": 1024 * 1024,  # Bytes held in memory per download
+    "max_attempts": 5,           # Each retry resumes where the last one stopped
+    "connect_timeout": 10,
+    "read_timeout": 60,          # Seconds without data before the attempt is abandoned
+    "base_backoff_seconds": 1,
+    "max_backoff_seconds": 20
+}
+
+# Local stock library: Pexels media kept across jobs, indexed by keyword and Pexels ID
+MEDIA_LIBRARY_SETTINGS = {
+    "enabled": os.getenv("MEDIA_LIBRARY_DISABLED", "0") != "1",  # Set MEDIA_LIBRARY_DISABLED=1 to always search Pexels
+    "max_size_mb": int(os.getenv("MEDIA_LIBRARY_MAX_MB", "10240"))  # Least recently used files are evicted beyond this
 }
 
 # Niche styles
@@ -202,4 +347,20 @@ TRANSITION_TYPES = [
     "crossfade",
     "fade",
     "none"
-]
\ No newline at end of file
+]
+
+# Offline stand-ins for the live services (benchmarks, regression runs, laptops without network)
+# OFFLINE_MODE=1 switches every stand-in on; OFFLINE_BACKENDS=images,tts,llm picks some
+OFFLINE_SETTINGS = {
+    "backends": (
+        {"images", "tts", "llm"} if os.getenv("OFFLINE_MODE", "0") == "1"
+        else {b.strip() for b in os.getenv("OFFLINE_BACKENDS", "").split(",") if b.strip()}
+    ),
+    "seed": int(os.getenv("OFFLINE_SEED", "1234")),  # Same seed + same calls => same latencies and failures
+    "latency_scale": float(os.getenv("OFFLINE_LATENCY_SCALE", "1.0")),  # 0 = instant, 2 = twice as slow
+    "error_scale": float(os.getenv("OFFLINE_ERROR_SCALE", "1.0")),      # 0 = never fail
+    # Log-normal latency per call (median and spread) plus a failure probability
+    "images": {"median_ms": 1500, "sigma": 0.5, "error_rate": 0.05},
+    "tts": {"median_ms": 400, "sigma": 0.4, "error_rate": 0.02},
+    "llm": {"median_ms": 4000, "sigma": 0.4, "error_rate": 0.02}
+}
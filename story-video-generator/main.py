@@ -9,6 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from typing import Optional, List
 import json
+import re
 
 from config.settings import VIDEO_SETTINGS
 from src.ai.script_generator import script_generator
@@ -18,6 +19,7 @@ from src.media.image_manager import image_manager
 from src.editor.video_compiler import video_compiler
 from src.utils.logger import logger
 from src.utils.file_handler import file_handler
+from src.utils.stage_graph import StageGraph, StageFailed
 
 
 class VideoGenerator:
@@ -61,11 +63,65 @@ class VideoGenerator:
         logger.success(f"Script generated: {len(self.script)} characters")
         logger.divider()
         
+        # Steps 2-4 only need the script: images and narration are made side by side
+        graph = StageGraph("main")
+        graph.add_stage("images", lambda r: self._make_images(topic, num_scenes, style))
+        graph.add_stage("narration", lambda r: self._make_narration(voice))
+        try:
+            results = graph.run()
+        except StageFailed as e:
+            logger.error(f"Failed to generate video: {e}")
+            return None
+        
+        resized_images, audio_duration = results['images'], results['narration']
+        logger.info(f"Stage timings: {graph.timings()}")
+        logger.divider()
+        
+        # Step 5: Create image timeline
+        logger.step("STEP 5: Creating Timeline")
+        
+        image_timeline = image_manager.assign_images_to_timeline(
+            resized_images,
+            audio_duration
+        )
+        
+        logger.info(f"Timeline created with {len(image_timeline)} segments")
+        for i, segment in enumerate(image_timeline[:3]):
+            logger.info(f"   Segment {i+1}: {segment['duration']:.1f}s")
+        if len(image_timeline) > 3:
+            logger.info(f"   ... and {len(image_timeline) - 3} more")
+        logger.divider()
+        
+        # Step 6: Compile video
+        logger.step("STEP 6: Compiling Final Video")
+        
+        output_filename = f"{topic.replace(' ', '_')[:30]}_video.mp4"
+        
+        self.video_path = video_compiler.create_video_from_images(
+            image_timeline=image_timeline,
+            audio_path=self.audio_path,
+            output_filename=output_filename,
+            effect_type=effect_type,
+            transition_type=transition_type,
+            transition_duration=1.0
+        )
+        
+        logger.divider()
+        logger.header("✅ VIDEO GENERATION COMPLETE!")
+        logger.success(f"Video saved: {self.video_path}")
+        logger.info(f"Duration: {audio_duration:.1f} seconds")
+        logger.info(f"Scenes: {len(image_timeline)}")
+        logger.divider()
+        
+        return self.video_path
+    
+    def _make_images(self, topic: str, num_scenes: int, style: str) -> List:
+        """Steps 2-3: images for the script's IMAGE: prompts, resized for the video"""
+        
         # Step 2: Generate images
         logger.step("STEP 2: Generating Images")
         
         # Extract image prompts from script
-        import re
         image_prompts = re.findall(r'IMAGE:\s*(.+?)(?:\n|$)', self.script, re.IGNORECASE)
         
         if not image_prompts:
@@ -81,20 +137,20 @@ class VideoGenerator:
         )
         
         if not image_paths:
-            logger.error("Failed to generate images")
-            return None
+            raise RuntimeError("Failed to generate images")
         
         logger.success(f"Generated {len(image_paths)} images")
         self.images = image_paths
-        logger.divider()
         
         # Step 3: Resize images
         logger.step("STEP 3: Processing Images")
         resized_images = image_manager.batch_resize_images(image_paths)
         logger.success(f"Resized {len(resized_images)} images")
-        logger.divider()
+        return resized_images
+    
+    def _make_narration(self, voice: Optional[str]) -> float:
+        """Step 4: narrate the script (without its image prompts); returns the duration"""
         
-        # Step 4: Generate voice narration
         logger.step("STEP 4: Generating Voice Narration")
         
         if voice:
@@ -106,50 +162,12 @@ class VideoGenerator:
         
         self.audio_path = tts_engine.generate_audio(
             text=narration_text,
-            filename="narration.mp3"
+            filename="narration.wav"
         )
         
         audio_duration = tts_engine.get_audio_duration(self.audio_path)
         logger.success(f"Audio generated: {audio_duration:.1f} seconds")
-        logger.divider()
-        
-        # Step 5: Create image timeline
-        logger.step("STEP 5: Creating Timeline")
-        
-        image_timeline = image_manager.assign_images_to_timeline(
-            resized_images,
-            audio_duration
-        )
-        
-        logger.info(f"Timeline created with {len(image_timeline)} segments")
-        for i, segment in enumerate(image_timeline[:3]):
-            logger.info(f"   Segment {i+1}: {segment['duration']:.1f}s")
-        if len(image_timeline) > 3:
-            logger.info(f"   ... and {len(image_timeline) - 3} more")
-        logger.divider()
-        
-        # Step 6: Compile video
-        logger.step("STEP 6: Compiling Final Video")
-        
-        output_filename = f"{topic.replace(' ', '_')[:30]}_video.mp4"
-        
-        self.video_path = video_compiler.create_video_from_images(
-            image_timeline=image_timeline,
-            audio_path=self.audio_path,
-            output_filename=output_filename,
-            effect_type=effect_type,
-            transition_type=transition_type,
-            transition_duration=1.0
-        )
-        
-        logger.divider()
-        logger.header("✅ VIDEO GENERATION COMPLETE!")
-        logger.success(f"Video saved: {self.video_path}")
-        logger.info(f"Duration: {audio_duration:.1f} seconds")
-        logger.info(f"Scenes: {len(image_timeline)}")
-        logger.divider()
-        
-        return self.video_path
+        return audio_duration
     
     def generate_from_custom_script(
         self,
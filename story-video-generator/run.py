@@ -59,7 +59,7 @@ if choice == "1":
             # Step 3: Generate voice
             logger.info("🎤 Step 3/4: Generating voice...")
             tts = TTSEngine()
-            audio_path = tts.generate_audio(result['script'], "narration.mp3")
+            audio_path = tts.generate_audio(result['script'], "narration.wav")
             duration = tts.get_audio_duration(audio_path)
             logger.success(f"Audio generated: {duration:.1f} seconds")
             
@@ -7,14 +7,16 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-import google.generativeai as genai
 from typing import Dict, List, Optional
 import re
 
-from config.settings import GEMINI_SETTINGS
+from config.settings import GEMINI_SETTINGS, LLM_HEDGE_SETTINGS
 from config.story_types import STORY_TYPES
-from src.utils.api_manager import api_manager
+from src.utils.gemini_pool import gemini_pool
 from src.utils.logger import logger
+from src.utils.llm_cache import llm_cache
+from src.ai.script_stream import ScriptStream, clean_narration
+from src.ai.scene_schema import SCENE_SCHEMA, SceneValidationError, parse_structured_scenes, structured_output_instructions
 from src.research.fact_searcher import fact_searcher
 
 
@@ -45,21 +47,31 @@ class EnhancedScriptGenerator:
     ]
     
     def __init__(self):
-        api_key = api_manager.get_key('gemini')
-        if not api_key:
-            raise ValueError("Gemini API key required!")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(
-            model_name=GEMINI_SETTINGS['model'],
-            generation_config={
-                "temperature": 0.75,  # ✅ Balanced creativity
-                "top_p": 0.92,  # ✅ Tighter control for coherence
-                "top_k": 50,  # ✅ Better vocabulary variety
-                "max_output_tokens": 16384,  # ✅ Support 60-min scripts!
-            }
+        self.generation_config = {
+            "temperature": 0.75,  # ✅ Balanced creativity
+            "top_p": 0.92,  # ✅ Tighter control for coherence
+            "top_k": 50,  # ✅ Better vocabulary variety
+            "max_output_tokens": 16384,  # ✅ Support 60-min scripts!
+        }
+        # Pooled across all Gemini keys (raises if none are configured);
+        # a stuck call is hedged, then abandoned at the deadline so the retry loop moves on
+        self.model = gemini_pool.model(
+            GEMINI_SETTINGS['model'],
+            self.generation_config,
+            deadline=LLM_HEDGE_SETTINGS['script_deadline_seconds']
+        )
+        
+        # 🧩 Structured mode: Gemini returns JSON scenes that match SCENE_SCHEMA
+        self.structured_config = {
+            **self.generation_config,
+            "response_mime_type": "application/json",
+            "response_schema": SCENE_SCHEMA,
+        }
+        self.structured_model = gemini_pool.model(
+            GEMINI_SETTINGS['model'],
+            self.structured_config,
+            deadline=LLM_HEDGE_SETTINGS['script_deadline_seconds']
         )
-        self.character_names = []
         
         print(f"🏆 Enhanced Script Generator (Gemini) initialized")
         print(f"   Using: Gemini AI with ULTIMATE prompts!")
@@ -73,12 +85,176 @@ class EnhancedScriptGenerator:
         research_data: Optional[str] = None,
         duration_minutes: int = 10,
         num_scenes: int = 10,
+        structured: Optional[bool] = None,
     ) -> Dict:
         """
         Generate script using template structure
         Templates make Gemini replicate quality of example scripts
+        
+        structured: Ask for JSON scenes instead of IMAGE: lines
+        (default: GEMINI_SETTINGS['structured_scenes'])
         """
         
+        prompt, story_type, research_data = self._prepare_template_prompt(
+            topic, story_type, template, research_data, duration_minutes, num_scenes
+        )
+        
+        if structured is None:
+            structured = GEMINI_SETTINGS['structured_scenes']
+        
+        if structured:
+            try:
+                return self._generate_structured(prompt, story_type, template, research_data, num_scenes)
+            except SceneValidationError as e:
+                logger.warning(f"   Structured output invalid ({e}) - falling back to text mode")
+            except Exception as e:
+                # Deadline, quota, 5xx or a rejected schema - text mode below retries up to 3 times
+                logger.warning(f"   Structured call failed ({e}) - falling back to text mode")
+        
+        # Generate with retry
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                logger.info(f"   Attempt {attempt + 1}/{max_attempts}...")
+                
+                # Retries skip the cache so a rejected answer isn't served again
+                script_text = llm_cache.generate(
+                    self.model, prompt, self.generation_config, bypass=attempt > 0
+                )
+                
+                # Clean output
+                script_text = self._clean_script(script_text)
+                
+                # Validate
+                if len(script_text) < 500:
+                    logger.warning("   Script too short, retrying...")
+                    continue
+                
+                return self._build_result(script_text, story_type, template, research_data, num_scenes)
+                
+            except Exception as e:
+                logger.error(f"   Attempt {attempt + 1} failed: {e}")
+                if attempt == max_attempts - 1:
+                    raise
+        
+        raise Exception("Failed to generate script after all attempts")
+    
+    def stream_with_template(
+        self,
+        stream: ScriptStream,
+        topic: str,
+        story_type: str,
+        template: Optional[Dict] = None,
+        research_data: Optional[str] = None,
+        duration_minutes: int = 10,
+        num_scenes: int = 10,
+    ) -> Dict:
+        """
+        🌊 Same as generate_with_template, but streams the response
+        
+        Text is pushed into `stream` as Gemini writes it, so narration and
+        image workers reading from the stream start within seconds. There is
+        no retry (consumers have already used the text), and the stream is
+        always finished - with the error attached if generation fails.
+        """
+        
+        try:
+            prompt, story_type, research_data = self._prepare_template_prompt(
+                topic, story_type, template, research_data, duration_minutes, num_scenes
+            )
+            
+            cached = llm_cache.lookup(self.model, prompt, self.generation_config)
+            if cached is not None:
+                stream.feed(cached)
+            else:
+                logger.info(f"   🌊 Streaming script from Gemini...")
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    stream.feed(chunk.text)
+            
+            script_text = self._clean_script(stream.text)
+            if len(script_text) < 500:
+                raise Exception(f"Streamed script too short ({len(script_text)} chars)")
+            
+        except Exception as e:
+            stream.finish(error=e)
+            raise
+        
+        stream.finish()
+        if cached is None:
+            llm_cache.store(self.model, prompt, self.generation_config, stream.text)
+        
+        logger.info(f"   🌊 Streamed {stream.sentence_count} sentences, {stream.image_count} IMAGE lines")
+        return self._build_result(script_text, story_type, template, research_data, num_scenes)
+    
+    def _generate_structured(
+        self,
+        prompt: str,
+        story_type: str,
+        template: Optional[Dict],
+        research_data: Optional[str],
+        num_scenes: int
+    ) -> Dict:
+        """
+        🧩 One call returning validated JSON scenes
+        
+        Narration, image description and characters come straight from the
+        model per scene, so there is no IMAGE: scraping, no made-up fallback
+        descriptions and no length-based full retry.
+        
+        Raises:
+            SceneValidationError: Response didn't match the schema
+        """
+        logger.info(f"   🧩 Structured scene output ({num_scenes} scenes)...")
+        structured_prompt = prompt + structured_output_instructions(num_scenes)
+        
+        response_text = llm_cache.generate(self.structured_model, structured_prompt, self.structured_config)
+        
+        try:
+            parsed = parse_structured_scenes(response_text, num_scenes)
+        except SceneValidationError:
+            llm_cache.invalidate(self.structured_model, structured_prompt, self.structured_config)
+            raise
+        
+        script_text = self._clean_script(parsed['script'])
+        scenes = parsed['scenes']
+        
+        if len(scenes) < num_scenes:
+            logger.warning(f"   ⚠️  Model returned {len(scenes)}/{num_scenes} scenes - using what it wrote")
+        if len(script_text) < 500:
+            logger.warning(f"   ⚠️  Short script ({len(script_text)} chars) - kept, no full retry")
+        
+        # Local, not on self: this generator is shared by jobs running at the same time
+        characters = sorted({c for scene in scenes for c in scene['characters']})
+        characters = characters or self._extract_characters(script_text)
+        
+        logger.success(f"✅ Generated {len(script_text)} characters in {len(scenes)} structured scenes")
+        logger.info(f"   Words: {len(script_text.split())}")
+        logger.info(f"   Characters: {', '.join(characters[:3])}")
+        
+        return {
+            "script": script_text,
+            "title": parsed['title'],
+            "characters": characters,
+            "scenes": scenes,
+            "story_type": story_type,
+            "word_count": len(script_text.split()),
+            "character_count": len(script_text),
+            "used_template": template is not None,
+            "used_research": research_data is not None,
+            "structured": True,
+        }
+    
+    def _prepare_template_prompt(
+        self,
+        topic: str,
+        story_type: str,
+        template: Optional[Dict],
+        research_data: Optional[str],
+        duration_minutes: int,
+        num_scenes: int
+    ):
+        """Resolve story type, fetch research if needed and build the prompt"""
+        
         if story_type not in STORY_TYPES:
             logger.warning(f"Unknown story type: {story_type}")
             story_type = "scary_horror"
@@ -107,48 +283,35 @@ class EnhancedScriptGenerator:
             num_scenes=num_scenes
         )
         
-        # Generate with retry
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                logger.info(f"   Attempt {attempt + 1}/{max_attempts}...")
-                
-                response = self.model.generate_content(prompt)
-                script_text = response.text
-                
-                # Clean output
-                script_text = self._clean_script(script_text)
-                
-                # Validate
-                if len(script_text) < 500:
-                    logger.warning("   Script too short, retrying...")
-                    continue
-                
-                # Extract metadata
-                self.character_names = self._extract_characters(script_text)
-                scenes = self._parse_scenes(script_text, num_scenes)
-                
-                logger.success(f"✅ Generated {len(script_text)} characters")
-                logger.info(f"   Words: {len(script_text.split())}")
-                logger.info(f"   Characters: {', '.join(self.character_names[:3])}")
-                
-                return {
-                    "script": script_text,
-                    "characters": self.character_names,
-                    "scenes": scenes,
-                    "story_type": story_type,
-                    "word_count": len(script_text.split()),
-                    "character_count": len(script_text),
-                    "used_template": template is not None,
-                    "used_research": research_data is not None,
-                }
-                
-            except Exception as e:
-                logger.error(f"   Attempt {attempt + 1} failed: {e}")
-                if attempt == max_attempts - 1:
-                    raise
-        
-        raise Exception("Failed to generate script after all attempts")
+        return prompt, story_type, research_data
+    
+    def _build_result(
+        self,
+        script_text: str,
+        story_type: str,
+        template: Optional[Dict],
+        research_data: Optional[str],
+        num_scenes: int
+    ) -> Dict:
+        """Extract metadata from a finished script"""
+        
+        characters = self._extract_characters(script_text)
+        scenes = self._parse_scenes(script_text, num_scenes)
+        
+        logger.success(f"✅ Generated {len(script_text)} characters")
+        logger.info(f"   Words: {len(script_text.split())}")
+        logger.info(f"   Characters: {', '.join(characters[:3])}")
+        
+        return {
+            "script": script_text,
+            "characters": characters,
+            "scenes": scenes,
+            "story_type": story_type,
+            "word_count": len(script_text.split()),
+            "character_count": len(script_text),
+            "used_template": template is not None,
+            "used_research": research_data is not None,
+        }
     
     def _build_template_prompt(
         self,
@@ -478,11 +641,8 @@ THINK OF IT LIKE:
         return instructions
     
     def _clean_script(self, text: str) -> str:
-        """Remove XML/SSML tags"""
-        text = re.sub(r'<[^>]*>', '', text)
-        text = re.sub(r'&[a-z]+;', '', text)
-        text = re.sub(r'\[\[.*?\]\]', '', text)
-        return text.strip()
+        """Remove XML/SSML tags, markdown and scene markers (same rules as streamed narration)"""
+        return clean_narration(text)
     
     def _extract_characters(self, text: str) -> List[str]:
         """Extract character names"""
@@ -581,14 +741,15 @@ THINK OF IT LIKE:
         
         return description
     
-    def _create_image_description_from_text(self, text: str, scene_num: int, story_type: str) -> str:
+    def _create_image_description_from_text(self, text: str, scene_num: int, story_type: str,
+                                            characters: List[str]) -> str:
         """Create detailed image description from story text"""
         
         # Extract key elements (characters, objects, actions, emotions)
         words = text.lower().split()[:50]  # First 50 words of scene
         
         # Detect scene elements
-        has_character = any(name.lower() in ' '.join(words) for name in self.character_names[:3])
+        has_character = any(name.lower() in ' '.join(words) for name in characters[:3])
         has_action = any(word in ' '.join(words) for word in ['run', 'walk', 'look', 'turn', 'move', 'open', 'close'])
         has_emotion = any(word in ' '.join(words) for word in ['fear', 'joy', 'sad', 'angry', 'love', 'terror', 'happy'])
         
@@ -596,8 +757,8 @@ THINK OF IT LIKE:
         description_parts = []
         
         # Add main subject
-        if has_character and self.character_names:
-            description_parts.append(f"{self.character_names[0]}")
+        if has_character and characters:
+            description_parts.append(f"{characters[0]}")
         else:
             description_parts.append("Main character")
         
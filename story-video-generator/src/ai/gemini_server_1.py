@@ -5,14 +5,16 @@ Does NOT analyze templates (Server 0 handles that)
 Does NOT generate image prompts (Server 2 handles that)
 """
 
-import google.generativeai as genai
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import json
 import re
 
-from config.settings import GEMINI_SETTINGS
+from config.settings import GEMINI_SETTINGS, LLM_HEDGE_SETTINGS
 from config.story_types import STORY_TYPES
-from src.utils.api_manager import api_manager
+from src.utils.gemini_pool import gemini_pool
 from src.utils.logger import logger
+from src.utils.llm_cache import llm_cache
 
 
 class GeminiServer1:
@@ -22,19 +24,16 @@ class GeminiServer1:
     """
 
     def __init__(self):
-        api_key = api_manager.get_key('gemini')
-        if not api_key:
-            raise ValueError("Gemini Server 1 requires API key!")
-
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash-exp",
-            generation_config={
-                "temperature": 0.75,
-                "top_p": 0.92,
-                "top_k": 50,
-                "max_output_tokens": 16384,
-            }
+        self.generation_config = {
+            "temperature": 0.75,
+            "top_p": 0.92,
+            "top_k": 50,
+            "max_output_tokens": 16384,
+        }
+        self.model = gemini_pool.model(
+            "gemini-2.0-flash-exp",
+            self.generation_config,
+            deadline=LLM_HEDGE_SETTINGS['script_deadline_seconds']
         )
 
         print(f"✅ Gemini Server 1 initialized")
@@ -81,6 +80,15 @@ class GeminiServer1:
         CHUNK_THRESHOLD = 1500  # words (10 minutes)
 
         if target_words > CHUNK_THRESHOLD:
+            if GEMINI_SETTINGS['outline_first_chunks']:
+                logger.info(f"   🗺️ Long script detected - using outline-first parallel generation")
+                try:
+                    return self._generate_from_outline(
+                        topic, story_type, template, target_words, num_scenes, duration_minutes
+                    )
+                except Exception as e:
+                    logger.warning(f"   Outline-first generation failed ({e}) - falling back to sequential chunks")
+
             logger.info(f"   🔪 Long script detected - using chunked generation")
             return self._generate_in_chunks(
                 topic, story_type, template, target_words, num_scenes, duration_minutes
@@ -219,6 +227,170 @@ class GeminiServer1:
             logger.error(f"❌ Gemini Server 1: Chunked generation error: {e}")
             raise
 
+    def _generate_from_outline(
+        self,
+        topic: str,
+        story_type: str,
+        template: Optional[Dict],
+        target_words: int,
+        num_scenes: int,
+        duration_minutes: int
+    ) -> str:
+        """
+        Generate a long script section-by-section in PARALLEL
+
+        Strategy:
+        1. One cheap outline call: beats plus opening/closing sentences per section
+        2. Every section is written at the same time against that outline
+           (hand-off sentences replace the previous chunk's ending as context)
+        3. Sections are joined in order
+
+        Latency is the outline plus the slowest section, instead of the sum
+        of all chunks. Long videos get more, smaller sections.
+        """
+        sections = self._plan_sections(target_words, num_scenes)
+        logger.info(f"   📊 Target: {target_words} words in {len(sections)} sections")
+
+        logger.info(f"   🗺️ Generating outline...")
+        outline = self._generate_outline(topic, story_type, template, sections)
+
+        workers = min(len(sections), GEMINI_SETTINGS['max_parallel_sections'])
+        logger.info(f"   🔄 Writing {len(sections)} sections ({workers} at a time)...")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="script-section") as executor:
+            futures = [
+                executor.submit(
+                    self._generate_chunk,
+                    topic,
+                    story_type,
+                    template,
+                    section['words'],
+                    section['scenes'],
+                    duration_minutes,
+                    f"section {i + 1} of {len(sections)}",
+                    self._section_instruction(outline, i),
+                    None  # Outline hand-offs replace the previous chunk's ending
+                )
+                for i, section in enumerate(sections)
+            ]
+            chunks = [future.result() for future in futures]
+
+        merged_script = self._merge_script_chunks(*chunks)
+
+        logger.success(f"✅ Outline-first script generated!")
+        logger.info(f"   Total: {len(merged_script)} chars, ~{len(merged_script.split())} words")
+        logger.info(f"   Sections merged: {len(chunks)}")
+
+        return merged_script
+
+    def _plan_sections(self, target_words: int, num_scenes: int) -> List[Dict]:
+        """Split the word and scene budget into sections (3+ sections, ~10 min each)"""
+        count = max(3, round(target_words / GEMINI_SETTINGS['section_words']))
+        count = min(count, max(3, num_scenes))  # Every section needs at least one scene
+
+        sections = []
+        for i in range(count):
+            sections.append({
+                'words': target_words // count + (1 if i < target_words % count else 0),
+                'scenes': max(1, num_scenes // count + (1 if i < num_scenes % count else 0)),
+            })
+        return sections
+
+    def _generate_outline(
+        self,
+        topic: str,
+        story_type: str,
+        template: Optional[Dict],
+        sections: List[Dict]
+    ) -> List[Dict]:
+        """One short call that plans every section's beats and hand-offs"""
+
+        style = STORY_TYPES.get(story_type, STORY_TYPES["scary_horror"])
+        section_lines = "\n".join(
+            f"- Section {i + 1}: ~{section['words']} words, {section['scenes']} scenes"
+            for i, section in enumerate(sections)
+        )
+
+        prompt = f"""You are planning a {style['name']} story for a YouTube narration.
+
+TOPIC: {topic}
+TONE: {style['tone']}
+"""
+        if template:
+            prompt += f"""HOOK STYLE: {template.get('hookStyle', 'dramatic')}
+KEY PATTERNS: {', '.join(template.get('keyPatterns', []))}
+"""
+        prompt += f"""
+The story will be written in {len(sections)} sections by different writers at the same time:
+{section_lines}
+
+Section 1 opens with the hook. The last section holds the climax and resolution.
+Tension must rise across the sections in between.
+
+Return ONLY a JSON array with one object per section, in order:
+[
+  {{
+    "summary": "one sentence of what happens",
+    "beats": ["beat 1", "beat 2", "beat 3"],
+    "opening_sentence": "the exact first sentence of the section",
+    "closing_sentence": "the exact last sentence, which leads into the next section"
+  }}
+]
+
+Use consistent character names, places and first-person narrator throughout."""
+
+        response_text = llm_cache.generate(self.model, prompt, self.generation_config)
+
+        text = response_text.strip()
+        if text.startswith('```'):
+            text = re.sub(r'^```(?:json)?\s*', '', text)
+            text = re.sub(r'\s*```$', '', text)
+
+        json_match = re.search(r'\[[\s\S]*\]', text)
+        try:
+            outline = json.loads(json_match.group() if json_match else text)
+        except json.JSONDecodeError as e:
+            llm_cache.invalidate(self.model, prompt, self.generation_config)
+            raise Exception(f"Outline was not valid JSON: {e}")
+
+        if not isinstance(outline, list) or len(outline) < len(sections):
+            llm_cache.invalidate(self.model, prompt, self.generation_config)
+            raise Exception(f"Outline has {len(outline) if isinstance(outline, list) else 0} sections, expected {len(sections)}")
+
+        return outline[:len(sections)]
+
+    def _section_instruction(self, outline: List[Dict], index: int) -> str:
+        """Chunk instruction for one section: full outline plus its own beats and hand-offs"""
+        section = outline[index]
+        last = len(outline) - 1
+
+        story_so_far = "\n".join(
+            f"{i + 1}. {part.get('summary', '')}" for i, part in enumerate(outline)
+        )
+        beats = "\n".join(f"- {beat}" for beat in section.get('beats', []))
+
+        if index == 0:
+            role = "Start with a powerful hook and establish the setup."
+        elif index == last:
+            role = "Deliver the climax and provide a satisfying resolution. End the story powerfully."
+        else:
+            role = "This is the middle of the story - do NOT write a hook, intro or ending. Build rising action and tension."
+
+        instruction = f"""{role}
+
+FULL STORY OUTLINE (other sections are written by other writers):
+{story_so_far}
+
+YOUR SECTION ({index + 1}) MUST COVER THESE BEATS:
+{beats}
+"""
+        if section.get('opening_sentence'):
+            instruction += f"\nBEGIN your section with exactly this sentence: \"{section['opening_sentence']}\""
+        if index < last and section.get('closing_sentence'):
+            instruction += f"\nEND your section with exactly this sentence: \"{section['closing_sentence']}\""
+
+        return instruction
+
     def _generate_chunk(
         self,
         topic: str,
@@ -258,24 +430,20 @@ Continue naturally from this point. DO NOT repeat this text.
 
         prompt += chunk_instruction
 
-        response = self.model.generate_content(prompt)
-        if not response or not response.text:
-            raise Exception(f"Empty response for {chunk_position} chunk")
+        try:
+            response_text = llm_cache.generate(self.model, prompt, self.generation_config)
+        except Exception as e:
+            raise Exception(f"Empty response for {chunk_position} chunk: {e}")
 
-        return response.text.strip()
+        return response_text.strip()
 
-    def _merge_script_chunks(
-        self,
-        beginning: str,
-        middle: str,
-        end: str
-    ) -> str:
+    def _merge_script_chunks(self, *chunks: str) -> str:
         """
         Merge script chunks seamlessly
         Simply concatenate with paragraph breaks
         """
         # Add paragraph breaks between chunks for natural flow
-        merged = beginning + "\n\n" + middle + "\n\n" + end
+        merged = "\n\n".join(chunks)
         return merged
 
     def _build_script_prompt(
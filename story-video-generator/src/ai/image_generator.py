@@ -6,24 +6,35 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-import requests
+import hashlib
 import time
-from typing import List, Dict, Optional
+from urllib.parse import quote
+from typing import Dict, Iterable, List, Optional
 from concurrent.futures import ThreadPoolExecutor
-import threading
 
+from config.settings import FLUX_SETTINGS, IMAGE_DEDUP_SETTINGS
 from src.ai.ultra_image_prompts import create_prompt_builder
 from src.utils.file_handler import file_handler
+from src.utils.image_cache import image_cache
+from src.utils.image_fetcher import image_fetcher
+from src.utils.image_hash import near_duplicates
 from src.utils.logger import logger
+from src.utils.workspace import JobWorkspace
 
 
 class UltraImageGenerator:
     """Generate professional images with FLUX.1 Schnell - highest quality"""
     
-    def __init__(self, image_style: str = "cinematic_film", story_type: str = "scary_horror"):
+    def __init__(
+        self,
+        image_style: str = "cinematic_film",
+        story_type: str = "scary_horror",
+        workspace: Optional[JobWorkspace] = None
+    ):
         self.prompt_builder = create_prompt_builder(image_style, story_type)
         self.image_style = image_style
         self.story_type = story_type
+        self.workspace = workspace  # Per-job temp dir (None = shared temp dir)
         self.model = "FLUX.1 Schnell"  # Using FLUX.1 Schnell for superior quality
     
     def register_characters(self, characters: Dict[str, str]):
@@ -36,62 +47,123 @@ class UltraImageGenerator:
         scene_description: str,
         scene_number: int,
         scene_type: str = "establishing",
-        characters: List[str] = None
+        characters: List[str] = None,
+        seed: Optional[int] = None
     ) -> Optional[Dict]:
-        """Generate single scene image using FLUX.1 Schnell"""
+        """Generate single scene image using FLUX.1 Schnell (reused from the image cache when possible)"""
         
-        # Build professional prompt
-        prompt_data = self.prompt_builder.build_scene_prompt(
-            scene_description,
-            scene_type,
-            characters
-        )
+        image_request = self._build_request(scene_description, scene_number, scene_type, characters, seed)
+        image_request['scene_type'] = scene_type
+        return self._generate_request(image_request)
+    
+    def _generate_request(self, image_request: Dict) -> Optional[Dict]:
+        """Fetch one image (cache first, then a blocking call on the shared pool)"""
+        cached = self._from_cache(image_request)
+        if cached:
+            return cached
         
-        logger.info(f"   Generating scene {scene_number} ({scene_type}) with FLUX.1 Schnell...")
+        logger.info(f"   Generating scene {image_request['scene_number']} ({image_request['scene_type']}) with FLUX.1 Schnell...")
         
-        # Use Pollinations AI with FLUX.1 Schnell model for higher quality
         try:
-            # FLUX.1 Schnell parameters for best quality
-            params = {
-                'model': 'flux',
-                'width': 1024,
-                'height': 1024,
-                'nologo': 'true',
-                'enhance': 'true'
-            }
-            
-            # Build URL with FLUX.1 Schnell
-            base_url = f"https://image.pollinations.ai/prompt/{requests.utils.quote(prompt_data['prompt'])}"
-            param_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-            url = f"{base_url}?{param_string}"
-            
-            response = requests.get(url, timeout=180)  # 3-minute timeout for FLUX.1 Schnell (high quality takes time!)
+            # Shared keep-alive pool; 3-minute timeout for FLUX.1 Schnell (high quality takes time!)
+            response = image_fetcher.session.get(image_request['url'], timeout=180)
             
             if response.status_code == 200:
-                filename = f"scene_{scene_number:03d}.png"
-                filepath = file_handler.save_binary(
-                    response.content,
-                    filename,
-                    file_handler.temp_dir
-                )
-                
-                logger.success(f"      ✅ Generated (FLUX.1 Schnell): {filename}")
-                
-                return {
-                    "filepath": str(filepath),
-                    "scene_number": scene_number,
-                    "prompt": prompt_data['prompt'],
-                    "style": self.image_style,
-                    "model": "FLUX.1 Schnell"
-                }
+                return self._save_image(image_request, response.content)
+            logger.error(f"      ❌ Failed: HTTP {response.status_code}")
         
         except Exception as e:
             logger.error(f"      ❌ Failed: {e}")
         
         return None
     
-    def _generate_single_scene(self, scene, scene_index: int, characters: Dict[str, str] = None) -> Optional[Dict]:
-        """Helper method to generate a single scene (used for parallel processing)"""
+    @staticmethod
+    def scene_seed(prompt: str, scene_number: int) -> int:
+        """Deterministic seed for a scene (stable across runs and processes)"""
+        digest = hashlib.sha256(f"{scene_number}:{prompt}".encode('utf-8')).hexdigest()
+        return int(digest[:8], 16) % 2_000_000_000
+    
+    @staticmethod
+    def perturbed_seed(seed: int, attempt: int) -> int:
+        """Another deterministic seed for re-rolling a scene (attempt 1, 2, ...)"""
+        digest = hashlib.sha256(f"{seed}:reroll:{attempt}".encode('utf-8')).hexdigest()
+        return int(digest[:8], 16) % 2_000_000_000
+    
+    def _build_request(
+        self,
+        scene_description: str,
+        scene_number: int,
+        scene_type: str,
+        characters: Optional[List[str]],
+        seed: Optional[int] = None
+    ) -> Dict:
+        """Prompt, seed, Pollinations URL, cache key and target file for one scene"""
+        
+        # Build professional prompt
+        prompt = self.prompt_builder.build_scene_prompt(scene_description, scene_type, characters)['prompt']
+        
+        # Same prompt + scene always gets the same seed, so re-renders hit the cache
+        if seed is None:
+            seed = self.scene_seed(prompt, scene_number)
+        
+        return self._request_for_prompt(prompt, scene_number, seed)
+    
+    def _request_for_prompt(self, prompt: str, scene_number: int, seed: int) -> Dict:
+        """Request for an already-built prompt (also used to re-roll a scene with another seed)"""
+        
+        # FLUX.1 Schnell parameters for best quality
+        params = {
+            'model': FLUX_SETTINGS['model'],
+            'width': FLUX_SETTINGS['width'],
+            'height': FLUX_SETTINGS['height'],
+            'seed': seed,
+            'nologo': str(FLUX_SETTINGS['nologo']).lower(),
+            'enhance': str(FLUX_SETTINGS['enhance']).lower()
+        }
+        param_string = '&'.join([f"{k}={v}" for k, v in params.items()])
+        
+        # Stand-in renders get their own cache entries, so a later online run never reuses them
+        cache_model = f"offline:{FLUX_SETTINGS['model']}" if image_fetcher.offline else FLUX_SETTINGS['model']
+        
+        filename = f"scene_{scene_number:03d}.png"
+        return {
+            'scene_number': scene_number,
+            'prompt': prompt,
+            'seed': seed,
+            'filename': filename,
+            'filepath': file_handler.get_temp_dir(self.workspace) / filename,
+            'url': f"https://image.pollinations.ai/prompt/{quote(prompt)}?{param_string}",
+            'cache_key': image_cache.make_key(
+                prompt, cache_model, FLUX_SETTINGS['width'], FLUX_SETTINGS['height'],
+                seed, FLUX_SETTINGS['enhance']
+            ),
+        }
+    
+    def _from_cache(self, image_request: Dict) -> Optional[Dict]:
+        if not image_cache.fetch(image_request['cache_key'], image_request['filepath']):
+            return None
+        logger.success(f"      ⚡ Cached image: {image_request['filename']}")
+        return self._image_result(image_request, cached=True)
+    
+    def _save_image(self, image_request: Dict, content: bytes) -> Dict:
+        file_handler.save_binary(content, image_request['filename'], file_handler.get_temp_dir(self.workspace))
+        image_cache.store(image_request['cache_key'], content)
+        logger.success(f"      ✅ Generated (FLUX.1 Schnell): {image_request['filename']}")
+        return self._image_result(image_request)
+    
+    def _image_result(self, image_request: Dict, cached: bool = False) -> Dict:
+        return {
+            "filepath": str(image_request['filepath']),
+            "scene_number": image_request['scene_number'],
+            "prompt": image_request['prompt'],
+            "seed": image_request['seed'],
+            "cached": cached,
+            "style": self.image_style,
+            "model": "FLUX.1 Schnell"
+        }
+    
+    def _scene_request(self, scene, scene_index: int, characters: Dict[str, str] = None) -> Optional[Dict]:
+        """Build the image request for a scene dict (or plain description string)"""
         
         # Handle both dict and string inputs (for backward compatibility)
         if isinstance(scene, str):
@@ -125,26 +197,32 @@ class UltraImageGenerator:
                 if char_name.lower() in scene.get('content', '').lower():
                     scene_chars.append(char_name)
         
-        # Generate image
-        return self.generate_scene_image(
+        image_request = self._build_request(
             scene.get('image_description', scene.get('content', 'scene')),
             scene.get('scene_number', scene_index + 1),
             scene_type,
             scene_chars if scene_chars else None
         )
+        image_request['scene_type'] = scene_type
+        return image_request
     
     def generate_batch(
         self,
         scenes: List[Dict],
         characters: Dict[str, str] = None
     ) -> List[Dict]:
-        """⚡ Generate images for all scenes - PARALLEL PROCESSING FOR SPEED!"""
+        """
+        ⚡ Generate images for all scenes - PARALLEL PROCESSING FOR SPEED!
+        
+        Cache hits are copied straight away; everything else goes through
+        the pooled async fetcher, which adapts how many requests run at
+        once and retries failed scenes with backoff.
+        """
         
         logger.info(f"🎨 Generating {len(scenes)} images...")
         logger.info(f"   Model: {self.model} (High Quality)")
         logger.info(f"   Style: {self.image_style}")
         logger.info(f"   Niche: {self.story_type}")
-        logger.info(f"   🚀 Using PARALLEL processing for 10x speedup!")
         
         # Register characters
         if characters:
@@ -153,40 +231,52 @@ class UltraImageGenerator:
         
         start_time = time.time()
         
-        # ⚡ PARALLEL IMAGE GENERATION - Generate all images at once!
         images = []
+        pending = {}
+        image_requests = {}
+        for i, scene in enumerate(scenes):
+            image_request = self._scene_request(scene, i, characters)
+            if image_request is None:
+                continue
+            image_requests[image_request['scene_number']] = image_request
+            cached = self._from_cache(image_request)
+            if cached:
+                images.append(cached)
+            else:
+                pending[f"scene {image_request['scene_number']}"] = image_request
         
-        # Use ThreadPoolExecutor to generate all images in parallel
-        # Max workers = 10 (all images at once for maximum speed!)
-        with ThreadPoolExecutor(max_workers=min(10, len(scenes))) as executor:
-            # Submit all tasks
-            futures = []
-            for i, scene in enumerate(scenes):
-                future = executor.submit(self._generate_single_scene, scene, i, characters)
-                futures.append(future)
-            
-            # Collect results as they complete
-            failed_scenes = []
-            for i, future in enumerate(futures):
-                try:
-                    image_data = future.result(timeout=240)  # 4-minute timeout per image
-                    if image_data:
-                        images.append(image_data)
-                        logger.info(f"      ✅ Image {i+1}/{len(scenes)}: {image_data['filepath']}")
-                    else:
-                        logger.error(f"      ❌ Scene {i+1} returned None!")
-                        failed_scenes.append(i)
-                except Exception as e:
-                    logger.error(f"      ❌ Scene {i+1} failed: {e}")
-                    failed_scenes.append(i)
+        if pending:
+            logger.info(f"   🚀 Fetching {len(pending)} images (adaptive concurrency, {len(images)} from cache)")
+        
+        failed_scenes = []
+        
+        def on_result(job_id, content):
+            # Called in completion order - save each image as soon as it arrives
+            image_data = self._save_image(pending[job_id], content)
+            images.append(image_data)
+            logger.info(f"      ✅ Image {len(images)}/{len(scenes)}: {image_data['filepath']}")
+        
+        def on_failure(job_id, error):
+            logger.error(f"      ❌ {job_id.capitalize()} failed after retries: {error}")
+            failed_scenes.append(pending[job_id]['scene_number'])
+        
+        image_fetcher.fetch_all(
+            [(job_id, image_request['url']) for job_id, image_request in pending.items()],
+            on_result,
+            on_failure
+        )
+        images = self.refine_images(images, image_requests)
+        generated = {img['scene_number'] for img in images}
+        failed_scenes = [n for n in failed_scenes if n not in generated]
         
         duration = time.time() - start_time
-        logger.success(f"✅ Generated {len(images)}/{len(scenes)} images in {duration:.1f}s ⚡")
+        cached = sum(1 for img in images if img.get('cached'))
+        logger.success(f"✅ Generated {len(images)}/{len(scenes)} images in {duration:.1f}s ⚡ ({cached} from cache)")
         
         # 🚨 CRITICAL: If we don't have enough images, something is WRONG!
         if len(images) < len(scenes):
             logger.error(f"   ⚠️  WARNING: Only {len(images)}/{len(scenes)} images generated!")
-            logger.error(f"   Failed scenes: {failed_scenes}")
+            logger.error(f"   Failed scenes: {sorted(failed_scenes)}")
             logger.error(f"   This will cause video to have repeated images!")
         
         # Only show average if we generated images
@@ -194,14 +284,144 @@ class UltraImageGenerator:
             logger.info(f"   Average: {duration/len(images):.1f}s per image (parallel!)")
         else:
             logger.error(f"   ⚠️  No images generated - check prompts and API connection")
-        
+
+        return images
+
+    def generate_stream(
+        self,
+        descriptions: Iterable[str],
+        max_images: int,
+        characters: Dict[str, str] = None
+    ) -> List[Dict]:
+        """
+        🌊 Generate images while descriptions are still arriving
+
+        Each description (e.g. an IMAGE: line from a streamed script) is
+        submitted as soon as it is yielded. Stops taking new descriptions
+        after max_images; results come back in description order.
+        """
+
+        logger.info(f"🎨 Streaming image generation (up to {max_images} images)...")
+
+        if characters:
+            self.register_characters(characters)
+
+        start_time = time.time()
+        futures = []
+        image_requests = {}
+
+        with ThreadPoolExecutor(max_workers=min(10, max(1, max_images))) as executor:
+            for i, description in enumerate(descriptions):
+                if i >= max_images:
+                    # Keep draining so the producer never blocks on us
+                    continue
+                scene = {'image_description': description, 'content': description, 'scene_number': i + 1}
+                image_request = self._scene_request(scene, i, characters)
+                image_requests[image_request['scene_number']] = image_request
+                futures.append(executor.submit(self._generate_request, image_request))
+                logger.info(f"   🌊 Scene {i+1} queued: {description[:60]}...")
+
+            images = []
+            for i, future in enumerate(futures):
+                try:
+                    image_data = future.result(timeout=240)
+                    if image_data:
+                        images.append(image_data)
+                    else:
+                        logger.error(f"      ❌ Scene {i+1} returned None!")
+                except Exception as e:
+                    logger.error(f"      ❌ Scene {i+1} failed: {e}")
+
+        images = self.refine_images(images, image_requests)
+        logger.success(f"✅ Streamed {len(images)}/{len(futures)} images in {time.time() - start_time:.1f}s ⚡")
         return images
 
+    def refine_images(self, images: List[Dict], image_requests: Dict[int, Dict], time_budget: Optional[float] = None) -> List[Dict]:
+        """
+        🔁 Fill gaps and replace near-duplicates - only the scenes that need it
+
+        Failed scenes are requested again; a scene whose image is nearly
+        identical (dHash + pHash) to an earlier scene's is re-rolled with a
+        perturbed seed. Repeats until everything is unique, max_rounds is
+        reached or the time budget runs out (a round that has started is
+        allowed to finish). Returns images sorted by scene number.
+        """
+        settings = IMAGE_DEDUP_SETTINGS
+        by_scene = {img['scene_number']: img for img in images}
+        if not settings['enabled'] or not image_requests:
+            return sorted(by_scene.values(), key=lambda img: img['scene_number'])
+
+        deadline = time.time() + (settings['time_budget_seconds'] if time_budget is None else time_budget)
+        rerolls: Dict[int, int] = {}
+
+        for round_number in range(1, settings['max_rounds'] + 1):
+            missing = [n for n in image_requests if n not in by_scene]
+            duplicates = self._duplicate_scenes(by_scene)
+            if not missing and not duplicates:
+                break
+            if time.time() >= deadline:
+                logger.warning(f"   ⏱️ Image refine budget used up - leaving {len(missing)} gaps, {len(duplicates)} duplicates")
+                break
+
+            logger.info(f"   🔁 Refine round {round_number}: {len(missing)} failed scenes, "
+                        f"{len(duplicates)} near-duplicates {sorted(duplicates)}")
+
+            retry = {}
+            for n in missing:
+                retry[f"scene {n}"] = image_requests[n]
+            for n in duplicates:
+                rerolls[n] = rerolls.get(n, 0) + 1
+                base = image_requests[n]
+                image_request = self._request_for_prompt(base['prompt'], n, self.perturbed_seed(base['seed'], rerolls[n]))
+                image_request['scene_type'] = base['scene_type']
+                retry[f"scene {n}"] = image_request
+
+            for job_id, image_request in list(retry.items()):
+                cached = self._from_cache(image_request)
+                if cached:
+                    by_scene[image_request['scene_number']] = dict(cached, rerolled=rerolls.get(image_request['scene_number'], 0))
+                    del retry[job_id]
+
+            def on_result(job_id, content):
+                image_request = retry[job_id]
+                image_data = self._save_image(image_request, content)
+                by_scene[image_request['scene_number']] = dict(image_data, rerolled=rerolls.get(image_request['scene_number'], 0))
+
+            image_fetcher.fetch_all([(job_id, r['url']) for job_id, r in retry.items()], on_result)
+
+        missing = [n for n in image_requests if n not in by_scene]
+        if missing:
+            logger.error(f"   ⚠️  Scenes still without an image: {sorted(missing)}")
+        return sorted(by_scene.values(), key=lambda img: img['scene_number'])
+
+    def _duplicate_scenes(self, by_scene: Dict[int, Dict]) -> set:
+        """Later scene of every near-duplicate pair (the earlier one is kept)"""
+        numbers = sorted(by_scene)
+        try:
+            pairs = near_duplicates(
+                [by_scene[n]['filepath'] for n in numbers],
+                IMAGE_DEDUP_SETTINGS['dhash_threshold'],
+                IMAGE_DEDUP_SETTINGS['phash_threshold']
+            )
+        except Exception as e:
+            logger.warning(f"   Duplicate check skipped: {e}")
+            return set()
+
+        redo = set()
+        for i, j, _ in pairs:
+            if numbers[i] not in redo:  # If the earlier one is being re-rolled anyway, keep this one
+                redo.add(numbers[j])
+        return redo
+
 
 # Quick function
-def create_image_generator(image_style: str, story_type: str) -> UltraImageGenerator:
+def create_image_generator(
+    image_style: str,
+    story_type: str,
+    workspace: Optional[JobWorkspace] = None
+) -> UltraImageGenerator:
     """Create image generator with chosen styles"""
-    return UltraImageGenerator(image_style, story_type)
+    return UltraImageGenerator(image_style, story_type, workspace)
 
 
 # Default global instance for backward compatibility
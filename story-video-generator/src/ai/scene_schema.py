@@ -0,0 +1,168 @@
+"""
+🧩 SCENE SCHEMA - Structured (JSON) script output
+The model returns the story as a list of scenes - narration, image
+description and characters per scene - which is validated locally instead
+of scraping IMAGE: lines out of free text
+"""
+
+import json
+import re
+from typing import Dict, List
+
+
+class SceneValidationError(ValueError):
+    """Raised when a structured response doesn't match the scene schema"""
+
+
+# Gemini response_schema (OpenAPI subset) - also shown to models without schema support
+SCENE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "scenes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "narration": {"type": "string"},
+                    "image_description": {"type": "string"},
+                    "characters": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["narration", "image_description", "characters"],
+            },
+        },
+    },
+    "required": ["scenes"],
+}
+
+
+def structured_output_instructions(num_scenes: int) -> str:
+    """Prompt addendum that switches a script prompt to JSON scene output"""
+    return f"""
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+📦 OUTPUT FORMAT OVERRIDE - JSON SCENES (this replaces the IMAGE: line format)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Return ONLY a JSON object - no markdown, no commentary:
+{{
+  "title": "short story title",
+  "scenes": [
+    {{
+      "narration": "the exact narration text for this scene (read aloud as-is)",
+      "image_description": "20-30 word visual description for this scene's image",
+      "characters": ["names of characters visible in this scene"]
+    }}
+  ]
+}}
+
+- EXACTLY {num_scenes} scenes, in story order
+- All narration together is the complete script at the full requested length
+- Narration must NOT contain IMAGE: lines, labels or stage directions
+- Every image_description follows the image rules above
+"""
+
+
+def parse_structured_scenes(text: str, num_scenes: int) -> Dict:
+    """
+    Validate a JSON scene response and normalize it
+
+    Returns:
+        Dict with "title", "script" (all narration joined) and "scenes"
+        (scene_number, narration, image_description, characters, content)
+
+    Raises:
+        SceneValidationError: Not JSON, or no usable scenes
+    """
+    text = text.strip()
+    if text.startswith('```'):
+        text = re.sub(r'^```(?:json)?\s*', '', text)
+        text = re.sub(r'\s*```$', '', text)
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r'\{[\s\S]*\}', text)
+        if not match:
+            raise SceneValidationError("Response is not JSON")
+        try:
+            data = json.loads(match.group())
+        except json.JSONDecodeError as e:
+            raise SceneValidationError(f"Response is not valid JSON: {e}")
+
+    if not isinstance(data, dict) or not isinstance(data.get('scenes'), list):
+        raise SceneValidationError("JSON has no 'scenes' list")
+
+    scenes: List[Dict] = []
+    for i, raw in enumerate(data['scenes']):
+        if not isinstance(raw, dict):
+            raise SceneValidationError(f"Scene {i + 1} is not an object")
+
+        narration = str(raw.get('narration') or '').strip()
+        description = str(raw.get('image_description') or '').strip()
+        characters = raw.get('characters') or []
+        if not isinstance(characters, list):
+            characters = [characters]
+
+        if not narration:
+            raise SceneValidationError(f"Scene {i + 1} has no narration")
+        if re.search(r'^\s*IMAGE:', narration, re.IGNORECASE | re.MULTILINE):
+            narration = re.sub(r'^\s*IMAGE:.*$', '', narration, flags=re.IGNORECASE | re.MULTILINE).strip()
+
+        scenes.append({
+            'narration': narration,
+            'image_description': description or narration[:200],
+            'characters': [str(c).strip() for c in characters if str(c).strip()],
+        })
+
+    if not scenes:
+        raise SceneValidationError("JSON has no scenes")
+
+    # More scenes than images requested: merge neighbours (keep each group's first image)
+    if len(scenes) > num_scenes > 0:
+        merged = []
+        for group in range(num_scenes):
+            start = group * len(scenes) // num_scenes
+            end = (group + 1) * len(scenes) // num_scenes
+            members = scenes[start:end]
+            merged.append({
+                'narration': "\n\n".join(s['narration'] for s in members),
+                'image_description': members[0]['image_description'],
+                'characters': sorted({c for s in members for c in s['characters']}),
+            })
+        scenes = merged
+
+    for i, scene in enumerate(scenes):
+        scene['scene_number'] = i + 1
+        scene['content'] = scene['narration']  # Used for character matching downstream
+        scene['has_explicit_image'] = True
+
+    return {
+        'title': str(data.get('title') or '').strip(),
+        'script': "\n\n".join(scene['narration'] for scene in scenes),
+        'scenes': scenes,
+    }
+
+
+if __name__ == "__main__":
+    print("\n🧪 Testing scene schema...\n")
+
+    response = json.dumps({
+        "title": "The Attic",
+        "scenes": [
+            {"narration": f"Scene {i} narration. Something moved.", "image_description": f"dark attic {i}", "characters": ["Anna"]}
+            for i in range(1, 7)
+        ]
+    })
+
+    parsed = parse_structured_scenes(f"```json\n{response}\n```", num_scenes=3)
+    print(f"✅ Title: {parsed['title']}")
+    print(f"✅ Scenes: {len(parsed['scenes'])} (6 merged into 3)")
+    print(f"✅ Scene 1 image: {parsed['scenes'][0]['image_description']}")
+
+    try:
+        parse_structured_scenes('{"scenes": [{"narration": ""}]}', 3)
+    except SceneValidationError as e:
+        print(f"✅ Rejected: {e}")
+
+    print("\n✅ Scene schema working perfectly!\n")
@@ -20,7 +20,7 @@ from typing import Dict, List
 import re
 
 from config.settings import GEMINI_SETTINGS
-from src.utils.api_manager import api_manager
+from src.utils.gemini_pool import gemini_pool
 from src.utils.logger import logger
 
 # Import story types - with error handling
@@ -49,15 +49,13 @@ class ProScriptGenerator:
             self.character_names = []
             return
         
-        api_key = api_manager.get_key('gemini')
-        if not api_key:
+        if not gemini_pool.keys:
             print("⚠️  ProScriptGenerator: Gemini API key not found")
             self.model = None
             self.character_names = []
             return
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(GEMINI_SETTINGS['model'])
+        self.model = gemini_pool.model(GEMINI_SETTINGS['model'])
         self.character_names = []
     
     def generate_story(
@@ -0,0 +1,209 @@
+"""
+🌊 SCRIPT STREAM - Split a streamed script into narration and image work
+Completed sentences go to the narration queue and IMAGE: lines go to the
+image queue while Gemini is still writing the rest of the script
+"""
+
+import queue
+import re
+from typing import Iterator, List, Optional
+
+
+# Lines that are layout, not narration: markdown headings and [SCENE n] markers
+MARKER_LINE = re.compile(r'^\s*(?:#{1,6}\s.*|\[\s*scene\s*\d+[^\]]*\])\s*$', re.IGNORECASE)
+
+
+def clean_narration(text: str) -> str:
+    """
+    Script text as it should be spoken
+
+    Removes XML/SSML tags, entities, [[notes]], markdown headings and
+    emphasis and [SCENE n] markers. Applied to whole scripts and to each
+    streamed sentence, so both narration paths speak the same words.
+    """
+    text = re.sub(r'<[^>]*>', '', text)
+    text = re.sub(r'&[a-z]+;', '', text)
+    text = re.sub(r'\[\[.*?\]\]', '', text)
+    text = re.sub(r'^\s*#{1,6}\s.*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\[\s*scene\s*\d+[^\]]*\]', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'\*\*|__|`', '', text)
+    return text.strip()
+
+
+class ScriptStream:
+    """
+    Routes streamed script text to two work queues
+
+    Producer calls feed() with each text chunk and finish() at the end
+    (always - consumers block until finish() is called). Consumers iterate
+    sentences() and image_descriptions() from other threads.
+    """
+
+    # Sentence ends at . ! ? (plus closing quotes/brackets) followed by whitespace
+    SENTENCE_END = re.compile(r'[.!?]+["\'”’)\]]*\s+')
+    IMAGE_LINE = re.compile(r'^\s*IMAGE:\s*(.+?)\s*$', re.IGNORECASE)
+
+    _DONE = object()
+
+    def __init__(self):
+        self._sentences: "queue.Queue" = queue.Queue()
+        self._images: "queue.Queue" = queue.Queue()
+        self._line_buffer = ""      # Current line, not yet known to be narration
+        self._pending = ""          # Narration text not yet released as sentences
+        self._in_prose_line = False  # Current line already moved into _pending
+        self._parts: List[str] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.sentence_count = 0
+        self.image_count = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far (the raw script)"""
+        return "".join(self._parts)
+
+    def feed(self, chunk: str):
+        """Add a chunk of streamed text and emit anything now complete"""
+        if not chunk:
+            return
+
+        self._parts.append(chunk)
+        lines = (self._line_buffer + chunk).split('\n')
+        self._line_buffer = lines.pop()
+
+        for line in lines:
+            if self._in_prose_line:
+                # Rest of a narration line that was already being released
+                self._in_prose_line = False
+                self._add_prose(line + " ")
+            else:
+                self._route_line(line)
+
+        # A partial line that can't be an IMAGE: line or a marker is narration -
+        # release its finished sentences now instead of waiting for the newline
+        if self._line_buffer and (self._in_prose_line or not self._could_be_special(self._line_buffer)):
+            self._in_prose_line = True
+            partial, self._line_buffer = self._line_buffer, ""
+            self._add_prose(partial)
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Flush what's left and release consumers"""
+        if self.finished:
+            return
+
+        if error is None:
+            if self._in_prose_line:
+                self._add_prose(self._line_buffer)
+            elif self._line_buffer:
+                self._route_line(self._line_buffer)
+            self._flush_prose()
+
+        self._line_buffer = ""
+        self._pending = ""
+        self.error = error
+        self.finished = True
+        self._sentences.put(self._DONE)
+        self._images.put(self._DONE)
+
+    def sentences(self) -> Iterator[str]:
+        """Narration sentences in script order (blocks until available)"""
+        yield from self._drain(self._sentences)
+
+    def image_descriptions(self) -> Iterator[str]:
+        """IMAGE: descriptions in script order (blocks until available)"""
+        yield from self._drain(self._images)
+
+    def _drain(self, work_queue: "queue.Queue") -> Iterator[str]:
+        while True:
+            item = work_queue.get()
+            if item is self._DONE:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+    @staticmethod
+    def _could_be_special(partial_line: str) -> bool:
+        head = partial_line.lstrip().upper()
+        return "IMAGE:".startswith(head) or head.startswith(("IMAGE:", "#", "["))
+
+    def _route_line(self, line: str):
+        image_match = self.IMAGE_LINE.match(line)
+        if image_match:
+            # An IMAGE: line marks a scene change, so it also ends the sentence
+            self._flush_prose()
+            self.image_count += 1
+            self._images.put(image_match.group(1))
+        elif not line.strip() or MARKER_LINE.match(line):
+            # Paragraph breaks end a sentence even without punctuation; headings
+            # and scene markers do too, and aren't spoken
+            self._flush_prose()
+        else:
+            self._add_prose(line + " ")
+
+    def _add_prose(self, text: str):
+        """Append narration text and queue every sentence it completes"""
+        self._pending += text
+        position = 0
+        for match in self.SENTENCE_END.finditer(self._pending):
+            self._queue_sentence(self._pending[position:match.end()])
+            position = match.end()
+        self._pending = self._pending[position:]
+
+    def _flush_prose(self):
+        self._queue_sentence(self._pending)
+        self._pending = ""
+
+    def _queue_sentence(self, sentence: str):
+        sentence = re.sub(r'\s+', ' ', clean_narration(sentence)).strip()
+        if sentence and re.search(r'\w', sentence):
+            self.sentence_count += 1
+            self._sentences.put(sentence)
+
+
+if __name__ == "__main__":
+    import threading
+
+    print("\n🧪 Testing ScriptStream...\n")
+
+    script = (
+        "## The House on Elm Street\n"
+        "The house had been empty for years. Nobody went near it!\n"
+        "IMAGE: abandoned victorian house at dusk, fog\n"
+        "\n"
+        "[SCENE 2]\n"
+        "Then one night, a light came on in the attic. \"Who's there?\" "
+        "I **whispered**\n"
+        "IMAGE: single lit attic window, dark silhouette\n"
+        "Nobody answered"
+    )
+
+    stream = ScriptStream()
+    collected = {'sentences': [], 'images': []}
+
+    def consume(kind, iterator):
+        for item in iterator:
+            collected[kind].append(item)
+
+    consumers = [
+        threading.Thread(target=consume, args=('sentences', stream.sentences())),
+        threading.Thread(target=consume, args=('images', stream.image_descriptions())),
+    ]
+    for consumer in consumers:
+        consumer.start()
+
+    # Feed in awkward 7-character pieces, like a real token stream
+    for i in range(0, len(script), 7):
+        stream.feed(script[i:i + 7])
+    stream.finish()
+
+    for consumer in consumers:
+        consumer.join()
+
+    for sentence in collected['sentences']:
+        print(f"   🎤 {sentence}")
+    for description in collected['images']:
+        print(f"   🎨 {description}")
+
+    print(f"\n✅ {len(collected['sentences'])} sentences, {len(collected['images'])} images")
+    print("\n✅ ScriptStream working perfectly!\n")
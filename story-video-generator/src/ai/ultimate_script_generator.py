@@ -11,8 +11,10 @@ from typing import Dict, List, Optional
 import re
 import random
 
+from config.settings import GEMINI_SETTINGS
 from config.story_types import STORY_TYPES
 from src.ai.puter_ai import create_puter_ai
+from src.ai.scene_schema import SceneValidationError, parse_structured_scenes, structured_output_instructions
 from src.utils.logger import logger
 from src.research.fact_searcher import fact_searcher
 
@@ -46,7 +48,6 @@ class UltimateScriptGenerator:
     
     def __init__(self):
         self.puter_ai = create_puter_ai()
-        self.character_names = []
         
         print(f"🏆 ULTIMATE Script Generator initialized")
         print(f"   Using: Claude Sonnet 4 (BEST for storytelling!)")
@@ -60,6 +61,7 @@ class UltimateScriptGenerator:
         research_data: Optional[str] = None,
         duration_minutes: int = 10,
         num_scenes: int = 10,
+        structured: Optional[bool] = None,
     ) -> Dict:
         """Generate ULTIMATE quality script using Claude Sonnet 4!
         
@@ -70,6 +72,8 @@ class UltimateScriptGenerator:
             research_data: Optional research facts
             duration_minutes: Target duration (1-60 minutes)
             num_scenes: Number of scenes/images (will generate this many!)
+            structured: Ask for JSON scenes instead of IMAGE: lines
+                (default: GEMINI_SETTINGS['structured_scenes'])
         
         Returns:
             Dict with script, scenes, characters, etc.
@@ -105,6 +109,20 @@ class UltimateScriptGenerator:
             num_scenes=num_scenes
         )
         
+        if structured is None:
+            structured = GEMINI_SETTINGS['structured_scenes']
+        
+        if structured:
+            try:
+                return self._generate_structured(
+                    prompt, story_type, template, research_data, duration_minutes, num_scenes
+                )
+            except SceneValidationError as e:
+                logger.warning(f"   Structured output invalid ({e}) - falling back to text mode")
+            except Exception as e:
+                # Deadline, quota, 5xx or a rejected schema - text mode below retries up to 3 times
+                logger.warning(f"   Structured call failed ({e}) - falling back to text mode")
+        
         # Generate with Claude Sonnet 4 (BEST for storytelling!)
         max_attempts = 3
         for attempt in range(max_attempts):
@@ -131,19 +149,19 @@ class UltimateScriptGenerator:
                     continue
                 
                 # Extract metadata
-                self.character_names = self._extract_characters(script_text)
+                characters = self._extract_characters(script_text)
                 scenes = self._extract_scenes_from_script(script_text, num_scenes)
                 
                 logger.success(f"✅ ULTIMATE script generated!")
                 logger.info(f"   Characters: {len(script_text)}")
                 logger.info(f"   Words: {actual_words} (target: {target_words})")
                 logger.info(f"   Scenes extracted: {len(scenes)}")
-                logger.info(f"   Characters: {', '.join(self.character_names[:3])}")
+                logger.info(f"   Characters: {', '.join(characters[:3])}")
                 logger.info(f"   🏆 Claude Sonnet 4 quality!")
                 
                 return {
                     "script": script_text,
-                    "characters": self.character_names,
+                    "characters": characters,
                     "scenes": scenes,
                     "story_type": story_type,
                     "word_count": actual_words,
@@ -160,6 +178,65 @@ class UltimateScriptGenerator:
         
         raise Exception("Failed to generate script after all attempts")
     
+    def _generate_structured(
+        self,
+        prompt: str,
+        story_type: str,
+        template: Optional[Dict],
+        research_data: Optional[str],
+        duration_minutes: int,
+        num_scenes: int
+    ) -> Dict:
+        """
+        🧩 One call returning JSON scenes, validated locally
+        
+        Replaces IMAGE: extraction and the word-count retry: whatever valid
+        scenes come back are used as-is.
+        
+        Raises:
+            SceneValidationError: Response didn't match the scene schema
+        """
+        logger.info(f"   🧩 Structured scene output with Claude Sonnet 4 ({num_scenes} scenes)...")
+        
+        response_text = self.puter_ai.chat(
+            prompt=prompt + structured_output_instructions(num_scenes),
+            model='claude-sonnet-4',
+            temperature=0.75,
+            max_tokens=16384
+        )
+        
+        parsed = parse_structured_scenes(response_text, num_scenes)
+        script_text = self._clean_script(parsed['script'])
+        scenes = parsed['scenes']
+        
+        target_words = duration_minutes * 150
+        actual_words = len(script_text.split())
+        if actual_words < target_words * 0.7:
+            logger.warning(f"   ⚠️  Short script ({actual_words}/{target_words} words) - kept, no full retry")
+        if len(scenes) < num_scenes:
+            logger.warning(f"   ⚠️  Model returned {len(scenes)}/{num_scenes} scenes - using what it wrote")
+        
+        # Local, not on self: this generator is shared by jobs running at the same time
+        characters = sorted({c for scene in scenes for c in scene['characters']})
+        characters = characters or self._extract_characters(script_text)
+        
+        logger.success(f"✅ ULTIMATE script generated ({len(scenes)} structured scenes)!")
+        logger.info(f"   Words: {actual_words} (target: {target_words})")
+        
+        return {
+            "script": script_text,
+            "title": parsed['title'],
+            "characters": characters,
+            "scenes": scenes,
+            "story_type": story_type,
+            "word_count": actual_words,
+            "character_count": len(script_text),
+            "used_template": template is not None,
+            "used_research": research_data is not None,
+            "model_used": "claude-sonnet-4",
+            "structured": True
+        }
+    
     def _build_ultimate_prompt(
         self,
         topic: str,
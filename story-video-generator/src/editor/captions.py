@@ -2,8 +2,13 @@
 📝 CAPTIONS - Fast text overlays with effects using FFmpeg
 """
 
-from typing import Optional, List, Dict
+import sys
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from typing import Optional, List, Dict
+
+from src.utils.narration_timeline import caption_groups
 
 
 class CaptionGenerator:
@@ -160,7 +165,8 @@ class CaptionGenerator:
         audio_duration: float,
         style: str = 'simple',
         position: str = 'bottom',
-        max_captions: int = None  # Auto-calculated based on video length
+        max_captions: int = None,  # Auto-calculated based on video length
+        timeline: Optional[Dict] = None
     ) -> List[Dict]:
         """
         Generate auto captions from script text with perfect timing
@@ -179,6 +185,8 @@ class CaptionGenerator:
             style: Caption style (default: simple - medium size, readable)
             position: Caption position (default: bottom)
             max_captions: Override auto-calculation (optional)
+            timeline: Narration timing table (load_timeline) - captions start
+                when their sentences are spoken instead of at even intervals
         
         Returns:
             List of caption dictionaries with text, timing, style
@@ -198,6 +206,12 @@ class CaptionGenerator:
             
             print(f"⚡ Auto-adjusted to {max_captions} captions for {audio_duration:.1f}s video")
         
+        if timeline:
+            return [
+                dict(caption, style=style, position=position, animation='fade_in')
+                for caption in caption_groups(timeline, max_captions)
+            ]
+        
         # Split script into sentences (handles ., !, ?)
         sentences = re.split(r'(?<=[.!?])\s+', script.strip())
         sentences = [s.strip() for s in sentences if s.strip()]
@@ -329,13 +343,14 @@ def get_available_styles() -> Dict[str, str]:
     return caption_generator.get_available_styles()
 
 
-def generate_auto_captions(script: str, audio_duration: float) -> List[Dict]:
+def generate_auto_captions(script: str, audio_duration: float, timeline: Optional[Dict] = None) -> List[Dict]:
     """Quick function to generate auto captions from script"""
     return caption_generator.generate_auto_captions_from_script(
         script=script,
         audio_duration=audio_duration,
         style='simple',  # Medium size, readable, professional
-        position='bottom'  # Bottom of video
+        position='bottom',  # Bottom of video
+        timeline=timeline
     )
 
 
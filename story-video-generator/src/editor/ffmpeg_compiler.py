@@ -6,15 +6,28 @@ import subprocess
 from pathlib import Path
 from typing import List, Optional, Dict
 
+from src.editor.image_prep import image_preconditioner
+from src.utils.file_handler import file_handler
+from src.utils.workspace import JobWorkspace
+
 class FFmpegCompiler:
 
+    WIDTH, HEIGHT = 1920, 1080
+    ZOOM_MAX = 1.1  # zoompan's final zoom - pre-conditioned images carry this much headroom
+
+    def prepare_images(self, image_paths: List[Path], zoom_effect: bool = True, pin: bool = False) -> List[Path]:
+        """Fit images to the canvas once (plus zoom headroom) so ffmpeg never scales frames"""
+        headroom = self.ZOOM_MAX if zoom_effect else 1.0
+        return image_preconditioner.prepare_batch(image_paths, self.WIDTH, self.HEIGHT, headroom, pin=pin)
+
     def create_video(
         self,
         image_paths: List[Path],
         audio_path: Path,
         output_path: Path,
         durations: List[float],
-        zoom_effect: bool = True
+        zoom_effect: bool = True,
+        workspace: Optional[JobWorkspace] = None
     ):
         """Create video with FFmpeg - FAST!
 
@@ -24,30 +37,58 @@ class FFmpegCompiler:
             output_path: Path for output video
             durations: Duration for each image
             zoom_effect: Enable zoom effect (default: True for better UX)
+            workspace: Job workspace for the concat list (keeps parallel jobs apart)
         """
 
-        # Create concat file
-        concat_file = Path("concat.txt")
+        # No-op for images already pre-conditioned by an earlier pipeline stage (re-prepares any
+        # evicted since); pinned so other jobs' eviction can't delete them mid-render
+        image_paths = self.prepare_images(image_paths, zoom_effect, pin=True)
+        try:
+            return self._render(image_paths, audio_path, output_path, durations, zoom_effect, workspace)
+        finally:
+            image_preconditioner.release(image_paths)
+
+    def _render(
+        self,
+        image_paths: List[Path],
+        audio_path: Path,
+        output_path: Path,
+        durations: List[float],
+        zoom_effect: bool,
+        workspace: Optional[JobWorkspace]
+    ) -> Path:
+        prepared = all(image_preconditioner.is_prepared(p) for p in image_paths)
+
+        # Create concat file (per job, never in the working directory)
+        if workspace is not None:
+            concat_file = workspace.path("concat.txt")
+        else:
+            concat_file = file_handler.get_temp_path(f"concat_{Path(output_path).stem}.txt")
+
+        # Absolute paths: ffmpeg resolves concat entries relative to the list file
         with open(concat_file, 'w') as f:
             for img, dur in zip(image_paths, durations):
-                f.write(f"file '{img}'\n")
+                f.write(f"file '{Path(img).resolve()}'\n")
                 f.write(f"duration {dur}\n")
             # Repeat last image for proper ending
-            f.write(f"file '{image_paths[-1]}'\n")
+            f.write(f"file '{Path(image_paths[-1]).resolve()}'\n")
+
+        # Pre-conditioned images are already the right size - only scale the rest
+        scale = "" if prepared else f"scale={self.WIDTH}:{self.HEIGHT},"
 
         # Build video filter based on zoom_effect setting
         if zoom_effect:
             # Zoom effect: gentle zoom in for cinematic feel
             video_filter_parts = (
-                "scale=1920:1080,"
-                "zoompan=z='min(zoom+0.0015,1.1)':d=1:"
-                "x=iw/2-(iw/zoom/2):y=ih/2-(ih/zoom/2):s=1920x1080,"
+                scale,
+                f"zoompan=z='min(zoom+0.0015,{self.ZOOM_MAX})':d=1:"
+                f"x=iw/2-(iw/zoom/2):y=ih/2-(ih/zoom/2):s={self.WIDTH}x{self.HEIGHT},"
                 "fps=24"
             )
             video_filter = ''.join(video_filter_parts)
         else:
-            # No zoom: simple scale
-            video_filter = 'scale=1920:1080,fps=24'
+            # No zoom: images are already 1920x1080
+            video_filter = f'{scale}fps=24'
 
         # FFmpeg command
         cmd = [
@@ -0,0 +1,351 @@
+"""
+🖼️ IMAGE PREP - One-time pre-conditioning of images before rendering
+Each image is fitted to the video canvas (blurred fill or letterbox, no
+stretching), pre-upscaled for the zoom effect and saved as a fast-decoding
+JPEG - once, in worker processes, cached by source hash - so the encoder
+never has to scale frames
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import CACHE_DIR, PRECONDITION_SETTINGS
+from src.utils.logger import logger
+
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.bmp'}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def canvas_size(width: int, height: int, headroom: float = 1.0) -> Tuple[int, int]:
+    """Canvas for a render size plus zoom headroom (even numbers for the encoder)"""
+    return (int(round(width * headroom / 2)) * 2, int(round(height * headroom / 2)) * 2)
+
+
+def fit_image(source: str, dest: str, width: int, height: int, fill: str, blur_radius: int, quality: int) -> str:
+    """
+    Fit one image onto a width x height canvas and save it as JPEG
+
+    The image keeps its aspect ratio. The space around it is either a
+    blurred, cover-scaled copy of the image ("blur") or black ("letterbox").
+    Module-level so worker processes can run it.
+    """
+    from PIL import Image, ImageFilter, ImageOps
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    scale = min(width / image.width, height / image.height)
+    fitted_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    fitted = image.resize(fitted_size, Image.LANCZOS)
+
+    if fitted_size == (width, height):
+        canvas = fitted
+    else:
+        if fill == "letterbox":
+            canvas = Image.new("RGB", (width, height), (0, 0, 0))
+        else:
+            # Blur a small cover-scaled copy, then upscale it - same look, far cheaper
+            cover = ImageOps.fit(image, (width // 4, height // 4), Image.BILINEAR)
+            cover = cover.filter(ImageFilter.GaussianBlur(max(1, blur_radius // 4)))
+            canvas = cover.resize((width, height), Image.BILINEAR)
+        canvas.paste(fitted, ((width - fitted_size[0]) // 2, (height - fitted_size[1]) // 2))
+
+    tmp_path = f"{dest}.{os.getpid()}.tmp"
+    canvas.save(tmp_path, "JPEG", quality=quality, subsampling=0)
+    os.replace(tmp_path, dest)
+    return dest
+
+
+class ImagePreconditioner:
+    """
+    Prepares render-ready copies of images, cached by content
+
+    The cache key is the SHA-256 of the source bytes plus the canvas size
+    and fill settings, so the same image is only ever processed once per
+    output size - across scenes, jobs and re-renders. Images handed out
+    with pin=True are never evicted until they are released.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, settings: Optional[Dict] = None):
+        self.settings = dict(PRECONDITION_SETTINGS, **(settings or {}))
+        self.cache_dir = Path(cache_dir or CACHE_DIR / "prepared")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(self.settings['max_size_mb'] * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.stats = {'prepared': 0, 'cached': 0, 'failed': 0, 'passed_through': 0}
+        self._sources: Dict[str, Path] = {}  # prepared file name -> source, to re-prepare after eviction
+        self._pinned: Dict[str, int] = {}    # prepared file name -> renders still using it
+
+    def prepare_batch(self, image_paths: List[Path], width: int, height: int, headroom: float = 1.0,
+                      pin: bool = False) -> List[Path]:
+        """
+        Render-ready versions of image_paths, in the same order
+
+        Misses are processed in parallel worker processes. Anything that
+        can't be prepared (not an image, PIL error) is returned unchanged.
+        Prepared paths whose file has since been evicted are prepared
+        again from their source. With pin=True the returned images are
+        kept out of eviction until release() is called with them.
+        """
+        if not self.settings['enabled'] or not image_paths:
+            return list(image_paths)
+
+        size = canvas_size(width, height, headroom)
+        results: List[Path] = []
+        jobs: Dict[Path, Path] = {}  # output -> source
+        cached = 0
+
+        for image_path in image_paths:
+            image_path = Path(image_path)
+            if self.is_prepared(image_path) and not image_path.exists():
+                with self._lock:
+                    source = self._sources.get(image_path.name)
+                if source is not None and source.exists():
+                    logger.warning(f"   ⚠️ {image_path.name} was evicted - preparing it again")
+                    image_path = source
+            if image_path.suffix.lower() not in IMAGE_EXTENSIONS or self.is_prepared(image_path):
+                self._count('passed_through')
+                results.append(image_path)
+                continue
+
+            try:
+                output = self._output_path(image_path, size)
+            except OSError as e:
+                logger.warning(f"   ⚠️ Couldn't read {image_path.name}: {e}")
+                self._count('failed')
+                results.append(image_path)
+                continue
+
+            results.append(output)
+            with self._lock:
+                self._sources[output.name] = image_path
+            if output.exists():
+                cached += 1
+                self._count('cached')
+                self._touch(output)
+            else:
+                jobs.setdefault(output, image_path)
+
+        if jobs:
+            logger.info(f"   🖼️ Pre-conditioning {len(jobs)} images to {size[0]}x{size[1]} "
+                        f"({self.settings['fill']} fill, {cached} cached)")
+            failed = self._run(jobs, size)
+            results = [jobs[r] if r in failed else r for r in results]
+
+        if pin:
+            with self._lock:
+                for name in self._prepared_names(results):
+                    self._pinned[name] = self._pinned.get(name, 0) + 1
+        if jobs:
+            self._evict(keep=self._prepared_names(results))
+
+        return results
+
+    def release(self, image_paths: List[Path]):
+        """Unpin images returned by prepare_batch(pin=True) once the render is done"""
+        with self._lock:
+            for name in self._prepared_names(image_paths):
+                remaining = self._pinned.get(name, 0) - 1
+                if remaining > 0:
+                    self._pinned[name] = remaining
+                else:
+                    self._pinned.pop(name, None)
+
+    def _prepared_names(self, image_paths: List[Path]) -> set:
+        return {Path(p).name for p in image_paths if self.is_prepared(p)}
+
+    def is_prepared(self, image_path: Path) -> bool:
+        """True if a path is a pre-conditioned image from this cache"""
+        return self.cache_dir.resolve() in Path(image_path).resolve().parents
+
+    def prepare(self, image_path: Path, width: int, height: int, headroom: float = 1.0) -> Path:
+        """Render-ready version of a single image"""
+        return self.prepare_batch([image_path], width, height, headroom)[0]
+
+    def _run(self, jobs: Dict[Path, Path], size: Tuple[int, int]) -> set:
+        """Process misses (in worker processes when there's more than one); returns failed outputs"""
+        args = [
+            (str(source), str(output), size[0], size[1], self.settings['fill'],
+             self.settings['blur_radius'], self.settings['jpeg_quality'])
+            for output, source in jobs.items()
+        ]
+        failed = set()
+
+        if len(args) == 1:
+            outcomes = [_fit_or_error(args[0])]
+        else:
+            try:
+                pool = self._pool()
+                with _workers_skip_main():
+                    futures = [pool.submit(_fit_or_error, a) for a in args]
+                outcomes = [future.result() for future in futures]
+            except Exception as e:  # No process support (e.g. restricted sandbox) - do it here
+                logger.warning(f"   Process pool unavailable ({e}) - pre-conditioning in this process")
+                self._drop_pool()
+                outcomes = [_fit_or_error(a) for a in args]
+
+        for (source, output, *_), error in zip(args, outcomes):
+            if error:
+                logger.warning(f"   ⚠️ Couldn't pre-condition {Path(source).name}: {error}")
+                failed.add(Path(output))
+                self._count('failed')
+            else:
+                self._count('prepared')
+        return failed
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """
+        The process-wide worker pool, started on first use and reused by every job
+
+        Workers are spawned, not forked: a fork of the threaded server would
+        copy locks held by other threads (logger, HTTP pools) and can hang.
+        """
+        global _pool
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=self.settings['max_workers'] or os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return _pool
+
+    @staticmethod
+    def _drop_pool():
+        """Forget a broken pool so the next batch starts a fresh one"""
+        global _pool
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+                _pool = None
+
+    def _output_path(self, image_path: Path, size: Tuple[int, int]) -> Path:
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        digest.update(json.dumps({
+            'size': size,
+            'fill': self.settings['fill'],
+            'blur': self.settings['blur_radius'],
+            'quality': self.settings['jpeg_quality'],
+        }, sort_keys=True).encode('utf-8'))
+        return self.cache_dir / f"{digest.hexdigest()}.jpg"
+
+    @staticmethod
+    def _touch(filepath: Path):
+        try:
+            os.utime(filepath, None)
+        except OSError:
+            pass
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _evict(self, keep: Optional[set] = None):
+        """Drop least recently used prepared images beyond max_size_mb, never pinned or kept ones"""
+        with self._lock:
+            skip = set(self._pinned) | (keep or set())
+            entries = []
+            for filepath in self.cache_dir.glob("*.jpg"):
+                if filepath.name in skip:
+                    continue
+                try:
+                    stat = filepath.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, filepath))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, filepath in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    filepath.unlink()
+                except OSError:
+                    continue
+                total_bytes -= size
+
+
+@contextmanager
+def _workers_skip_main():
+    """
+    Keep workers spawned in this block from re-running the launching script
+
+    Spawned children import the parent's __main__ (as __mp_main__) before
+    running anything - for api_server.py that's Flask, every singleton and
+    the banners, once per worker. The pool starts its workers inside
+    submit(), so hiding __main__ for the submits gives them a bare entry
+    point; they only need this module, which they import by name.
+    """
+    main = sys.modules.get('__main__')
+    if main is None or getattr(main, '_fit_or_error', None) is _fit_or_error:
+        yield  # Run as a script itself - workers need this __main__ to find _fit_or_error
+        return
+    with _pool_lock:
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            yield
+        finally:
+            sys.modules['__main__'] = main
+
+
+def _fit_or_error(args) -> Optional[str]:
+    """fit_image wrapper for worker processes: None on success, else the error text"""
+    try:
+        fit_image(*args)
+        return None
+    except Exception as e:
+        return str(e) or type(e).__name__
+
+
+# Global instance
+image_preconditioner = ImagePreconditioner()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from PIL import Image
+
+    print("\n🧪 Testing ImagePreconditioner...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sources = []
+        for i, size in enumerate([(1024, 1024), (800, 1200), (1920, 1080)]):
+            path = tmp / f"source_{i}.png"
+            Image.new("RGB", size, (40 * i, 80, 160)).save(path)
+            sources.append(path)
+
+        prep = ImagePreconditioner(cache_dir=tmp / "prepared")
+        outputs = prep.prepare_batch(sources, 1920, 1080, headroom=1.1)
+        print(f"✅ Sizes: {[Image.open(p).size for p in outputs]} (2112x1188 = 1080p + 10% zoom headroom)")
+
+        again = prep.prepare_batch(sources, 1920, 1080, headroom=1.1)
+        print(f"✅ Second pass reused cache: {again == outputs}")
+
+        pinned = prep.prepare_batch(sources, 1920, 1080, headroom=1.1, pin=True)
+        prep.max_bytes = 0
+        prep._evict()
+        print(f"✅ Pinned images survive eviction: {all(p.exists() for p in pinned)}")
+        prep.release(pinned)
+        prep._evict()
+        redone = prep.prepare_batch(pinned, 1920, 1080, headroom=1.1)
+        print(f"✅ Evicted images prepared again: {redone == outputs and all(p.exists() for p in redone)}")
+        print(f"✅ Stats: {prep.stats}")
+
+    print("\n✅ ImagePreconditioner working perfectly!\n")
@@ -8,11 +8,16 @@ Generates standard .srt subtitle files with:
 - Fast generation (0.1s per caption!)
 """
 
-import re
+import sys
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import re
 from typing import List, Dict, Optional
 import datetime
 
+from src.utils.narration_timeline import caption_groups
+
 
 class SRTGenerator:
     """Generate SRT subtitle files with emotion detection"""
@@ -64,7 +69,8 @@ class SRTGenerator:
         script: str,
         audio_duration: float,
         output_path: Optional[Path] = None,
-        detect_emotions: bool = True
+        detect_emotions: bool = True,
+        timeline: Optional[Dict] = None
     ) -> Path:
         """
         Generate SRT subtitle file from script
@@ -78,10 +84,18 @@ class SRTGenerator:
             audio_duration: Total audio duration in seconds
             output_path: Where to save .srt file
             detect_emotions: Enable emotion detection for styling
+            timeline: Narration timing table (load_timeline) - one caption
+                per spoken sentence, at the time it is spoken
         
         Returns:
             Path to generated .srt file
         """
+        if timeline:
+            captions = caption_groups(timeline)
+            print(f"📝 Generating SRT subtitles from the narration timing table...")
+            print(f"   Captions: {len(captions)} sentences over {timeline['duration']:.1f}s")
+            return self.generate_timed_captions(captions, output_path, detect_emotions)
+        
         # Split script into sentences
         sentences = re.split(r'(?<=[.!?])\s+', script.strip())
         sentences = [s.strip() for s in sentences if s.strip()]
@@ -230,7 +244,8 @@ def generate_srt_subtitles(
     script: str,
     audio_duration: float,
     output_path: Optional[Path] = None,
-    detect_emotions: bool = True
+    detect_emotions: bool = True,
+    timeline: Optional[Dict] = None
 ) -> Path:
     """
     Quick function to generate SRT subtitles
@@ -243,7 +258,8 @@ def generate_srt_subtitles(
         script,
         audio_duration,
         output_path,
-        detect_emotions
+        detect_emotions,
+        timeline
     )
 
 
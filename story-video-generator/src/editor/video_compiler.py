@@ -14,6 +14,7 @@ from typing import List, Dict, Optional, Union
 import random
 
 from src.editor.effects import effects
+from src.editor.image_prep import image_preconditioner
 from src.editor.transitions import transitions
 from src.voice.audio_processor import audio_processor
 from src.utils.file_handler import file_handler
@@ -58,9 +59,11 @@ class VideoCompiler:
             video_clip = video_clip.resize(self.resolution)
             return video_clip
         else:
-            # Load image and apply effect (existing behavior)
+            # Fit to the canvas once (cached) instead of stretching every frame
+            media_path = image_preconditioner.prepare(media_path, *self.resolution)
             clip = effects.apply_effect(media_path, duration, effect_type)
-            clip = clip.resize(self.resolution)
+            if effect_type != "static" or tuple(clip.size) != tuple(self.resolution):
+                clip = clip.resize(self.resolution)  # Zoom/pan clips change size over time
             return clip
     
     def create_video_from_images(
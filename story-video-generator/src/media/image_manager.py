@@ -2,20 +2,24 @@
 🎨 ULTIMATE IMAGE MANAGER - All 3 Modes Complete
 AI Images + Manual Images + Stock Media + Hybrid
 Production-Ready, Full Features
+In mixed modes every source runs at the same time on the shared fetch engine
 """
 
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-import requests
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 from enum import Enum
 
-from src.ai.ultra_image_prompts import create_prompt_builder
-from src.utils.file_handler import file_handler
+from src.ai.image_generator import UltraImageGenerator
+from src.utils.media_ingest import media_ingestor
+from src.utils.media_library import media_library, from_pexels_video, from_pexels_photo
+from src.utils.pexels_client import pexels_client
 from src.utils.logger import logger
+from src.utils.workspace import JobWorkspace
 
 
 class ImageMode(Enum):
@@ -32,14 +36,17 @@ class ImageMode(Enum):
 class UltimateImageManager:
     """Master image manager - all 3 modes"""
     
-    def __init__(self, image_style: str = "cinematic_film", story_type: str = "scary_horror"):
+    def __init__(self, image_style: str = "cinematic_film", story_type: str = "scary_horror", workspace: Optional[JobWorkspace] = None):
         self.image_style = image_style
         self.story_type = story_type
-        self.prompt_builder = create_prompt_builder(image_style, story_type)
+        self.workspace = workspace  # Per-job temp dir (None = shared temp dir)
+        
+        # AI scenes go through the regular generator (image cache + pooled async fetcher)
+        self.ai_generator = UltraImageGenerator(image_style, story_type, workspace)
+        self.prompt_builder = self.ai_generator.prompt_builder
         
         from src.utils.api_manager import api_manager
         self.pexels_api_key = api_manager.get_key('pexels')
-        self.pexels_base_url = "https://api.pexels.com/v1"
         
         self.current_mode = None
         self.ai_images = []
@@ -99,96 +106,35 @@ class UltimateImageManager:
             return []
     
     def _process_ai_only(self, scenes: List[Dict]) -> List[Dict]:
-        """Generate all images with AI (Pollinations)"""
+        """Generate all images with AI (Pollinations) - all scenes at once"""
         
         logger.info("\n🤖 MODE A: AI IMAGES ONLY")
         logger.info(f"   Generating {len(scenes)} images...")
         
-        images = []
-        
-        for i, scene in enumerate(scenes):
-            logger.info(f"   [{i+1}/{len(scenes)}] Generating scene {scene['scene_number']}...")
-            
-            try:
-                scene_type = self._determine_scene_type(scene.get('image_description', ''))
-                prompt_data = self.prompt_builder.build_scene_prompt(scene.get('image_description', scene.get('content', 'scene')), scene_type)
-                
-                image_data = self._generate_pollinations(prompt_data['prompt'], scene['scene_number'])
-                
-                if image_data:
-                    images.append(image_data)
-                    logger.success(f"      ✅ Scene {scene['scene_number']}")
-                else:
-                    logger.error(f"      ❌ Failed to generate")
-                
-                time.sleep(1)
-            
-            except Exception as e:
-                logger.error(f"      Error: {e}")
+        images = self.ai_generator.generate_batch(scenes) if scenes else []
+        for image in images:
+            image['source'] = 'ai_pollinations'
+            image['type'] = 'image'
         
         self.ai_images = images
         logger.success(f"\n✅ Generated {len(images)}/{len(scenes)} AI images")
         
         return images
     
-    def _generate_pollinations(self, prompt: str, scene_number: int) -> Optional[Dict]:
-        """Generate image with Pollinations (FREE)"""
-        
-        try:
-            prompt_encoded = requests.utils.quote(prompt)
-            url = f"https://image.pollinations.ai/prompt/{prompt_encoded}?width=1024&height=1024&model=flux"
-            
-            response = requests.get(url, timeout=60)
-            
-            if response.status_code == 200:
-                filename = f"scene_{scene_number:03d}_ai.png"
-                filepath = file_handler.save_binary(response.content, filename, file_handler.temp_dir)
-                
-                return {
-                    "filepath": str(filepath),
-                    "scene_number": scene_number,
-                    "prompt": prompt[:200],
-                    "source": "ai_pollinations",
-                    "type": "image"
-                }
-        
-        except Exception as e:
-            logger.error(f"Pollinations error: {e}")
-        
-        return None
-    
     def _process_manual_only(self, manual_paths: List[str], scenes: List[Dict]) -> List[Dict]:
-        """Use manually provided image paths"""
+        """Use manually provided image paths (linked into the workspace, not copied)"""
         
         logger.info("\n👤 MODE B: MANUAL IMAGES ONLY")
         logger.info(f"   Using {len(manual_paths)} manual images")
         
-        images = []
+        records = media_ingestor.ingest(manual_paths, "image", self.workspace, "scene_{:03d}_manual")
         
-        for i, path in enumerate(manual_paths):
-            try:
-                path = Path(path)
-                
-                if not path.exists():
-                    logger.error(f"   ❌ File not found: {path}")
-                    continue
-                
-                filename = f"scene_{i+1:03d}_manual.png"
-                with open(path, 'rb') as f:
-                    filepath = file_handler.save_binary(f.read(), filename, file_handler.temp_dir)
-                
-                images.append({
-                    "filepath": str(filepath),
-                    "scene_number": i + 1,
-                    "source": "manual_upload",
-                    "original_path": str(path),
-                    "type": "image"
-                })
-                
-                logger.success(f"   ✅ Loaded: {path.name}")
-            
-            except Exception as e:
-                logger.error(f"   Error loading {path}: {e}")
+        images = []
+        for i, record in enumerate(records):
+            if record is None:
+                continue
+            images.append(dict(record, scene_number=i + 1, source="manual_upload", type="image"))
+            logger.success(f"   ✅ Loaded: {Path(record['original_path']).name} ({record['width']}x{record['height']}, {record['ingest']})")
         
         self.manual_images = images
         logger.success(f"\n✅ Loaded {len(images)} manual images")
@@ -205,19 +151,13 @@ class UltimateImageManager:
             logger.error("❌ Pexels API key required!")
             return []
         
-        media = []
-        
-        logger.info("   Searching for videos...")
-        if video_keywords:
-            videos = self._search_pexels_videos(video_keywords)
-        else:
-            videos = self._search_pexels_videos([scene.get('image_description', '')[:50] for scene in scenes[:3]])
+        scene_keywords = [scene.get('image_description', '')[:50] for scene in scenes[:3]]
         
-        logger.info("   Searching for images...")
-        if image_keywords:
-            images = self._search_pexels_images(image_keywords)
-        else:
-            images = self._search_pexels_images([scene.get('image_description', '')[:50] for scene in scenes[:3]])
+        logger.info("   Searching for videos + images...")
+        videos, images = self._run_sources([
+            ("Stock video", lambda: self._search_pexels_videos(video_keywords or scene_keywords)),
+            ("Stock image", lambda: self._search_pexels_images(image_keywords or scene_keywords)),
+        ])
         
         media = self._combine_stock_media(videos, images, video_duration)
         
@@ -229,102 +169,66 @@ class UltimateImageManager:
         return media
     
     def _search_pexels_videos(self, keywords: List[str]) -> List[Dict]:
-        """Search for stock videos on Pexels"""
-        
-        videos = []
-        
-        for keyword in keywords[:5]:
-            try:
-                keyword = keyword.strip()
-                if not keyword or len(keyword) < 2:
-                    continue
-                
-                headers = {"Authorization": self.pexels_api_key}
-                url = f"{self.pexels_base_url}/videos/search"
-                params = {"query": keyword, "per_page": 3, "page": 1}
-                
-                response = requests.get(url, headers=headers, params=params, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    for video in data.get('videos', []):
-                        try:
-                            video_file = video['video_files'][0]
-                            video_url = video_file['link']
-                            
-                            video_response = requests.get(video_url, timeout=30)
-                            if video_response.status_code == 200:
-                                filename = f"stock_video_{len(videos)+1}.mp4"
-                                filepath = file_handler.save_binary(video_response.content, filename, file_handler.temp_dir)
-                                
-                                videos.append({
-                                    "filepath": str(filepath),
-                                    "source": "pexels",
-                                    "type": "video",
-                                    "duration": video_file.get('duration', 10),
-                                    "keyword": keyword
-                                })
-                                
-                                logger.info(f"      ✅ Downloaded video: {filename}")
-                        
-                        except Exception as e:
-                            logger.error(f"      Error downloading video: {e}")
-                
-                time.sleep(1)
-            
-            except Exception as e:
-                logger.error(f"   Error searching videos for '{keyword}': {e}")
-        
-        return videos
+        """Stock videos for keywords (local library first, then Pexels)"""
+        return self._search_stock("video", "videos", keywords, 3, from_pexels_video)
     
     def _search_pexels_images(self, keywords: List[str]) -> List[Dict]:
-        """Search for stock images on Pexels"""
-        
-        images = []
-        
-        for keyword in keywords[:5]:
+        """Stock images for keywords (local library first, then Pexels)"""
+        return self._search_stock("image", "photos", keywords, 5, from_pexels_photo)
+    
+    def _search_stock(
+        self,
+        kind: str,
+        endpoint: str,
+        keywords: List[str],
+        per_keyword: int,
+        to_candidate: Callable[[Dict, str], Optional[Dict]]
+    ) -> List[Dict]:
+        """
+        Serve each keyword from the media library when it has enough matches;
+        search Pexels for the rest and download only clips the library lacks
+        
+        Results keep keyword order and each Pexels ID appears once.
+        """
+        keywords = [k.strip() for k in keywords[:5] if k and len(k.strip()) >= 2]
+        local, missing = media_library.lookup(keywords, kind, per_keyword)
+        if local:
+            logger.info(f"   📚 {len(local)}/{len(keywords)} {kind} keywords served from the local library")
+        
+        pairs = []
+        for keyword, item in self._search_pexels(endpoint, missing, per_keyword):
             try:
-                keyword = keyword.strip()
-                if not keyword or len(keyword) < 2:
+                candidate = to_candidate(item, keyword)
+            except (KeyError, TypeError) as e:
+                logger.error(f"      Error reading {kind} result: {e}")
+                continue
+            if candidate:
+                pairs.append((keyword, candidate))
+        
+        found = {keyword: list(entries) for keyword, entries in local.items()}
+        for (keyword, _), entry in zip(pairs, media_library.ingest_all([c for _, c in pairs])):
+            if entry:
+                found.setdefault(keyword, []).append(entry)
+        
+        media, seen = [], set()
+        for keyword in keywords:
+            for entry in found.get(keyword, []):
+                if entry['pexels_id'] in seen:
                     continue
-                
-                headers = {"Authorization": self.pexels_api_key}
-                url = f"{self.pexels_base_url}/search"
-                params = {"query": keyword, "per_page": 5, "page": 1}
-                
-                response = requests.get(url, headers=headers, params=params, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    for photo in data.get('photos', []):
-                        try:
-                            image_url = photo['src']['large']
-                            
-                            img_response = requests.get(image_url, timeout=30)
-                            if img_response.status_code == 200:
-                                filename = f"stock_image_{len(images)+1}.jpg"
-                                filepath = file_handler.save_binary(img_response.content, filename, file_handler.temp_dir)
-                                
-                                images.append({
-                                    "filepath": str(filepath),
-                                    "source": "pexels",
-                                    "type": "image",
-                                    "keyword": keyword
-                                })
-                                
-                                logger.info(f"      ✅ Downloaded image: {filename}")
-                        
-                        except Exception as e:
-                            logger.error(f"      Error downloading image: {e}")
-                
-                time.sleep(1)
-            
-            except Exception as e:
-                logger.error(f"   Error searching images for '{keyword}': {e}")
+                seen.add(entry['pexels_id'])
+                record = {"source": "pexels", "type": kind, "keyword": keyword,
+                          "pexels_id": entry['pexels_id'], "filepath": entry['filepath']}
+                if kind == "video":
+                    record["duration"] = entry.get('duration') or 10
+                media.append(record)
+                logger.info(f"      ✅ {Path(entry['filepath']).name} ({keyword})")
+        return media
+    
+    def _search_pexels(self, endpoint: str, keywords: List[str], per_page: int) -> List[Tuple[str, Dict]]:
+        """Search every keyword at once through the shared Pexels client; results keep keyword order"""
         
-        return images
+        searches = pexels_client.search_many(endpoint, keywords, per_page=per_page)
+        return [(keyword, item) for keyword, items in searches.items() for item in items]
     
     def _combine_stock_media(self, videos: List[Dict], images: List[Dict], total_duration: float) -> List[Dict]:
         """Combine videos and images with smart timing"""
@@ -356,13 +260,40 @@ class UltimateImageManager:
         
         return media
     
+    def _run_sources(self, sources: List[Tuple[str, Callable[[], List[Dict]]]]) -> List[List[Dict]]:
+        """
+        Run independent image sources at the same time
+        
+        Returns each source's results in the order the sources were given,
+        so the merged list keeps the scene order. A source that fails
+        contributes nothing instead of failing the whole job.
+        """
+        started = time.time()
+        
+        def run(source):
+            name, func = source
+            try:
+                return func()
+            except Exception as e:
+                logger.error(f"   ❌ {name} source failed: {e}")
+                return []
+        
+        with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="image-source") as executor:
+            results = list(executor.map(run, sources))
+        
+        logger.info(f"   ⚡ {len(sources)} sources in {time.time() - started:.1f}s (concurrently)")
+        return results
+    
     def _process_ai_manual(self, scenes: List[Dict], manual_paths: List[str]) -> List[Dict]:
         """Mix AI + Manual images"""
         
         logger.info("\n🔄 MODE: AI + MANUAL MIX")
         
-        ai_images = self._process_ai_only(scenes[:len(scenes)//2])
-        manual_images = self._process_manual_only(manual_paths, scenes[len(scenes)//2:])
+        half = len(scenes) // 2
+        ai_images, manual_images = self._run_sources([
+            ("AI", lambda: self._process_ai_only(scenes[:half])),
+            ("Manual", lambda: self._process_manual_only(manual_paths or [], scenes[half:])),
+        ])
         
         combined = ai_images + manual_images
         logger.success(f"\n✅ Combined: {len(ai_images)} AI + {len(manual_images)} Manual")
@@ -374,8 +305,11 @@ class UltimateImageManager:
         
         logger.info("\n🔄 MODE: AI + STOCK MIX")
         
-        ai_images = self._process_ai_only(scenes[:len(scenes)//2])
-        stock = self._process_stock_only(scenes[len(scenes)//2:], video_duration * 0.5, stock_video_keywords, stock_image_keywords)
+        half = len(scenes) // 2
+        ai_images, stock = self._run_sources([
+            ("AI", lambda: self._process_ai_only(scenes[:half])),
+            ("Stock", lambda: self._process_stock_only(scenes[half:], video_duration * 0.5, stock_video_keywords, stock_image_keywords)),
+        ])
         
         combined = ai_images + stock
         logger.success(f"\n✅ Combined: {len(ai_images)} AI + {len(stock)} Stock")
@@ -387,8 +321,11 @@ class UltimateImageManager:
         
         logger.info("\n🔄 MODE: MANUAL + STOCK MIX")
         
-        manual = self._process_manual_only(manual_paths, scenes[:len(manual_paths)])
-        stock = self._process_stock_only(scenes[len(manual_paths):], video_duration * 0.5, stock_video_keywords, stock_image_keywords)
+        manual_paths = manual_paths or []
+        manual, stock = self._run_sources([
+            ("Manual", lambda: self._process_manual_only(manual_paths, scenes[:len(manual_paths)])),
+            ("Stock", lambda: self._process_stock_only(scenes[len(manual_paths):], video_duration * 0.5, stock_video_keywords, stock_image_keywords)),
+        ])
         
         combined = manual + stock
         logger.success(f"\n✅ Combined: {len(manual)} Manual + {len(stock)} Stock")
@@ -402,31 +339,17 @@ class UltimateImageManager:
         
         third = len(scenes) // 3
         
-        ai_images = self._process_ai_only(scenes[:third])
-        manual = self._process_manual_only(manual_paths[:third], scenes[third:2*third])
-        stock = self._process_stock_only(scenes[2*third:], video_duration * 0.4, stock_video_keywords, stock_image_keywords)
+        ai_images, manual, stock = self._run_sources([
+            ("AI", lambda: self._process_ai_only(scenes[:third])),
+            ("Manual", lambda: self._process_manual_only((manual_paths or [])[:third], scenes[third:2*third])),
+            ("Stock", lambda: self._process_stock_only(scenes[2*third:], video_duration * 0.4, stock_video_keywords, stock_image_keywords)),
+        ])
         
         combined = ai_images + manual + stock
         logger.success(f"\n✅ Combined: {len(ai_images)} AI + {len(manual)} Manual + {len(stock)} Stock")
         
         return combined
     
-    def _determine_scene_type(self, description: str) -> str:
-        """Determine scene type from description"""
-        
-        desc_lower = description.lower()
-        
-        if any(w in desc_lower for w in ['character', 'face', 'person', 'man', 'woman']):
-            return 'character_closeup'
-        elif any(w in desc_lower for w in ['location', 'room', 'house', 'street', 'forest']):
-            return 'establishing'
-        elif any(w in desc_lower for w in ['action', 'running', 'moving', 'fight', 'jump']):
-            return 'action'
-        elif any(w in desc_lower for w in ['detail', 'close', 'object', 'door', 'window']):
-            return 'detail'
-        else:
-            return 'atmospheric'
-    
     def get_all_images(self) -> List[Dict]:
         """Get all processed images"""
         return self.ai_images + self.manual_images + self.stock_images + self.stock_videos
@@ -443,9 +366,16 @@ class UltimateImageManager:
         }
 
 
-def create_image_manager(image_style: str, story_type: str) -> UltimateImageManager:
+def create_image_manager(image_style: str, story_type: str, workspace: Optional[JobWorkspace] = None) -> UltimateImageManager:
     """Create image manager instance"""
-    return UltimateImageManager(image_style, story_type)
+    return UltimateImageManager(image_style, story_type, workspace)
+
+
+# Older name, still imported by the launchers
+ImageManager = UltimateImageManager
+
+# Global instance
+image_manager = UltimateImageManager()
 
 
 if __name__ == "__main__":
@@ -458,5 +388,3 @@ if __name__ == "__main__":
         print(f"   - {mode.value}")
     
     print("\n✅ Image Manager ready!\n")
-    # Global instance
-image_manager = ImageManager()
\ No newline at end of file
@@ -6,13 +6,15 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-import requests
-import time
 from typing import List, Dict, Optional
 
 from config.settings import PEXELS_SETTINGS
 from src.utils.api_manager import api_manager
+from src.utils.download_manager import download_manager, DownloadError
 from src.utils.file_handler import file_handler
+from src.utils.pexels_client import pexels_client
+from src.utils.media_library import media_library, from_pexels_video, from_pexels_photo
+from src.utils.workspace import JobWorkspace
 
 
 class StockDownloader:
@@ -23,10 +25,6 @@ class StockDownloader:
         if not self.api_key:
             print("⚠️  Pexels API key not found")
             print("Get FREE key: https://www.pexels.com/api/")
-        
-        self.base_url = "https://api.pexels.com/v1"
-        self.video_url = "https://api.pexels.com/videos"
-        self.headers = {"Authorization": self.api_key} if self.api_key else {}
     
     def search_photos(
         self,
@@ -34,31 +32,11 @@ class StockDownloader:
         per_page: int = 15,
         orientation: str = "landscape"
     ) -> List[Dict]:
-        """Search for photos on Pexels"""
+        """Search for photos on Pexels (cached, rate-limit aware)"""
         
         if not self.api_key:
             return []
-        
-        url = f"{self.base_url}/search"
-        params = {
-            "query": query,
-            "per_page": per_page,
-            "orientation": orientation
-        }
-        
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("photos", [])
-            else:
-                print(f"⚠️  Pexels API error: {response.status_code}")
-                return []
-        
-        except Exception as e:
-            print(f"❌ Error searching photos: {e}")
-            return []
+        return pexels_client.search("photos", query, per_page=per_page, orientation=orientation)
     
     def search_videos(
         self,
@@ -66,166 +44,126 @@ class StockDownloader:
         per_page: int = 15,
         orientation: str = "landscape"
     ) -> List[Dict]:
-        """Search for videos on Pexels"""
+        """Search for videos on Pexels (cached, rate-limit aware)"""
         
         if not self.api_key:
             return []
-        
-        url = f"{self.video_url}/search"
-        params = {
-            "query": query,
-            "per_page": per_page,
-            "orientation": orientation
-        }
-        
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("videos", [])
-            else:
-                print(f"⚠️  Pexels API error: {response.status_code}")
-                return []
-        
-        except Exception as e:
-            print(f"❌ Error searching videos: {e}")
-            return []
+        return pexels_client.search("videos", query, per_page=per_page, orientation=orientation)
     
-    def download_photo(self, photo_data: Dict, filename: str) -> Optional[Path]:
-        """Download a photo"""
+    def download_photo(self, photo_data: Dict, filename: str, workspace: Optional[JobWorkspace] = None) -> Optional[Path]:
+        """Download a photo (streamed to disk)"""
         
         try:
             # Get the large size URL
             photo_url = photo_data["src"]["large2x"]
-            
-            response = requests.get(photo_url)
-            
-            if response.status_code == 200:
-                filepath = file_handler.save_binary(
-                    response.content,
-                    filename,
-                    file_handler.temp_dir
-                )
-                return filepath
-            
-        except Exception as e:
+            return download_manager.download(photo_url, file_handler.get_temp_dir(workspace) / filename)
+        
+        except (KeyError, DownloadError) as e:
             print(f"❌ Error downloading photo: {e}")
         
         return None
     
-    def download_video(self, video_data: Dict, filename: str) -> Optional[Path]:
-        """Download a video"""
+    def download_video(self, video_data: Dict, filename: str, workspace: Optional[JobWorkspace] = None) -> Optional[Path]:
+        """Download a video (streamed to disk, resumed if the connection drops)"""
         
-        try:
-            # Get HD quality video
-            video_files = video_data.get("video_files", [])
-            
-            # Find HD version
-            hd_video = None
-            for vf in video_files:
-                if vf.get("quality") == "hd":
-                    hd_video = vf
-                    break
-            
-            if not hd_video and video_files:
-                hd_video = video_files[0]  # Fallback to first available
-            
-            if hd_video:
-                video_url = hd_video["link"]
-                
-                response = requests.get(video_url, stream=True)
-                
-                if response.status_code == 200:
-                    filepath = file_handler.save_binary(
-                        response.content,
-                        filename,
-                        file_handler.temp_dir
-                    )
-                    return filepath
+        hd_video = self._pick_video_file(video_data)
+        if not hd_video:
+            return None
         
-        except Exception as e:
+        try:
+            return download_manager.download(
+                hd_video["link"],
+                file_handler.get_temp_dir(workspace) / filename,
+                expected_size=hd_video.get("size")
+            )
+        except DownloadError as e:
             print(f"❌ Error downloading video: {e}")
         
         return None
     
+    @staticmethod
+    def _pick_video_file(video_data: Dict) -> Optional[Dict]:
+        """HD rendition of a Pexels video (first file if there's no HD one)"""
+        video_files = video_data.get("video_files", [])
+        
+        # Find HD version
+        for vf in video_files:
+            if vf.get("quality") == "hd":
+                return vf
+        
+        return video_files[0] if video_files else None  # Fallback to first available
+    
     def search_and_download_photos(
         self,
         keywords: List[str],
-        max_per_keyword: int = 10
+        max_per_keyword: int = 10,
+        workspace: Optional[JobWorkspace] = None
     ) -> List[Path]:
-        """Search and download photos for multiple keywords"""
+        """Photos for every keyword: local library first, then Pexels (downloads run in parallel)"""
         
         print(f"📷 Searching for {len(keywords)} photo topics...")
         
-        downloaded = []
-        
-        for i, keyword in enumerate(keywords):
-            print(f"   Searching: {keyword}...")
-            
-            photos = self.search_photos(keyword, per_page=max_per_keyword)
-            
-            if photos:
-                print(f"   Found {len(photos)} photos, downloading...")
-                
-                for j, photo in enumerate(photos[:max_per_keyword]):
-                    filename = f"photo_{i+1:03d}_{j+1:03d}.jpg"
-                    filepath = self.download_photo(photo, filename)
-                    
-                    if filepath:
-                        downloaded.append(filepath)
-                        print(f"      ✅ Downloaded: {filename}")
-                    
-                    time.sleep(0.2)  # Rate limiting
-            else:
-                print(f"   ⚠️  No photos found for: {keyword}")
-            
-            time.sleep(0.5)
+        found = self._search_and_ingest("image", "photos", keywords, max_per_keyword, lambda photo, keyword: from_pexels_photo(photo, keyword, "large2x"))
+        downloaded = [Path(entry["filepath"]) for _, entry in found]
         
-        print(f"\n✅ Downloaded {len(downloaded)} photos")
+        print(f"\n✅ Got {len(downloaded)} photos")
         return downloaded
     
     def search_and_download_videos(
         self,
         keywords: List[str],
-        max_per_keyword: int = 3
+        max_per_keyword: int = 3,
+        workspace: Optional[JobWorkspace] = None
     ) -> List[Dict]:
-        """Search and download videos for multiple keywords"""
+        """Videos for every keyword: local library first, then Pexels (downloads run in parallel)"""
         
         print(f"🎬 Searching for {len(keywords)} video topics...")
         
+        found = self._search_and_ingest("video", "videos", keywords, max_per_keyword, from_pexels_video)
         downloaded = []
+        for keyword, entry in found:
+            downloaded.append({"filepath": Path(entry["filepath"]), "duration": entry.get("duration") or 0, "keyword": keyword})
+            print(f"      ✅ {Path(entry['filepath']).name} ({entry.get('duration') or 0}s)")
         
-        for i, keyword in enumerate(keywords):
-            print(f"   Searching: {keyword}...")
-            
-            videos = self.search_videos(keyword, per_page=max_per_keyword)
-            
-            if videos:
-                print(f"   Found {len(videos)} videos, downloading...")
-                
-                for j, video in enumerate(videos[:max_per_keyword]):
-                    filename = f"video_{i+1:03d}_{j+1:03d}.mp4"
-                    filepath = self.download_video(video, filename)
-                    
-                    if filepath:
-                        duration = video.get("duration", 0)
-                        downloaded.append({
-                            "filepath": filepath,
-                            "duration": duration,
-                            "keyword": keyword
-                        })
-                        print(f"      ✅ Downloaded: {filename} ({duration}s)")
-                    
-                    time.sleep(0.3)
-            else:
-                print(f"   ⚠️  No videos found for: {keyword}")
-            
-            time.sleep(0.5)
-        
-        print(f"\n✅ Downloaded {len(downloaded)} videos")
+        print(f"\n✅ Got {len(downloaded)} videos")
         return downloaded
     
+    def _search_and_ingest(self, kind: str, endpoint: str, keywords: List[str], max_per_keyword: int, to_candidate) -> List[tuple]:
+        """(keyword, library entry) pairs; Pexels is only searched for keywords the library can't serve"""
+        
+        local, missing = media_library.lookup(keywords, kind, max_per_keyword)
+        if local:
+            print(f"   📚 From local library: {', '.join(local)}")
+        
+        pairs = []
+        if missing and self.api_key:
+            print(f"   Searching {len(missing)} keywords at once...")
+            searches = pexels_client.search_many(
+                endpoint, missing, per_page=max_per_keyword, orientation=PEXELS_SETTINGS["orientation"]
+            )
+            for keyword, items in searches.items():
+                candidates = [c for c in (to_candidate(item, keyword) for item in items) if c][:max_per_keyword]
+                if candidates:
+                    print(f"   Found {len(candidates)} {kind}s for: {keyword}")
+                    pairs.extend((keyword, c) for c in candidates)
+                else:
+                    print(f"   ⚠️  No {kind}s found for: {keyword}")
+        
+        if pairs:
+            print(f"   Fetching {len(pairs)} {kind}s ({download_manager.settings['max_parallel']} downloads at a time)...")
+        found = {keyword: list(entries) for keyword, entries in local.items()}
+        for (keyword, _), entry in zip(pairs, media_library.ingest_all([c for _, c in pairs])):
+            if entry:
+                found.setdefault(keyword, []).append(entry)
+        
+        results, seen = [], set()
+        for keyword in keywords:
+            for entry in found.get(keyword, []):
+                if entry["pexels_id"] not in seen:
+                    seen.add(entry["pexels_id"])
+                    results.append((keyword, entry))
+        return results
+    
     def extract_keywords_from_script(self, script: str, max_keywords: int = 10) -> List[str]:
         """Extract visual keywords from script"""
         
@@ -11,7 +11,10 @@ from moviepy.editor import VideoFileClip
 import random
 
 from src.utils.file_handler import file_handler
+from src.utils.media_ingest import media_ingestor
+from src.utils.media_probe import probe_all, probe_video
 from src.utils.timing import timing_calculator
+from src.utils.workspace import JobWorkspace
 
 
 class VideoManager:
@@ -21,39 +24,65 @@ class VideoManager:
         self.videos = []
         self.target_resolution = (1920, 1080)
     
-    def load_videos(self, video_paths: List[Path]) -> List[Dict]:
-        """Load and analyze video clips"""
+    def load_videos(self, video_paths: List[Path], workspace: Optional[JobWorkspace] = None) -> List[Dict]:
+        """
+        Load and analyze video clips
+        
+        Metadata comes from ffprobe headers, all clips at once - no decoder
+        is opened. With a workspace, clips are linked into it (not copied).
+        """
         
         print(f"🎬 Loading {len(video_paths)} video clips...")
         
+        if workspace is not None:
+            records = media_ingestor.ingest(video_paths, "video", workspace, "clip_{:03d}")
+        else:
+            records = [dict(meta, filepath=str(path)) if meta else None
+                       for path, meta in zip(video_paths, probe_all(video_paths, "video"))]
+        
         loaded_videos = []
         
-        for i, video_path in enumerate(video_paths):
-            try:
-                clip = VideoFileClip(str(video_path))
-                
-                video_data = {
-                    "index": i,
-                    "path": video_path,
-                    "duration": clip.duration,
-                    "fps": clip.fps,
-                    "size": clip.size,
-                    "width": clip.w,
-                    "height": clip.h,
-                    "clip": clip
-                }
-                
-                loaded_videos.append(video_data)
-                print(f"   ✅ Loaded: {video_path.name} ({clip.duration:.1f}s)")
-                
-            except Exception as e:
-                print(f"   ⚠️  Error loading {video_path.name}: {e}")
+        for i, (video_path, record) in enumerate(zip(video_paths, records)):
+            video_path = Path(video_path)
+            if record is None:
+                record = self._probe_with_moviepy(video_path)  # No ffprobe on this machine
+                if record is None:
+                    continue
+            
+            video_data = {
+                "index": i,
+                "path": Path(record["filepath"]),
+                "original_path": video_path,
+                "duration": record["duration"],
+                "fps": record["fps"],
+                "size": (record["width"], record["height"]),
+                "width": record["width"],
+                "height": record["height"],
+                "codec": record.get("codec"),
+            }
+            
+            loaded_videos.append(video_data)
+            print(f"   ✅ Loaded: {video_path.name} ({record['duration']:.1f}s)")
         
         print(f"   ✅ Loaded {len(loaded_videos)} videos")
         
         self.videos = loaded_videos
         return loaded_videos
     
+    @staticmethod
+    def _probe_with_moviepy(video_path: Path) -> Optional[Dict]:
+        """Fallback metadata read through a full VideoFileClip"""
+        try:
+            clip = VideoFileClip(str(video_path))
+            try:
+                return {"filepath": str(video_path), "duration": clip.duration, "fps": clip.fps,
+                        "width": clip.w, "height": clip.h}
+            finally:
+                clip.close()
+        except Exception as e:
+            print(f"   ⚠️  Error loading {video_path.name}: {e}")
+            return None
+    
     def calculate_loop_count(
         self,
         video_duration: float,
@@ -223,7 +252,20 @@ class VideoManager:
             return video_path
     
     def get_video_info(self, video_path: Path) -> Dict:
-        """Get detailed video information"""
+        """Get detailed video information (ffprobe header read, moviepy as fallback)"""
+        
+        meta = probe_video(video_path)
+        if meta:
+            return {
+                "path": str(video_path),
+                "duration": meta["duration"],
+                "fps": meta["fps"],
+                "size": (meta["width"], meta["height"]),
+                "width": meta["width"],
+                "height": meta["height"],
+                "has_audio": meta["has_audio"],
+                "file_size": meta["size_bytes"]
+            }
         
         try:
             clip = VideoFileClip(str(video_path))
@@ -285,8 +327,8 @@ class VideoManager:
 video_manager = VideoManager()
 
 
-def load_videos(video_paths: List[Path]) -> List[Dict]:
-    return video_manager.load_videos(video_paths)
+def load_videos(video_paths: List[Path], workspace: Optional[JobWorkspace] = None) -> List[Dict]:
+    return video_manager.load_videos(video_paths, workspace)
 
 
 def calculate_video_timing(videos: List[Dict], duration: float) -> Tuple[List[Dict], float]:
@@ -0,0 +1,5 @@
+"""
+Offline stand-in backends (images, TTS, LLM) for benchmarks and no-network runs
+"""
+
+# Don't import everything automatically - let modules import what they need
@@ -0,0 +1,108 @@
+"""
+🖌️ OFFLINE IMAGES - Procedural stand-in for the Pollinations image API
+Understands the same URLs (prompt, seed, width, height) and answers with a
+deterministic picture: colours from the prompt, composition from the seed,
+so different scenes look different and re-rolled seeds change the image
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import hashlib
+import io
+import random
+from typing import Dict, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from src.offline.simulator import FaultModel
+
+
+def render_image(prompt: str, seed: int, width: int, height: int) -> bytes:
+    """JPEG bytes of a procedural scene for (prompt, seed)"""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    palette = hashlib.sha256(prompt.encode('utf-8')).digest()
+    top, bottom = palette[0:3], palette[3:6]
+    rng = random.Random(f"{prompt}:{seed}")
+
+    # Vertical gradient from the prompt's two colours
+    gradient = Image.new("RGB", (1, 256))
+    for y in range(256):
+        t = y / 255
+        gradient.putpixel((0, y), tuple(int(a + (b - a) * t) for a, b in zip(top, bottom)))
+    image = gradient.resize((width, height), Image.BILINEAR)
+
+    # Seeded shapes: each scene/seed gets its own composition
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(4, 9)):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randint(min(width, height) // 12, min(width, height) // 3)
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        box = (x - radius, y - radius, x + radius, y + radius)
+        if rng.random() < 0.5:
+            draw.ellipse(box, fill=colour)
+        else:
+            draw.rectangle(box, fill=colour)
+    image = image.filter(ImageFilter.GaussianBlur(rng.uniform(0.5, 3)))
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class OfflineResponse:
+    """The parts of requests.Response the image code reads"""
+
+    def __init__(self, status_code: int, content: bytes = b"", headers: Optional[Dict] = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class OfflineImageSession:
+    """
+    Stand-in for the image fetcher's requests.Session
+
+    get() parses a Pollinations URL, waits the simulated latency and
+    returns either a procedural image or an injected 503.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.faults = FaultModel("images", settings)
+        self.headers: Dict[str, str] = {}
+
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs) -> OfflineResponse:
+        parsed = urlparse(url)
+        prompt = unquote(parsed.path.split('/prompt/', 1)[-1])
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        seed = int(query.get('seed', 0))
+
+        if self.faults.wait(f"{prompt}:{seed}"):
+            return OfflineResponse(503, headers={'Retry-After': '1'})
+
+        width, height = int(query.get('width', 1024)), int(query.get('height', 576))
+        return OfflineResponse(200, render_image(prompt, seed, width, height), {'Content-Type': 'image/jpeg'})
+
+    def mount(self, *args, **kwargs):
+        """No connection pool to configure"""
+
+    def close(self):
+        pass
+
+
+if __name__ == "__main__":
+    import time
+
+    print("\n🧪 Testing OfflineImageSession...\n")
+
+    session = OfflineImageSession({'median_ms': 20, 'error_rate': 0.0})
+    url = "https://image.pollinations.ai/prompt/a%20dark%20attic?model=flux&width=1024&height=576&seed=42"
+
+    start = time.time()
+    first = session.get(url)
+    print(f"✅ HTTP {first.status_code}, {len(first.content)} bytes in {time.time() - start:.2f}s")
+    print(f"✅ Deterministic: {session.get(url).content == first.content}")
+    print(f"✅ New seed, new image: {session.get(url.replace('seed=42', 'seed=43')).content != first.content}")
+
+    print("\n✅ OfflineImageSession working perfectly!\n")
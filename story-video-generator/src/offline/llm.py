@@ -0,0 +1,155 @@
+"""
+📝 OFFLINE LLM - Canned stand-in for a Gemini GenerativeModel
+Reads the topic, word target and scene count out of the script prompt and
+answers with a deterministic story of that shape - IMAGE: lines, or JSON
+scenes when the config asks for JSON - with simulated latency and 503s
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.offline.simulator import FaultModel, OfflineServiceError
+
+
+SUBJECTS = ["The keeper", "Mara", "The old radio", "Nobody in town", "The last train", "Her brother", "The stranger"]
+VERBS = ["waited", "listened", "remembered", "whispered", "refused to look", "counted the hours", "kept walking"]
+PLACES = ["by the harbour", "under the broken streetlight", "in the empty station", "behind the locked door",
+          "at the edge of the forest", "on the frozen lake", "inside the lighthouse"]
+ENDINGS = ["and the silence answered.", "while the fog rolled in.", "as if nothing had happened.",
+           "but the clock had stopped.", "until the lights went out.", "and something answered back."]
+SHOTS = ["wide establishing shot", "close-up shot", "low angle shot", "over-the-shoulder shot", "aerial shot"]
+MOODS = ["cinematic lighting", "moody blue tones", "warm golden hour light", "flickering candlelight", "cold moonlight"]
+
+_faults = FaultModel("llm")
+
+
+class OfflineUsage:
+    def __init__(self, prompt_tokens: int, candidates_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = candidates_tokens
+        self.total_token_count = prompt_tokens + candidates_tokens
+
+
+class OfflineResponse:
+    """The parts of a Gemini response the pipeline reads (.text, .usage_metadata)"""
+
+    def __init__(self, text: str, prompt: str = ""):
+        self.text = text
+        self.usage_metadata = OfflineUsage(len(prompt) // 4, len(text) // 4)
+
+
+class OfflineModel:
+    """Drop-in for genai.GenerativeModel(model_name, generation_config)"""
+
+    def __init__(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+
+    def generate_content(self, prompt: str, stream: bool = False, request_options: Optional[Dict[str, Any]] = None):
+        key = hashlib.sha256(f"{self.model_name}:{prompt}".encode('utf-8')).hexdigest()
+        latency, fails = _faults.draw(key)
+        if stream:
+            return self._stream(prompt, latency, fails)
+
+        timeout = (request_options or {}).get('timeout')
+        if timeout is not None and latency > timeout:
+            _sleep(timeout)
+            raise OfflineServiceError("504 Deadline Exceeded (offline LLM stand-in)")
+        _sleep(latency)
+        if fails:
+            raise OfflineServiceError("503 Service Unavailable (offline LLM stand-in)")
+        return OfflineResponse(self._answer(prompt), prompt)
+
+    def _stream(self, prompt: str, latency: float, fails: bool) -> Iterator[OfflineResponse]:
+        """Chunks of ~40 words, the call's latency spread over them (first chunk after ~10%)"""
+        if fails:
+            _sleep(latency * 0.1)
+            raise OfflineServiceError("503 Service Unavailable (offline LLM stand-in)")
+
+        words = re.findall(r'\S+\s*', self._answer(prompt))
+        chunks = [''.join(words[i:i + 40]) for i in range(0, len(words), 40)]
+        _sleep(latency * 0.1)
+        for chunk in chunks:
+            yield OfflineResponse(chunk)
+            _sleep(latency * 0.9 / max(1, len(chunks)))
+
+    def _answer(self, prompt: str) -> str:
+        topic, target_words, num_scenes = parse_prompt(prompt)
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+        scenes = story_scenes(rng, topic, target_words, num_scenes)
+
+        if self.generation_config.get('response_mime_type') == 'application/json':
+            return json.dumps({'title': f"The {topic.title()} Files", 'scenes': scenes}, indent=2)
+        return "\n\n".join(f"{scene['narration']}\n\nIMAGE: {scene['image_description']}" for scene in scenes)
+
+
+def parse_prompt(prompt: str) -> tuple:
+    """(topic, target words, scene count) from a script prompt, with sane defaults"""
+    topic = re.search(r'TOPIC:\s*(.+)', prompt)
+    words = re.search(r'(?:TARGET|LENGTH)[^\n]*?(\d+)\s*words', prompt)
+    scenes = re.search(r'SCENES:\s*(\d+)|EXACTLY (\d+) (?:scenes|IMAGE)', prompt)
+    return (
+        topic.group(1).strip() if topic else "the mystery",
+        int(words.group(1)) if words else 750,
+        int(next(g for g in scenes.groups() if g)) if scenes else 10,
+    )
+
+
+def story_scenes(rng: random.Random, topic: str, target_words: int, num_scenes: int) -> List[Dict]:
+    """num_scenes scenes whose narration adds up to about target_words"""
+    num_scenes = max(1, num_scenes)
+    per_scene = max(20, target_words // num_scenes)
+    scenes = []
+    for _ in range(num_scenes):
+        sentences, count = [], 0
+        while count < per_scene:
+            sentence = f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(PLACES)}, {rng.choice(ENDINGS)}"
+            if rng.random() < 0.3:
+                sentence = f"It was always about {topic}. " + sentence
+            sentences.append(sentence)
+            count += len(sentence.split())
+        character = rng.choice(SUBJECTS[:2] + SUBJECTS[5:])
+        scenes.append({
+            'narration': " ".join(sentences),
+            'image_description': (
+                f"{topic}, {character.lower()} standing {rng.choice(PLACES)}, {rng.choice(MOODS)}, "
+                f"{rng.choice(SHOTS)}, dramatic atmosphere, high detail"
+            ),
+            'characters': [character],
+        })
+    return scenes
+
+
+def _sleep(seconds: float):
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+if __name__ == "__main__":
+    print("\n🧪 Testing OfflineModel...\n")
+
+    from config.settings import OFFLINE_SETTINGS
+    OFFLINE_SETTINGS['llm'].update(median_ms=50, error_rate=0.0)
+    _faults.__init__("llm")
+
+    prompt = "TOPIC: haunted lighthouse\nTARGET: EXACTLY 300 words (150 words per minute)\nSCENES: 4 distinct visual scenes"
+    text = OfflineModel("gemini-2.5-flash").generate_content(prompt).text
+    print(f"✅ Script: {len(text.split())} words, {text.count('IMAGE:')} IMAGE lines")
+    print(f"✅ Deterministic: {OfflineModel('gemini-2.5-flash').generate_content(prompt).text == text}")
+
+    streamed = "".join(chunk.text for chunk in OfflineModel("gemini-2.5-flash").generate_content(prompt, stream=True))
+    print(f"✅ Stream matches: {streamed == text}")
+
+    structured = OfflineModel("gemini-2.5-flash", {'response_mime_type': 'application/json'})
+    data = json.loads(structured.generate_content(prompt).text)
+    print(f"✅ JSON: {data['title']}, {len(data['scenes'])} scenes")
+
+    print("\n✅ OfflineModel working perfectly!\n")
@@ -0,0 +1,83 @@
+"""
+🎲 SIMULATOR - Latency and failure injection for the offline stand-ins
+Every call draws a log-normal latency and a pass/fail from a RNG seeded by
+(seed, backend, call key, attempt), so a benchmark run is repeatable no
+matter how threads interleave - and a retry of a failed call can succeed
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import asyncio
+import math
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config.settings import OFFLINE_SETTINGS
+
+
+class OfflineServiceError(Exception):
+    """Injected failure from a stand-in backend (looks like a 503 to callers)"""
+
+
+def offline_enabled(backend: str) -> bool:
+    """True if the stand-in for "images", "tts" or "llm" is selected"""
+    return backend in OFFLINE_SETTINGS['backends']
+
+
+class FaultModel:
+    """Latency/failure draws for one backend"""
+
+    def __init__(self, backend: str, settings: Optional[Dict] = None):
+        config = dict(OFFLINE_SETTINGS[backend], **(settings or {}))
+        self.backend = backend
+        self.median = config['median_ms'] / 1000 * OFFLINE_SETTINGS['latency_scale']
+        self.sigma = config['sigma']
+        self.error_rate = min(1.0, config['error_rate'] * OFFLINE_SETTINGS['error_scale'])
+
+        self._lock = threading.Lock()
+        self._attempts: Dict[str, int] = {}
+        self.stats = {'calls': 0, 'failures': 0, 'simulated_seconds': 0.0}
+
+    def draw(self, key: str) -> Tuple[float, bool]:
+        """(latency seconds, fails?) for the next call with this key"""
+        with self._lock:
+            attempt = self._attempts[key] = self._attempts.get(key, 0) + 1
+        rng = random.Random(f"{OFFLINE_SETTINGS['seed']}:{self.backend}:{key}:{attempt}")
+        latency = self.median * math.exp(self.sigma * rng.gauss(0, 1)) if self.median > 0 else 0.0
+        fails = rng.random() < self.error_rate
+
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['failures'] += int(fails)
+            self.stats['simulated_seconds'] += latency
+        return latency, fails
+
+    def wait(self, key: str) -> bool:
+        """Sleep for the call's latency; returns True if the call should fail"""
+        latency, fails = self.draw(key)
+        time.sleep(latency)
+        return fails
+
+    async def wait_async(self, key: str) -> bool:
+        latency, fails = self.draw(key)
+        await asyncio.sleep(latency)
+        return fails
+
+
+if __name__ == "__main__":
+    print("\n🧪 Testing FaultModel...\n")
+
+    model = FaultModel("images", {'median_ms': 100, 'sigma': 0.5, 'error_rate': 0.2})
+    draws = [model.draw(f"scene {i}") for i in range(200)]
+    latencies = sorted(latency for latency, _ in draws)
+    print(f"✅ p50 {latencies[100] * 1000:.0f}ms, p95 {latencies[190] * 1000:.0f}ms, "
+          f"failures {sum(f for _, f in draws)}/200")
+
+    again = FaultModel("images", {'median_ms': 100, 'sigma': 0.5, 'error_rate': 0.2})
+    print(f"✅ Repeatable: {[again.draw(f'scene {i}') for i in range(200)] == draws}")
+
+    print("\n✅ FaultModel working perfectly!\n")
@@ -0,0 +1,159 @@
+"""
+🔊 OFFLINE TTS - Tone-based stand-in for edge_tts.Communicate
+Same interface (save / stream) and the same event types: MP3 audio
+chunks plus WordBoundary events with 100-ns offsets. Every word is a short
+tone at a realistic speaking pace, so durations, timings and captions
+behave like a real narration
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import hashlib
+import json
+import re
+import subprocess
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from src.offline.simulator import FaultModel, OfflineServiceError
+
+
+SAMPLE_RATE = 24000         # Edge-TTS outputs 24 kHz mono MP3 at 48 kbit/s
+MP3_BYTES_PER_SECOND = 6000
+TICKS_PER_SECOND = 10_000_000  # WordBoundary offsets are in 100-ns units
+WORDS_PER_MINUTE = 160      # Edge voices at +0%
+
+# One silent MPEG-2 Layer III frame (24 kHz, 48 kbit/s, mono) = 576 samples - used without ffmpeg
+SILENT_FRAME = bytes([0xFF, 0xF3, 0x64, 0xC0]) + bytes(140)
+SILENT_FRAME_SECONDS = 576 / SAMPLE_RATE
+
+_faults = FaultModel("tts")
+
+
+class OfflineCommunicate:
+    """Drop-in for edge_tts.Communicate(text, voice, rate=...)"""
+
+    def __init__(self, text: str, voice: str = "en-US-GuyNeural", rate: str = "+0%", pitch: str = "+0Hz", **kwargs):
+        self.text = text
+        self.voice = voice
+        self.speed = 1 + _percent(rate) / 100
+        self.pitch = pitch
+
+    def timeline(self) -> List[Tuple[str, float, float]]:
+        """(word, offset seconds, duration seconds) for every word"""
+        seconds_per_word = 60 / WORDS_PER_MINUTE / self.speed
+        events, cursor = [], 0.05
+        for match in re.finditer(r"\S+", self.text):
+            token = match.group()
+            word = token.strip('.,;:!?"()[]')
+            duration = seconds_per_word * (0.55 + 0.09 * len(word))
+            if word:
+                events.append((word, cursor, duration))
+            cursor += duration
+            if token[-1] in '.!?':
+                cursor += 0.35 / self.speed
+            elif token[-1] in ',;:':
+                cursor += 0.15 / self.speed
+        return events
+
+    async def stream(self) -> AsyncIterator[Dict]:
+        """Audio chunks and WordBoundary events, interleaved in time order like Edge-TTS"""
+        key = hashlib.sha256(f"{self.voice}:{self.speed}:{self.text}".encode('utf-8')).hexdigest()
+        if await _faults.wait_async(key):
+            raise OfflineServiceError("503 Service Unavailable (offline TTS stand-in)")
+
+        timeline = self.timeline()
+        total = (timeline[-1][1] + timeline[-1][2] + 0.3) if timeline else 0.5
+        audio = _encode_mp3(_synthesize(timeline, total, self.voice), total)
+
+        sent = 0
+        for word, offset, duration in timeline:
+            end = min(len(audio), int((offset + duration) * MP3_BYTES_PER_SECOND))
+            if end > sent:
+                yield {"type": "audio", "data": audio[sent:end]}
+                sent = end
+            yield {
+                "type": "WordBoundary",
+                "offset": int(offset * TICKS_PER_SECOND),
+                "duration": int(duration * TICKS_PER_SECOND),
+                "text": word,
+            }
+        if sent < len(audio):
+            yield {"type": "audio", "data": audio[sent:]}
+
+    async def save(self, audio_fname: str, metadata_fname: Optional[str] = None):
+        """Write the MP3 (and the word boundaries as JSON lines, like Edge-TTS)"""
+        metadata = open(metadata_fname, 'w', encoding='utf-8') if metadata_fname else None
+        try:
+            with open(audio_fname, 'wb') as audio:
+                async for message in self.stream():
+                    if message["type"] == "audio":
+                        audio.write(message["data"])
+                    elif metadata:
+                        metadata.write(json.dumps(message) + "\n")
+        finally:
+            if metadata:
+                metadata.close()
+
+
+def _synthesize(timeline: List[Tuple[str, float, float]], total: float, voice: str) -> bytes:
+    """16-bit PCM: one soft tone per word (pitch from voice + word), silence between"""
+    import numpy as np
+
+    samples = np.zeros(int(total * SAMPLE_RATE), dtype=np.float32)
+    base = 110 + int(hashlib.md5(voice.encode('utf-8')).hexdigest()[:2], 16) % 80  # Per-voice register
+
+    for word, offset, duration in timeline:
+        start = int(offset * SAMPLE_RATE)
+        length = min(int(duration * SAMPLE_RATE), len(samples) - start)
+        if length <= 0:
+            continue
+        frequency = base * (1 + (sum(map(ord, word)) % 7) / 10)
+        t = np.arange(length, dtype=np.float32) / SAMPLE_RATE
+        envelope = np.minimum(1, np.minimum(t, t[::-1]) / 0.02)  # 20 ms fade in/out - no clicks
+        samples[start:start + length] = 0.3 * envelope * np.sin(2 * np.pi * frequency * t)
+
+    return (samples * 32767).astype('<i2').tobytes()
+
+
+def _encode_mp3(pcm: bytes, total: float) -> bytes:
+    """MP3 via ffmpeg (needed for rendering anyway); silent frames of the right length without it"""
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-f', 's16le', '-ar', str(SAMPLE_RATE), '-ac', '1', '-i', 'pipe:0',
+             '-b:a', '48k', '-f', 'mp3', 'pipe:1'],
+            input=pcm, capture_output=True, timeout=120
+        )
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return SILENT_FRAME * (int(total / SILENT_FRAME_SECONDS) + 1)
+
+
+def _percent(value: str) -> float:
+    """'+10%' -> 10.0"""
+    match = re.match(r'^\s*([+-]?\d+(?:\.\d+)?)\s*%\s*$', value or '')
+    return float(match.group(1)) if match else 0.0
+
+
+if __name__ == "__main__":
+    import asyncio
+    import tempfile
+
+    print("\n🧪 Testing OfflineCommunicate...\n")
+
+    text = "The lighthouse keeper counted the ships. None came back, and the fog never lifted."
+    communicate = OfflineCommunicate(text, "en-US-GuyNeural", rate="+10%")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = Path(tmp) / "narration.mp3"
+        asyncio.run(communicate.save(str(audio_path), str(Path(tmp) / "words.jsonl")))
+        words = [json.loads(line) for line in (Path(tmp) / "words.jsonl").read_text().splitlines()]
+
+        print(f"✅ {audio_path.stat().st_size} bytes of MP3, starts with {audio_path.read_bytes()[:2].hex()}")
+        print(f"✅ {len(words)} word boundaries, last: {words[-1]}")
+        print(f"✅ Spoken length: {(words[-1]['offset'] + words[-1]['duration']) / TICKS_PER_SECOND:.2f}s")
+
+    print("\n✅ OfflineCommunicate working perfectly!\n")
@@ -6,5 +6,6 @@ from .logger import logger
 from .file_handler import file_handler
 from .api_manager import api_manager
 from .timing import timing_calculator
+from .job_queue import job_manager
 
-__all__ = ['logger', 'file_handler', 'api_manager', 'timing_calculator']
\ No newline at end of file
+__all__ = ['logger', 'file_handler', 'api_manager', 'timing_calculator', 'job_manager']
\ No newline at end of file
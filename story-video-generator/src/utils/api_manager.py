@@ -20,6 +20,12 @@ class APIManager:
             'pexels': os.getenv('PEXELS_API_KEY')
         }
         
+        # Additional keys pooled with the primary one - from the environment only
+        # (GEMINI_API_KEYS="key1,key2"), never committed
+        self.extra_keys = {
+            'gemini': [k.strip() for k in os.getenv('GEMINI_API_KEYS', '').split(',') if k.strip()]
+        }
+        
         self.image_api_priority = ['together', 'fal', 'pollinations']
         self.current_image_api = 0
         
@@ -37,6 +43,14 @@ class APIManager:
             return None
         return key
     
+    def get_keys(self, service: str) -> List[str]:
+        """All usable keys for a service (primary first, no duplicates)"""
+        keys = []
+        for key in [self.keys.get(service)] + self.extra_keys.get(service, []):
+            if key and not key.startswith('your_') and key not in keys:
+                keys.append(key)
+        return keys
+    
     def has_key(self, service: str) -> bool:
         """Check if API key exists"""
         return self.get_key(service) is not None
@@ -0,0 +1,222 @@
+"""
+🧵 AUDIO CONCAT - Join narration chunks without decoding them into memory
+Same-format PCM WAVs are copied frame-for-frame into a streaming WAV writer,
+same-codec compressed chunks are stream-copied with ffmpeg's concat demuxer,
+and anything else (other formats, crossfades) is decoded once per chunk and
+streamed through. Nothing is re-encoded here: the final mux encodes once.
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import subprocess
+import uuid
+import wave
+from collections import namedtuple
+from typing import List, Sequence
+
+from src.utils.media_probe import probe_audio
+
+
+BLOCK_FRAMES = 1 << 16  # Frames copied per read - memory stays flat however long the narration is
+
+# The fields of wave's getparams() that assembly cares about
+AudioFormat = namedtuple('AudioFormat', 'nchannels sampwidth framerate')
+
+
+def concat_suffix(paths: Sequence[Path], crossfade_ms: int = 0) -> str:
+    """
+    Output extension that avoids a re-encode
+
+    Chunks sharing one compressed format (all .mp3, say) can be stream-copied
+    when there's no crossfade; everything else is assembled as PCM WAV.
+    """
+    suffixes = {Path(p).suffix.lower() for p in paths}
+    if crossfade_ms <= 0 and len(suffixes) == 1 and suffixes != {'.wav'}:
+        return suffixes.pop()
+    return '.wav'
+
+
+def concat_audio(paths: Sequence[Path], output_path: Path, crossfade_ms: int = 0) -> Path:
+    """
+    Join audio files in order into output_path
+
+    A .wav output is written by write_wav(); any other output must share the
+    inputs' format (see concat_suffix) and is stream-copied.
+    """
+    paths = [Path(p) for p in paths]
+    if not paths:
+        raise ValueError("No audio chunks to join")
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.suffix.lower() == '.wav':
+        write_wav(paths, output_path, crossfade_ms)
+    elif concat_suffix(paths, crossfade_ms) == output_path.suffix.lower():
+        _stream_copy(paths, output_path)
+    else:
+        raise ValueError(f"Joining into {output_path.suffix} would re-encode - write .wav and let the final mux encode it")
+    return output_path
+
+
+def write_wav(paths: Sequence[Path], output_path: Path, crossfade_ms: int = 0):
+    """
+    Stream every chunk's frames into one 16-bit PCM WAV
+
+    The format is the first chunk's (its header, or one ffprobe call for a
+    compressed chunk); chunks in another format are converted by ffmpeg on
+    the way through. With a crossfade, only the overlap is held in memory.
+    """
+    params = _target_params(Path(paths[0]))
+    frame_bytes = params.nchannels * params.sampwidth
+    keep = int(params.framerate * crossfade_ms / 1000) * frame_bytes
+    tail = b''
+
+    with wave.open(str(output_path), 'wb') as out:
+        out.setnchannels(params.nchannels)
+        out.setsampwidth(params.sampwidth)
+        out.setframerate(params.framerate)
+
+        for path in paths:
+            head = b''
+            fading = bool(tail)
+            for block in read_frames(Path(path), params):
+                if fading:
+                    # Start of a chunk: mix its first frames into the previous chunk's tail
+                    head += block
+                    if len(head) < len(tail):
+                        continue
+                    out.writeframes(_crossfade(tail, head[:len(tail)], params.nchannels))
+                    block, tail, head, fading = head[len(tail):], b'', b'', False
+                if keep:
+                    # Hold back the end of the chunk for the next crossfade
+                    block = tail + block
+                    tail, block = block[-keep:], block[:-keep]
+                out.writeframes(block)
+            if fading:
+                # Chunk shorter than the crossfade: fade into what there is
+                split = len(tail) - len(head)
+                out.writeframes(tail[:split] + _crossfade(tail[split:], head, params.nchannels))
+                tail = b''
+        out.writeframes(tail)
+
+
+def read_frames(path: Path, params, block: int = BLOCK_FRAMES):
+    """Yield a chunk's frames in blocks, in params' format (decoding/resampling only if needed)"""
+    if is_pcm_wav(path):
+        with wave.open(str(path), 'rb') as wav:
+            if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == \
+                    (params.nchannels, params.sampwidth, params.framerate):
+                while True:
+                    frames = wav.readframes(block)
+                    if not frames:
+                        return
+                    yield frames
+
+    process = subprocess.Popen(
+        ['ffmpeg', '-v', 'error', '-i', str(path), '-vn', '-f', 's16le', '-acodec', 'pcm_s16le',
+         '-ar', str(params.framerate), '-ac', str(params.nchannels), 'pipe:1'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        while True:
+            frames = process.stdout.read(block * params.nchannels * params.sampwidth)
+            if not frames:
+                break
+            yield frames
+    finally:
+        process.stdout.close()
+        error = process.stderr.read()
+        process.stderr.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg couldn't decode {path.name}: {error.decode(errors='ignore')[-200:]}")
+
+
+def is_pcm_wav(path: Path) -> bool:
+    """True for a 16-bit PCM WAV (the format narration is assembled in)"""
+    try:
+        with wave.open(str(path), 'rb') as wav:
+            return wav.getsampwidth() == 2
+    except (wave.Error, EOFError, OSError):
+        return False
+
+
+def _target_params(path: Path):
+    if is_pcm_wav(path):
+        with wave.open(str(path), 'rb') as wav:
+            return wav.getparams()
+    info = probe_audio(path)
+    if info is None:
+        raise RuntimeError(f"Couldn't read audio format of {path.name}")
+    return AudioFormat(info['channels'], 2, info['sample_rate'])
+
+
+def _crossfade(tail: bytes, head: bytes, channels: int) -> bytes:
+    """Linear crossfade of two equal-length 16-bit PCM blocks"""
+    import numpy as np
+
+    fading_out = np.frombuffer(tail, dtype='<i2').astype(np.float32).reshape(-1, channels)
+    fading_in = np.frombuffer(head, dtype='<i2').astype(np.float32).reshape(-1, channels)
+    ramp = np.linspace(0.0, 1.0, len(fading_in), dtype=np.float32)[:, None]
+    mixed = fading_out * (1 - ramp) + fading_in * ramp
+    return np.clip(mixed, -32768, 32767).astype('<i2').tobytes()
+
+
+def _stream_copy(paths: List[Path], output_path: Path):
+    """ffmpeg concat demuxer with -c copy: packets are joined, never decoded"""
+    list_path = output_path.with_name(f".{output_path.stem}.{uuid.uuid4().hex[:8]}.txt")
+    try:
+        list_path.write_text(
+            "".join("file '{}'\n".format(p.resolve().as_posix().replace("'", "'\\''")) for p in paths),
+            encoding='utf-8'
+        )
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-y', '-f', 'concat', '-safe', '0', '-i', str(list_path),
+             '-c', 'copy', str(output_path)],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg concat failed: {result.stderr.decode(errors='ignore')[-300:]}")
+    finally:
+        try:
+            list_path.unlink()
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    import numpy as np
+
+    print("\n🧪 Testing audio concat...\n")
+
+    def tone(path: Path, seconds: float, rate: int = 24000, frequency: float = 220.0):
+        t = np.arange(int(seconds * rate)) / rate
+        with wave.open(str(path), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes((0.3 * np.sin(2 * np.pi * frequency * t) * 32767).astype('<i2').tobytes())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = []
+        for i in range(200):
+            chunks.append(Path(tmp) / f"chunk_{i:03d}.wav")
+            tone(chunks[-1], 3.0, frequency=200 + i)
+
+        start = time.time()
+        joined = concat_audio(chunks, Path(tmp) / "narration.wav")
+        with wave.open(str(joined), 'rb') as wav:
+            seconds = wav.getnframes() / wav.getframerate()
+        print(f"✅ 200 chunks → {seconds:.0f}s WAV in {time.time() - start:.2f}s")
+
+        faded = concat_audio(chunks[:3], Path(tmp) / "faded.wav", crossfade_ms=100)
+        with wave.open(str(faded), 'rb') as wav:
+            print(f"✅ Crossfade 100 ms: {wav.getnframes() / wav.getframerate():.2f}s (3 × 3s - 2 × 0.1s)")
+
+        print(f"✅ Suffix for mp3 chunks: {concat_suffix([Path('a.mp3'), Path('b.mp3')])}, "
+              f"with crossfade: {concat_suffix([Path('a.mp3')], 100)}")
+
+    print("\n✅ Audio concat working perfectly!\n")
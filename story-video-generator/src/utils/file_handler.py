@@ -4,6 +4,8 @@ import shutil
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
+from src.utils.workspace import JobWorkspace
+
 
 class FileHandler:
     """Handles all file operations safely"""
@@ -13,6 +15,7 @@ class FileHandler:
         self.output_dir = self.base_dir / "output"
         self.cache_dir = self.base_dir / "cache"
         self.temp_dir = self.output_dir / "temp"
+        self.jobs_dir = self.temp_dir / "jobs"
         
         # Ensure directories exist
         self.ensure_directories()
@@ -22,6 +25,7 @@ class FileHandler:
         directories = [
             self.output_dir / "videos",
             self.temp_dir,
+            self.jobs_dir,
             self.cache_dir,
             self.base_dir / "assets" / "fonts",
             self.base_dir / "assets" / "music"
@@ -100,9 +104,11 @@ class FileHandler:
             return False
     
     def clear_temp(self):
-        """Clear temporary files"""
+        """Clear temporary files (job workspaces are left to their jobs)"""
         if self.temp_dir.exists():
             for item in self.temp_dir.iterdir():
+                if item == self.jobs_dir:
+                    continue
                 try:
                     if item.is_file():
                         item.unlink()
@@ -111,8 +117,20 @@ class FileHandler:
                 except Exception as e:
                     print(f"Error clearing temp: {e}")
     
-    def get_temp_path(self, filename: str) -> Path:
-        """Get path for temporary file"""
+    def create_workspace(self, job_id: Optional[str] = None) -> JobWorkspace:
+        """Create an isolated temp workspace for one job"""
+        return JobWorkspace(self.jobs_dir, job_id)
+    
+    def get_temp_dir(self, workspace: Optional[JobWorkspace] = None) -> Path:
+        """Get temp directory (the job's workspace if one is given)"""
+        if workspace is not None:
+            return workspace.temp_dir
+        return self.temp_dir
+    
+    def get_temp_path(self, filename: str, workspace: Optional[JobWorkspace] = None) -> Path:
+        """Get path for temporary file (inside the job's workspace if one is given)"""
+        if workspace is not None:
+            return workspace.path(filename)
         return self.temp_dir / filename
     
     def get_output_path(self, filename: str) -> Path:
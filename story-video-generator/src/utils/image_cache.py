@@ -0,0 +1,168 @@
+"""
+🖼️ IMAGE CACHE - Content-addressed store for generated scene images
+Same prompt + model + size + seed + enhance flag => copy the stored file
+instead of waiting on the image API again
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Optional
+
+from config.settings import CACHE_DIR, IMAGE_CACHE_SETTINGS
+from src.utils.logger import logger
+
+
+class ImageCache:
+    """
+    On-disk cache of generated images
+
+    Each image is stored once under the SHA-256 of its request
+    (prompt, model, width, height, seed, enhance). File mtimes double as
+    the last-used time, so eviction is least-recently-used by total bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_size_mb: Optional[float] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.cache_dir = Path(cache_dir or CACHE_DIR / "images")
+        self.max_bytes = int((max_size_mb or IMAGE_CACHE_SETTINGS['max_size_mb']) * 1024 * 1024)
+        self.enabled = IMAGE_CACHE_SETTINGS['enabled'] if enabled is None else enabled
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'bytes_saved': 0}
+
+    @staticmethod
+    def make_key(prompt: str, model: str, width: int, height: int, seed: int, enhance: bool) -> str:
+        """SHA-256 of the canonical image request"""
+        payload = json.dumps(
+            {'prompt': prompt, 'model': model, 'width': width, 'height': height,
+             'seed': seed, 'enhance': bool(enhance)},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def fetch(self, key: str, dest: Path) -> Optional[Path]:
+        """Copy a cached image to dest (None on a miss or when disabled)"""
+        if not self.enabled:
+            return None
+
+        filepath = self._path(key)
+        try:
+            size = filepath.stat().st_size
+            dest = Path(dest)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(filepath, dest)
+            os.utime(filepath, None)  # Touch so LRU eviction keeps recently used images
+        except OSError:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        self.stats['bytes_saved'] += size
+        return dest
+
+    def store(self, key: str, data: bytes):
+        """Save image bytes under a key (atomic write, then evict if over budget)"""
+        if not self.enabled or not data:
+            return
+
+        filepath = self._path(key)
+        tmp_path = filepath.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, filepath)
+        except OSError as e:
+            logger.warning(f"   Image cache write failed: {e}")
+            return
+
+        self.stats['stored'] += 1
+        self._evict()
+
+    def clear(self):
+        """Delete every cached image"""
+        for filepath in self.cache_dir.glob("*.img"):
+            self._remove(filepath)
+
+    def usage(self) -> dict:
+        """Stats plus current size on disk"""
+        files = list(self.cache_dir.glob("*.img"))
+        total = sum(f.stat().st_size for f in files if f.exists())
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(files),
+            'size_mb': round(total / 1024 / 1024, 1),
+            'max_size_mb': round(self.max_bytes / 1024 / 1024, 1),
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+        }
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.img"
+
+    def _remove(self, filepath: Path):
+        try:
+            filepath.unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used images until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for filepath in self.cache_dir.glob("*.img"):
+                try:
+                    stat = filepath.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, filepath))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            if total_bytes <= self.max_bytes:
+                return
+
+            for mtime, size, filepath in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                self._remove(filepath)
+                total_bytes -= size
+                self.stats['evicted'] += 1
+
+
+# Global instance
+image_cache = ImageCache()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    print("\n🧪 Testing ImageCache...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ImageCache(cache_dir=Path(tmp) / "store", max_size_mb=0.002, enabled=True)  # ~2 KB budget
+        key = ImageCache.make_key("dark attic", "flux", 1024, 1024, 42, True)
+
+        print(f"✅ Miss before store: {cache.fetch(key, Path(tmp) / 'a.png')}")
+        cache.store(key, b"x" * 800)
+        print(f"✅ Hit after store: {cache.fetch(key, Path(tmp) / 'a.png').name}")
+        print(f"✅ Other seed is a different key: {key != ImageCache.make_key('dark attic', 'flux', 1024, 1024, 43, True)}")
+
+        for i in range(3):
+            time.sleep(0.01)
+            cache.store(ImageCache.make_key(f"scene {i}", "flux", 1024, 1024, i, True), b"y" * 800)
+        print(f"✅ After LRU eviction: {cache.usage()}")
+
+    print("\n✅ ImageCache working perfectly!\n")
@@ -0,0 +1,208 @@
+"""
+🧵 JOB QUEUE - Bounded job queue served by a fixed worker pool
+Every generation request gets its own job ID and progress state
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import JOB_SETTINGS
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue has no room for another job"""
+
+
+class JobManager:
+    """Runs background jobs on a bounded worker pool with per-job progress"""
+
+    FINISHED_STATUSES = ('complete', 'error')
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        max_finished_jobs: Optional[int] = None
+    ):
+        self.max_workers = max(1, max_workers or JOB_SETTINGS['max_workers'])
+        self.max_queue_size = max(1, max_queue_size or JOB_SETTINGS['max_queue_size'])
+        self.max_finished_jobs = max_finished_jobs or JOB_SETTINGS['max_finished_jobs']
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._finished = deque()
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self.latest_job_id: Optional[str] = None
+
+    def start(self):
+        """Start worker threads (called lazily on first submit)"""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"job-worker-{i + 1}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, func: Callable, *args, job_type: str = 'video', **kwargs) -> str:
+        """
+        Queue a job and return its ID
+
+        The job function is called as func(progress_state, *args, **kwargs),
+        where progress_state is the job's own mutable state dict.
+
+        Raises:
+            JobQueueFull: If the queue is already at max_queue_size
+        """
+        self.start()
+
+        job_id = uuid.uuid4().hex[:12]
+        state = {
+            'job_id': job_id,
+            'type': job_type,
+            'status': 'queued',
+            'progress': 0,
+            'video_path': None,
+            'error': None,
+            'voice_engine': None,
+            'voice_id': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+        }
+
+        with self._lock:
+            self._jobs[job_id] = state
+
+        try:
+            self._queue.put_nowait((job_id, func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            raise JobQueueFull(
+                f"Job queue is full ({self.max_queue_size} waiting) - try again later"
+            )
+
+        self.latest_job_id = job_id
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a job's state"""
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if state is None:
+                return None
+            snapshot = dict(state)
+
+        if snapshot['status'] == 'queued':
+            snapshot['queue_position'] = self._queue_position(job_id)
+        return snapshot
+
+    def get_latest(self) -> Optional[Dict[str, Any]]:
+        """Get the most recently submitted job (for single-job clients)"""
+        if not self.latest_job_id:
+            return None
+        return self.get(self.latest_job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Snapshots of all known jobs, newest first"""
+        with self._lock:
+            job_ids = list(self._jobs.keys())
+        jobs = [self.get(job_id) for job_id in job_ids]
+        jobs = [job for job in jobs if job]
+        return sorted(jobs, key=lambda job: job['created_at'], reverse=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Queue and worker pool statistics"""
+        with self._lock:
+            statuses = [state['status'] for state in self._jobs.values()]
+
+        queued = sum(1 for status in statuses if status == 'queued')
+        finished = sum(1 for status in statuses if status in self.FINISHED_STATUSES)
+        return {
+            'workers': self.max_workers,
+            'max_queue_size': self.max_queue_size,
+            'queued': queued,
+            'running': len(statuses) - queued - finished,
+            'finished': finished,
+        }
+
+    def _queue_position(self, job_id: str) -> int:
+        """1-based position of a waiting job in the queue"""
+        with self._queue.mutex:
+            waiting = [item[0] for item in self._queue.queue]
+        return waiting.index(job_id) + 1 if job_id in waiting else 0
+
+    def _worker_loop(self):
+        """Pull jobs off the queue forever"""
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            state = self._jobs.get(job_id)
+
+            try:
+                if state is not None:
+                    state['status'] = 'starting'
+                    state['started_at'] = time.time()
+                    func(state, *args, **kwargs)
+            except Exception as e:
+                state['status'] = 'error'
+                state['error'] = str(e)
+                print(f"\n❌ Job {job_id} failed: {e}\n")
+                traceback.print_exc()
+            finally:
+                if state is not None:
+                    state['finished_at'] = time.time()
+                    self._mark_finished(job_id)
+                self._queue.task_done()
+
+    def _mark_finished(self, job_id: str):
+        """Remember finished jobs, dropping the oldest beyond the limit"""
+        with self._lock:
+            self._finished.append(job_id)
+            while len(self._finished) > self.max_finished_jobs:
+                old_id = self._finished.popleft()
+                self._jobs.pop(old_id, None)
+
+
+# Global instance
+job_manager = JobManager()
+
+
+if __name__ == "__main__":
+    print("\n🧪 Testing JobManager...\n")
+
+    def fake_job(progress_state, seconds):
+        progress_state['status'] = 'working'
+        time.sleep(seconds)
+        progress_state['progress'] = 100
+        progress_state['status'] = 'complete'
+
+    manager = JobManager(max_workers=2, max_queue_size=2)
+    ids = [manager.submit(fake_job, 0.2) for _ in range(2)]
+    print(f"✅ Submitted: {ids}")
+
+    try:
+        for _ in range(5):
+            manager.submit(fake_job, 0.2)
+    except JobQueueFull as e:
+        print(f"✅ Backpressure: {e}")
+
+    time.sleep(1.5)
+    print(f"✅ Stats: {manager.stats()}")
+    print(f"✅ First job: {manager.get(ids[0])['status']}")
+
+    print("\n✅ JobManager working perfectly!\n")
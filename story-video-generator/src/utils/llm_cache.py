@@ -0,0 +1,274 @@
+"""
+🗄️ LLM CACHE - Content-addressed disk cache for Gemini responses
+Same model + generation config + prompt => reuse the stored answer
+instead of spending quota and waiting on the API again
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config.settings import CACHE_DIR, LLM_CACHE_SETTINGS
+from src.utils.logger import logger
+
+
+class LLMCache:
+    """
+    On-disk cache of LLM text responses
+
+    Each entry is one JSON file named after the SHA-256 of
+    (model, generation_config, prompt). File mtimes double as the
+    last-used time, so eviction is least-recently-used and the cache
+    survives restarts. The TTL counts from each entry's created_at, so
+    hits don't keep an entry alive.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_size_mb: Optional[float] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.cache_dir = Path(cache_dir or CACHE_DIR / "llm")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else LLM_CACHE_SETTINGS['ttl_seconds']
+        self.max_entries = max_entries or LLM_CACHE_SETTINGS['max_entries']
+        self.max_bytes = int((max_size_mb or LLM_CACHE_SETTINGS['max_size_mb']) * 1024 * 1024)
+        self.enabled = LLM_CACHE_SETTINGS['enabled'] if enabled is None else enabled
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'evicted': 0}
+
+    @staticmethod
+    def make_key(model_name: str, generation_config: Optional[Dict[str, Any]], prompt: str) -> str:
+        """SHA-256 of the canonical (model, config, prompt) request"""
+        payload = json.dumps(
+            {'model': model_name, 'config': generation_config or {}, 'prompt': prompt},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached text for a key, or None if missing/expired"""
+        filepath = self._path(key)
+        if not filepath.exists():
+            return None
+
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._remove(filepath)
+            return None
+
+        if self.ttl_seconds and time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+            self._remove(filepath)
+            return None
+
+        # Touch so LRU eviction keeps recently used entries
+        try:
+            os.utime(filepath, None)
+        except OSError:
+            pass
+
+        return entry.get('text')
+
+    def put(self, key: str, text: str, model_name: str = ""):
+        """Store a response (atomic write, then evict if over budget)"""
+        filepath = self._path(key)
+        tmp_path = filepath.with_suffix(f".{threading.get_ident()}.tmp")
+
+        entry = {'model': model_name, 'created_at': time.time(), 'text': text}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, filepath)
+
+        self._evict()
+
+    def generate(
+        self,
+        model,
+        prompt: str,
+        generation_config: Optional[Dict[str, Any]] = None,
+        bypass: bool = False
+    ) -> str:
+        """
+        Return the model's text for a prompt, calling the API only on a miss
+
+        Args:
+            model: genai.GenerativeModel (anything with generate_content)
+            prompt: Full prompt text
+            generation_config: The config the model was built with (part of the key)
+            bypass: Skip the lookup and refresh the entry with a new answer
+
+        Raises:
+            Exception: If the API returns an empty response (never cached)
+        """
+        if not bypass:
+            cached = self.lookup(model, prompt, generation_config)
+            if cached is not None:
+                return cached
+        else:
+            self.stats['bypassed'] += 1
+
+        response = model.generate_content(prompt)
+        if not response or not response.text:
+            raise Exception(f"Empty response from {self._model_name(model)}")
+
+        text = response.text
+        self.store(model, prompt, generation_config, text)
+        return text
+
+    def lookup(self, model, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Cached text for a request, or None on a miss (or when disabled)"""
+        if not self.enabled:
+            self.stats['bypassed'] += 1
+            return None
+
+        model_name = self._model_name(model)
+        cached = self.get(self.make_key(model_name, generation_config, prompt))
+        if cached is None:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        logger.info(f"   ⚡ LLM cache hit ({model_name}, {len(cached)} chars)")
+        return cached
+
+    def store(self, model, prompt: str, generation_config: Optional[Dict[str, Any]], text: str):
+        """Save a complete response for a request (no-op when disabled)"""
+        if not self.enabled or not text:
+            return
+
+        model_name = self._model_name(model)
+        try:
+            self.put(self.make_key(model_name, generation_config, prompt), text, model_name)
+        except OSError as e:
+            logger.warning(f"   LLM cache write failed: {e}")
+
+    def invalidate(self, model, prompt: str, generation_config: Optional[Dict[str, Any]] = None):
+        """Forget the cached answer for a request (e.g. it failed to parse)"""
+        self._remove(self._path(self.make_key(self._model_name(model), generation_config, prompt)))
+
+    def clear(self):
+        """Delete every cached response"""
+        for filepath in self.cache_dir.glob("*.json"):
+            self._remove(filepath)
+
+    @staticmethod
+    def _model_name(model) -> str:
+        return getattr(model, 'model_name', type(model).__name__)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _remove(self, filepath: Path):
+        try:
+            filepath.unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until within limits"""
+        with self._lock:
+            entries = []
+            for filepath in self.cache_dir.glob("*.json"):
+                try:
+                    stat = filepath.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, filepath))
+
+            if self.ttl_seconds:
+                # Same rule as get(); a last use older than the TTL means it was created earlier still
+                now = time.time()
+                expired = [
+                    entry for entry in entries
+                    if now - entry[0] > self.ttl_seconds or now - self._created_at(entry[2]) > self.ttl_seconds
+                ]
+                for _, _, filepath in expired:
+                    self._remove(filepath)
+                    self.stats['evicted'] += 1
+                entries = [entry for entry in entries if entry not in expired]
+
+            entries.sort()
+            total_bytes = sum(size for _, size, _ in entries)
+            count = len(entries)
+
+            for _, size, filepath in entries:
+                if count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                self._remove(filepath)
+                count -= 1
+                total_bytes -= size
+                self.stats['evicted'] += 1
+
+    @staticmethod
+    def _created_at(filepath: Path) -> float:
+        """When an entry was stored (0 if unreadable, so it counts as expired)"""
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f).get('created_at', 0)
+        except (OSError, ValueError):
+            return 0
+
+
+# Global instance
+llm_cache = LLMCache()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("\n🧪 Testing LLMCache...\n")
+
+    class FakeResponse:
+        def __init__(self, text):
+            self.text = text
+
+    class FakeModel:
+        model_name = "fake-model"
+
+        def __init__(self):
+            self.calls = 0
+
+        def generate_content(self, prompt):
+            self.calls += 1
+            return FakeResponse(f"answer to: {prompt}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(cache_dir=Path(tmp), ttl_seconds=60, max_entries=2, enabled=True)
+        model = FakeModel()
+        config = {"temperature": 0.7}
+
+        cache.generate(model, "hello", config)
+        cache.generate(model, "hello", config)
+        print(f"✅ Same request twice -> {model.calls} API call(s)")
+
+        cache.generate(model, "hello", {"temperature": 0.9})
+        print(f"✅ Different config -> {model.calls} API calls")
+
+        cache.generate(model, "hello", config, bypass=True)
+        print(f"✅ Bypass -> {model.calls} API calls")
+
+        cache.generate(model, "another prompt", config)
+        print(f"✅ Entries on disk (max 2): {len(list(Path(tmp).glob('*.json')))}")
+
+        # A hit refreshes the mtime but not the entry's age
+        old = cache._path(cache.make_key("fake-model", config, "another prompt"))
+        old.write_text(json.dumps({'model': 'fake-model', 'created_at': time.time() - 120, 'text': 'x'}))
+        cache.put(cache.make_key("fake-model", config, "third"), "y", "fake-model")
+        print(f"✅ Often-read entry past its TTL evicted: {not old.exists()}")
+        print(f"✅ Stats: {cache.stats}")
+
+    print("\n✅ LLMCache working perfectly!\n")
@@ -0,0 +1,182 @@
+"""
+📎 MEDIA INGEST - Bring user files into a job workspace without copying them
+Each file is hardlinked, reflinked or symlinked into the workspace (a copy
+is the last resort), probed from its header, and sideways phone photos are
+put upright once - so hundreds of photos or multi-GB clips cost almost no
+time or memory
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from config.settings import INGEST_SETTINGS, PRECONDITION_SETTINGS
+from src.utils.file_handler import file_handler
+from src.utils.logger import logger
+from src.utils.media_probe import probe_all
+from src.utils.workspace import JobWorkspace
+
+
+FICLONE = 0x40049409  # Linux ioctl: share the source's blocks (btrfs, XFS, ...)
+
+
+def link_file(source: Path, dest: Path, modes: Sequence[str] = ("hardlink", "reflink", "symlink", "copy")) -> str:
+    """
+    Make dest refer to source's data, cheapest way first; returns the mode used
+
+    Hardlinks and symlinks share the original file, so the workspace copy
+    must never be written in place - which nothing in the pipeline does
+    (outputs always go to new files).
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists() or dest.is_symlink():
+        dest.unlink()  # Never write through an old link into someone's original
+
+    for mode in modes:
+        try:
+            if mode == "hardlink":
+                os.link(source, dest)
+            elif mode == "reflink":
+                _reflink(source, dest)
+            elif mode == "symlink":
+                os.symlink(Path(source).resolve(), dest)
+            else:
+                shutil.copyfile(source, dest)
+            return mode
+        except (OSError, NotImplementedError):
+            if dest.exists() or dest.is_symlink():
+                dest.unlink()
+    raise OSError(f"couldn't link or copy {source}")
+
+
+def _reflink(source: Path, dest: Path):
+    import fcntl
+
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+class MediaIngestor:
+    """Links user images/clips into a workspace and probes them in parallel"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = dict(INGEST_SETTINGS, **(settings or {}))
+        self._lock = threading.Lock()
+        self.stats = {'hardlink': 0, 'reflink': 0, 'symlink': 0, 'copy': 0, 'missing': 0, 'unreadable': 0, 'rotated': 0}
+
+    def ingest(
+        self,
+        paths: Sequence[Path],
+        kind: str = "image",
+        workspace: Optional[JobWorkspace] = None,
+        name_pattern: str = "upload_{:03d}"
+    ) -> List[Optional[Dict]]:
+        """
+        Bring files into the workspace; one record per path (None if missing/unreadable)
+
+        Records carry filepath (inside the workspace), original_path, the
+        link mode used and the probed metadata (see media_probe).
+        """
+        temp_dir = file_handler.get_temp_dir(workspace)
+        modes = self.settings['link_modes']
+
+        linked = []
+        for i, path in enumerate(paths):
+            path = Path(path)
+            if not path.is_file():
+                logger.error(f"   ❌ File not found: {path}")
+                self._count('missing')
+                linked.append(None)
+                continue
+
+            dest = temp_dir / f"{name_pattern.format(i + 1)}{path.suffix.lower()}"
+            try:
+                mode = link_file(path, dest, modes)
+            except OSError as e:
+                logger.error(f"   ❌ Couldn't ingest {path.name}: {e}")
+                linked.append(None)
+                continue
+            self._count(mode)
+            linked.append({'filepath': str(dest), 'original_path': str(path), 'ingest': mode})
+
+        present = [record for record in linked if record]
+        for record, meta in zip(present, probe_all([r['filepath'] for r in present], kind)):
+            if meta is None:
+                record['unreadable'] = True
+            else:
+                record.update(meta)
+
+        results = []
+        for record in linked:
+            if record and record.pop('unreadable', False):
+                logger.error(f"   ❌ Not a readable {kind}: {Path(record['original_path']).name}")
+                self._count('unreadable')
+                record = None
+            elif record and kind == "image" and record.get('orientation', 1) != 1:
+                self._upright(record)
+            results.append(record)
+        return results
+
+    def _upright(self, record: Dict):
+        """
+        Sideways/mirrored EXIF photo: the pre-conditioner rotates it while
+        fitting it to the canvas anyway; without it, write one upright copy
+        here so nothing downstream has to care about EXIF
+        """
+        if PRECONDITION_SETTINGS['enabled']:
+            return
+
+        from PIL import Image, ImageOps
+
+        filepath = Path(record['filepath'])
+        try:
+            with Image.open(record['original_path']) as image:
+                upright = ImageOps.exif_transpose(image)
+                filepath.unlink()  # Drop the link first - never modify the original
+                upright.save(filepath, format=image.format or "PNG")
+        except (OSError, ValueError) as e:
+            logger.warning(f"   ⚠️ Couldn't rotate {filepath.name}: {e}")
+            return
+        record['orientation'] = 1
+        record['ingest'] = 'rotated'
+        self._count('rotated')
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+
+# Global instance
+media_ingestor = MediaIngestor()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from PIL import Image
+
+    print("\n🧪 Testing MediaIngestor...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        uploads = []
+        for i in range(200):
+            path = tmp / f"IMG_{i:04d}.JPG"
+            Image.new("RGB", (400, 300), (i, 80, 160)).save(path)
+            uploads.append(path)
+        uploads.append(tmp / "gone.jpg")
+
+        workspace = JobWorkspace(tmp / "jobs", "ingest-test")
+        start = time.time()
+        records = media_ingestor.ingest(uploads, "image", workspace, "scene_{:03d}_manual")
+        print(f"✅ {sum(1 for r in records if r)}/{len(uploads)} ingested in {time.time() - start:.2f}s")
+        print(f"✅ First: {records[0]}")
+        print(f"✅ Same data, no copy: {os.path.samefile(records[0]['filepath'], uploads[0])}")
+        print(f"✅ Stats: {media_ingestor.stats}")
+
+    print("\n✅ MediaIngestor working perfectly!\n")
@@ -0,0 +1,392 @@
+"""
+📚 MEDIA LIBRARY - Persistent, searchable store of downloaded stock media
+Every Pexels clip/photo is kept once (by Pexels ID) with its keywords,
+duration, resolution, fps and codec in a SQLite full-text index, so repeat
+niches are served from disk instead of being searched and downloaded again
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from config.settings import CACHE_DIR, MEDIA_LIBRARY_SETTINGS
+from src.utils.download_manager import download_manager
+from src.utils.logger import logger
+
+
+COLUMNS = ('kind', 'pexels_id', 'filepath', 'keywords', 'duration', 'width', 'height',
+           'fps', 'codec', 'url', 'size_bytes', 'added_at', 'last_used')
+
+
+class MediaLibrary:
+    """
+    SQLite index + file store for stock media
+
+    Files live in <root>/<kind>s/<pexels_id>.<ext>; the `media` table holds
+    their metadata and `media_fts` indexes the keywords (FTS5, or LIKE when
+    this SQLite build has no FTS5). Entries are evicted least recently
+    used once the library grows beyond max_size_mb.
+    """
+
+    def __init__(self, root: Optional[Path] = None, settings: Optional[Dict] = None):
+        self.settings = dict(MEDIA_LIBRARY_SETTINGS, **(settings or {}))
+        self.enabled = self.settings['enabled']
+        self.root = Path(root or CACHE_DIR / "library")
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(self.settings['max_size_mb'] * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "library.db"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self.fts = self._create_schema()
+        self.stats = {'hits': 0, 'misses': 0, 'added': 0, 'deduped': 0, 'evicted': 0}
+
+    def _create_schema(self) -> bool:
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS media (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    pexels_id TEXT NOT NULL,
+                    filepath TEXT NOT NULL,
+                    keywords TEXT NOT NULL DEFAULT '',
+                    duration REAL, width INTEGER, height INTEGER, fps REAL, codec TEXT,
+                    url TEXT, size_bytes INTEGER,
+                    added_at REAL, last_used REAL,
+                    UNIQUE (kind, pexels_id)
+                )
+            """)
+            try:
+                self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS media_fts USING fts5(keywords, tokenize='porter')")
+                return True
+            except sqlite3.OperationalError:
+                return False  # No FTS5 in this SQLite build - search falls back to LIKE
+
+    def search(self, query: str, kind: str, limit: int = 5, min_duration: float = 0) -> List[Dict]:
+        """
+        Entries of one kind ("video"/"image") whose keywords match every word of query
+
+        Best matches first (FTS rank, then most recently used). Entries whose
+        file has gone missing are dropped from the index on the way.
+        """
+        words = _words(query)
+        if not self.enabled or not words:
+            return []
+
+        with self._lock:
+            if self.fts:
+                match = " ".join(f'"{w}"' for w in words)
+                rows = self._db.execute(
+                    "SELECT media.* FROM media_fts JOIN media ON media.id = media_fts.rowid "
+                    "WHERE media_fts MATCH ? AND media.kind = ? AND COALESCE(media.duration, 0) >= ? "
+                    "ORDER BY media_fts.rank, media.last_used DESC LIMIT ?",
+                    (match, kind, min_duration, limit * 2)
+                ).fetchall()
+            else:
+                where = " AND ".join("keywords LIKE ?" for _ in words)
+                rows = self._db.execute(
+                    f"SELECT * FROM media WHERE kind = ? AND COALESCE(duration, 0) >= ? AND {where} "
+                    "ORDER BY last_used DESC LIMIT ?",
+                    (kind, min_duration, *[f"%{w}%" for w in words], limit * 2)
+                ).fetchall()
+
+        entries = [e for e in (self._checked(row) for row in rows) if e][:limit]
+        self._touch(entries)
+        self.stats['hits' if entries else 'misses'] += 1
+        return entries
+
+    def lookup(self, keywords: List[str], kind: str, per_keyword: int) -> Tuple[Dict[str, List[Dict]], List[str]]:
+        """
+        Split keywords into those the library can serve and those it can't
+
+        Returns ({keyword: entries} for keywords with at least per_keyword
+        matches, [keywords that still need an API search]).
+        """
+        local, missing = {}, []
+        for keyword in keywords:
+            entries = self.search(keyword, kind, limit=per_keyword)
+            if len(entries) >= per_keyword:
+                local[keyword] = entries
+            else:
+                missing.append(keyword)
+        return local, missing
+
+    def get(self, kind: str, pexels_id) -> Optional[Dict]:
+        """The entry for a Pexels ID, if its file is still on disk"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM media WHERE kind = ? AND pexels_id = ?", (kind, str(pexels_id))
+            ).fetchone()
+        return self._checked(row) if row else None
+
+    def path_for(self, kind: str, pexels_id, ext: str) -> Path:
+        """Where the file for a Pexels ID is stored"""
+        return self.root / f"{kind}s" / f"{pexels_id}{ext}"
+
+    def add(self, kind: str, pexels_id, filepath: Path, keywords: str, **meta) -> Dict:
+        """
+        Index a file (already at path_for) under its Pexels ID
+
+        Adding a known ID merges the new keywords into the existing entry,
+        so a clip found for "fog" and later for "forest" matches both.
+        """
+        filepath = Path(filepath)
+        now = time.time()
+        entry = {
+            'kind': kind, 'pexels_id': str(pexels_id), 'filepath': str(filepath),
+            'duration': meta.get('duration'), 'width': meta.get('width'), 'height': meta.get('height'),
+            'fps': meta.get('fps'), 'codec': meta.get('codec'), 'url': meta.get('url'),
+            'size_bytes': filepath.stat().st_size if filepath.exists() else None,
+            'added_at': now, 'last_used': now,
+        }
+
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT id, keywords FROM media WHERE kind = ? AND pexels_id = ?", (kind, entry['pexels_id'])
+            ).fetchone()
+            entry['keywords'] = _merge_keywords(row['keywords'] if row else '', keywords)
+
+            if row:
+                self._db.execute(
+                    f"UPDATE media SET {', '.join(f'{c} = ?' for c in COLUMNS if c != 'added_at')} WHERE id = ?",
+                    (*[entry[c] for c in COLUMNS if c != 'added_at'], row['id'])
+                )
+                rowid = row['id']
+                if self.fts:
+                    self._db.execute("DELETE FROM media_fts WHERE rowid = ?", (rowid,))
+            else:
+                cursor = self._db.execute(
+                    f"INSERT INTO media ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+                    [entry[c] for c in COLUMNS]
+                )
+                rowid = cursor.lastrowid
+            if self.fts:
+                self._db.execute("INSERT INTO media_fts (rowid, keywords) VALUES (?, ?)", (rowid, entry['keywords']))
+
+        self.stats['added'] += 1
+        return entry
+
+    def ingest_all(self, candidates: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Make sure every candidate (see from_pexels_video/photo) is in the library
+
+        Known Pexels IDs are reused as they are (the search keyword is added
+        to their index entry); the rest are downloaded in parallel straight
+        into the library. Returns entries in candidate order, None for
+        failed downloads.
+        """
+        results: List[Optional[Dict]] = [None] * len(candidates)
+        reused: List[Dict] = []
+        slots_by_dest: Dict[Path, List[int]] = {}  # Same file twice in one batch - fetch it once
+        downloads = []
+
+        for i, candidate in enumerate(candidates):
+            known = self.get(candidate['kind'], candidate['pexels_id'])
+            if known:
+                self.stats['deduped'] += 1
+                reused.append(known)
+                if _merge_keywords(known['keywords'], candidate['keywords']) != known['keywords']:
+                    known = self.add(candidate['kind'], candidate['pexels_id'],
+                                     known['filepath'], candidate['keywords'], **_meta(known))
+                results[i] = known
+                continue
+
+            dest = self.path_for(candidate['kind'], candidate['pexels_id'], candidate['ext'])
+            if dest not in slots_by_dest:
+                slots_by_dest[dest] = []
+                downloads.append((candidate['url'], dest, candidate.get('size_bytes')))
+            slots_by_dest[dest].append(i)
+
+        # Reused entries count as used now, so eviction below keeps them
+        self._touch(reused)
+
+        if downloads:
+            for (_, dest, _), path in zip(downloads, download_manager.download_all(downloads)):
+                slots = slots_by_dest[dest]
+                if not path:
+                    logger.warning(f"   📚 Library: {dest.name} couldn't be downloaded - {len(slots)} slot(s) left empty")
+                    continue
+                c = candidates[slots[0]]
+                keywords = c['keywords']
+                for i in slots[1:]:
+                    keywords = _merge_keywords(keywords, candidates[i]['keywords'])
+                entry = self.add(c['kind'], c['pexels_id'], path, keywords, **_meta(c))
+                for i in slots:
+                    results[i] = entry
+            # Never evict what this call is about to hand back
+            self._evict(keep={r['filepath'] for r in results if r})
+
+        return results
+
+    def usage(self) -> Dict:
+        """Stats plus entry counts and size on disk"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, COUNT(*) AS n, COALESCE(SUM(size_bytes), 0) AS bytes FROM media GROUP BY kind"
+            ).fetchall()
+        total = sum(r['bytes'] for r in rows)
+        return {
+            **self.stats,
+            'entries': {r['kind']: r['n'] for r in rows},
+            'size_mb': round(total / 1024 / 1024, 1),
+            'max_size_mb': round(self.max_bytes / 1024 / 1024, 1),
+            'full_text': self.fts,
+        }
+
+    def _checked(self, row: sqlite3.Row) -> Optional[Dict]:
+        """Row as a dict, or None (and the row removed) if its file is gone"""
+        entry = dict(row)
+        if Path(entry['filepath']).exists():
+            return entry
+        self._remove(entry['id'])
+        return None
+
+    def _touch(self, entries: List[Dict]):
+        if entries:
+            with self._lock, self._db:
+                self._db.executemany("UPDATE media SET last_used = ? WHERE id = ?",
+                                     [(time.time(), e['id']) for e in entries if 'id' in e])
+
+    def _remove(self, rowid: int):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM media WHERE id = ?", (rowid,))
+            if self.fts:
+                self._db.execute("DELETE FROM media_fts WHERE rowid = ?", (rowid,))
+
+    def _evict(self, keep: Optional[Set[str]] = None):
+        """Delete least recently used files until the library fits in max_size_mb (except keep)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, filepath, COALESCE(size_bytes, 0) AS bytes FROM media ORDER BY last_used"
+            ).fetchall()
+        total_bytes = sum(r['bytes'] for r in rows)
+
+        keep = keep or set()
+        evicted = 0
+        for row in rows:
+            if total_bytes <= self.max_bytes:
+                break
+            if row['filepath'] in keep:
+                continue
+            try:
+                Path(row['filepath']).unlink()
+            except OSError:
+                pass
+            self._remove(row['id'])
+            total_bytes -= row['bytes']
+            self.stats['evicted'] += 1
+            evicted += 1
+
+        if evicted:
+            logger.info(f"   📚 Library: evicted {evicted} least recently used files "
+                        f"({total_bytes / 1024 / 1024:.0f}/{self.max_bytes / 1024 / 1024:.0f} MB)")
+
+
+def from_pexels_video(video: Dict, keyword: str) -> Optional[Dict]:
+    """Library candidate for a Pexels video search result (HD file preferred)"""
+    files = video.get('video_files') or []
+    if not files:
+        return None
+    video_file = next((f for f in files if f.get('quality') == 'hd'), files[0])
+    return {
+        'kind': 'video',
+        'pexels_id': video['id'],
+        'url': video_file['link'],
+        'ext': '.mp4',
+        'keywords': _merge_keywords(keyword, _slug_words(video.get('url', ''))),
+        'duration': video.get('duration'),
+        'width': video_file.get('width') or video.get('width'),
+        'height': video_file.get('height') or video.get('height'),
+        'fps': video_file.get('fps'),
+        'codec': video_file.get('file_type'),  # Pexels reports the container type (video/mp4)
+        'size_bytes': video_file.get('size'),
+    }
+
+
+def from_pexels_photo(photo: Dict, keyword: str, src_size: str = 'large') -> Optional[Dict]:
+    """Library candidate for a Pexels photo search result"""
+    url = (photo.get('src') or {}).get(src_size)
+    if not url:
+        return None
+    return {
+        'kind': 'image',
+        'pexels_id': photo['id'],
+        'url': url,
+        'ext': '.jpg',
+        'keywords': _merge_keywords(keyword, photo.get('alt') or ''),
+        'width': photo.get('width'),
+        'height': photo.get('height'),
+        'codec': 'image/jpeg',
+    }
+
+
+def _meta(entry: Dict) -> Dict:
+    return {k: entry.get(k) for k in ('duration', 'width', 'height', 'fps', 'codec', 'url')}
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if len(w) >= 2]
+
+
+def _slug_words(url: str) -> str:
+    """'https://www.pexels.com/video/foggy-forest-at-dawn-856/' -> 'foggy forest at dawn'"""
+    slug = url.rstrip('/').rsplit('/', 1)[-1]
+    return " ".join(w for w in slug.split('-') if not w.isdigit())
+
+
+def _merge_keywords(existing: str, new: str) -> str:
+    """Keyword phrases joined by ' | ', without repeats"""
+    phrases = [p.strip() for p in f"{existing}|{new}".split('|')]
+    return " | ".join(dict.fromkeys(p for p in phrases if p))
+
+
+# Global instance
+media_library = MediaLibrary()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("\n🧪 Testing MediaLibrary...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = MediaLibrary(root=Path(tmp), settings={'enabled': True})
+
+        def fake_download_all(items):
+            for _, dest, _ in items:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                dest.write_bytes(b"clip" * 100)
+            return [dest for _, dest, _ in items]
+
+        download_manager.download_all = fake_download_all
+
+        videos = [
+            {'id': 101, 'duration': 12, 'url': 'https://www.pexels.com/video/foggy-forest-at-night-101/',
+             'video_files': [{'quality': 'sd', 'link': 'https://v/101-sd'},
+                             {'quality': 'hd', 'link': 'https://v/101-hd', 'width': 1920, 'height': 1080, 'fps': 25}]},
+            {'id': 102, 'duration': 8, 'url': 'https://www.pexels.com/video/abandoned-house-102/',
+             'video_files': [{'quality': 'hd', 'link': 'https://v/102-hd'}]},
+        ]
+        entries = library.ingest_all([from_pexels_video(v, "dark forest") for v in videos])
+        print(f"✅ Ingested: {[(e['pexels_id'], e['keywords']) for e in entries]}")
+
+        again = library.ingest_all([from_pexels_video(videos[0], "creepy fog")])
+        print(f"✅ Deduped by Pexels ID: {again[0]['filepath'] == entries[0]['filepath']}, keywords: {again[0]['keywords']}")
+
+        start = time.time()
+        print(f"✅ Search 'foggy night': {[e['pexels_id'] for e in library.search('foggy night', 'video')]}")
+        print(f"✅ Search 'creepy': {[e['pexels_id'] for e in library.search('creepy', 'video')]}")
+        print(f"✅ Lookup: {library.lookup(['dark forest', 'ocean waves'], 'video', per_keyword=2)[1]} still need the API "
+              f"({(time.time() - start) * 1000:.1f}ms)")
+        print(f"✅ Usage: {library.usage()}")
+
+    print("\n✅ MediaLibrary working perfectly!\n")
@@ -0,0 +1,372 @@
+"""
+🔬 MEDIA PROBE - Header-only metadata for images, audio and video clips
+Images are opened lazily with Pillow (no pixel decode); WAV and MP3 audio
+is measured from its headers (RIFF header, MP3 frame/Xing header); clips
+and other audio are read with one `ffprobe -print_format json` call.
+Results are memoized on path + mtime, and many files are probed in
+parallel, so checking hundreds of uploads takes about as long as one.
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import functools
+import json
+import os
+import struct
+import subprocess
+import threading
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from config.settings import INGEST_SETTINGS
+
+
+# EXIF orientations that turn the picture sideways (width/height swap)
+SIDEWAYS_ORIENTATIONS = {5, 6, 7, 8}
+
+# MPEG audio Layer III tables (kbit/s by bitrate index; Hz by sample-rate index)
+MP3_BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+MP3_SCAN_BYTES = 64 * 1024  # How far past the ID3 tag to look for the first frame
+
+MEMO_SIZE = 4096  # Probed files remembered per process
+
+
+def _memoized(probe):
+    """
+    Remember a probe's result per (path, mtime, size)
+
+    A file that's rewritten gets a new mtime/size and is probed again;
+    failed probes (None) aren't remembered.
+    """
+    memo: "OrderedDict[tuple, Dict]" = OrderedDict()
+    lock = threading.Lock()
+
+    @functools.wraps(probe)
+    def wrapper(path: Path) -> Optional[Dict]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with lock:
+            if key in memo:
+                memo.move_to_end(key)
+                return dict(memo[key])
+
+        result = probe(path)
+        if result is not None:
+            with lock:
+                memo[key] = dict(result)
+                while len(memo) > MEMO_SIZE:
+                    memo.popitem(last=False)
+        return result
+
+    wrapper.cache_clear = memo.clear
+    return wrapper
+
+
+def probe_image(path: Path) -> Optional[Dict]:
+    """
+    Size, format and EXIF orientation of an image (reads the header only)
+
+    width/height are as displayed, i.e. after applying the orientation.
+    Returns None if the file isn't a readable image.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            orientation = image.getexif().get(0x0112, 1)
+            image_format = image.format
+    except (OSError, ValueError):
+        return None
+
+    if orientation in SIDEWAYS_ORIENTATIONS:
+        width, height = height, width
+    return {
+        'width': width,
+        'height': height,
+        'format': image_format,
+        'orientation': orientation,
+        'size_bytes': os.path.getsize(path),
+    }
+
+
+@_memoized
+def probe_video(path: Path) -> Optional[Dict]:
+    """
+    Duration, size, fps and codec of a clip from one ffprobe call
+
+    Returns None if ffprobe is missing or can't read the file.
+    """
+    try:
+        result = subprocess.run(
+            [INGEST_SETTINGS['ffprobe'], '-v', 'error', '-print_format', 'json',
+             '-show_format', '-show_streams', str(path)],
+            capture_output=True, text=True, timeout=INGEST_SETTINGS['probe_timeout']
+        )
+        data = json.loads(result.stdout or '{}')
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+    streams = data.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    if result.returncode != 0 or video is None:
+        return None
+
+    width, height = video.get('width'), video.get('height')
+    rotation = _rotation(video)
+    if rotation in (90, 270) and width and height:
+        width, height = height, width
+
+    duration = data.get('format', {}).get('duration') or video.get('duration')
+    return {
+        'duration': float(duration) if duration else 0.0,
+        'width': width,
+        'height': height,
+        'fps': _frame_rate(video.get('avg_frame_rate')) or _frame_rate(video.get('r_frame_rate')),
+        'codec': video.get('codec_name'),
+        'has_audio': any(s.get('codec_type') == 'audio' for s in streams),
+        'size_bytes': os.path.getsize(path),
+    }
+
+
+@_memoized
+def probe_audio(path: Path) -> Optional[Dict]:
+    """
+    Duration, sample rate, channels and codec of an audio file
+
+    WAV and MP3 are read from their headers (no decode, no subprocess);
+    anything else takes one ffprobe call. Returns None if the file can't
+    be read as audio.
+    """
+    suffix = Path(path).suffix.lower()
+    info = None
+    if suffix == '.wav':
+        info = _probe_wav(path)
+    elif suffix == '.mp3':
+        info = _probe_mp3(path)
+    if info is None:
+        info = _ffprobe_audio(path)
+    if info is not None:
+        info['size_bytes'] = os.path.getsize(path)
+    return info
+
+
+def audio_duration(path: Path) -> float:
+    """
+    Seconds of audio in a file (header read, memoized)
+
+    Raises ValueError for a missing or unreadable file - a wrong guess
+    would silently desync the video from its narration.
+    """
+    info = probe_audio(path)
+    if info is None:
+        raise ValueError(f"Can't read audio duration of {path}")
+    return info['duration']
+
+
+def probe_all(paths: Sequence[Path], kind: str = "image") -> List[Optional[Dict]]:
+    """Probe many files at once ("image", "video" or "audio"); results in the same order"""
+    if not paths:
+        return []
+    probe = {'video': probe_video, 'audio': probe_audio}.get(kind, probe_image)
+    workers = min(len(paths), INGEST_SETTINGS['max_workers'])
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe") as executor:
+        return list(executor.map(probe, paths))
+
+
+def _probe_wav(path: Path) -> Optional[Dict]:
+    """PCM WAV: frame count and rate straight from the RIFF header"""
+    try:
+        with wave.open(str(path), 'rb') as wav:
+            rate = wav.getframerate()
+            return {
+                'duration': wav.getnframes() / float(rate),
+                'sample_rate': rate,
+                'channels': wav.getnchannels(),
+                'codec': f"pcm_s{wav.getsampwidth() * 8}le",
+            }
+    except (wave.Error, EOFError, OSError, ZeroDivisionError):
+        return None  # Float/extensible WAVs: leave them to ffprobe
+
+
+def _probe_mp3(path: Path) -> Optional[Dict]:
+    """
+    MP3 Layer III: frame count from the Xing/Info/VBRI header, or the
+    bitrate of the first frame for constant-bitrate files (Edge-TTS)
+    """
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(10)
+            start = 0
+            if head[:3] == b'ID3' and len(head) == 10:
+                # Skip the ID3v2 tag: syncsafe size, plus a footer if flagged
+                start = 10 + ((head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14 | (head[8] & 0x7F) << 7 | (head[9] & 0x7F))
+                if head[5] & 0x10:
+                    start += 10
+            f.seek(start)
+            data = f.read(MP3_SCAN_BYTES)
+            f.seek(max(0, size - 128))
+            has_id3v1 = f.read(3) == b'TAG'
+    except OSError:
+        return None
+
+    for i in range(len(data) - 4):
+        frame = _mp3_frame(data, i)
+        if frame is None:
+            continue
+        # A real frame is followed by another one (guards against false syncs)
+        if i + frame['length'] + 4 <= len(data) and _mp3_frame(data, i + frame['length']) is None:
+            continue
+
+        frames = _mp3_frame_count(data, i, frame)
+        if frames:
+            duration = frames * frame['samples'] / frame['sample_rate']
+        else:
+            audio_bytes = size - start - i - (128 if has_id3v1 else 0)
+            duration = audio_bytes * 8 / (frame['bitrate'] * 1000)
+        return {
+            'duration': duration,
+            'sample_rate': frame['sample_rate'],
+            'channels': 1 if frame['mono'] else 2,
+            'codec': 'mp3',
+        }
+    return None
+
+
+def _mp3_frame(data: bytes, i: int) -> Optional[Dict]:
+    """Parse the Layer III frame header at data[i], or None if there isn't one"""
+    b1, b2, b3 = data[i + 1], data[i + 2], data[i + 3]
+    if data[i] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # Reserved, not Layer III, free-format or bad values
+
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES['mpeg1' if mpeg1 else 'mpeg2'][bitrate_index]
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    return {
+        'mpeg1': mpeg1,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'samples': 1152 if mpeg1 else 576,
+        'mono': (b3 >> 6) == 3,
+        'length': (144 if mpeg1 else 72) * bitrate * 1000 // sample_rate + ((b2 >> 1) & 1),
+    }
+
+
+def _mp3_frame_count(data: bytes, i: int, frame: Dict) -> Optional[int]:
+    """Total frames from a Xing/Info (after the side info) or VBRI (at +36) header"""
+    side_info = (17 if frame['mono'] else 32) if frame['mpeg1'] else (9 if frame['mono'] else 17)
+    xing = i + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info') and len(data) >= xing + 12:
+        flags, = struct.unpack('>I', data[xing + 4:xing + 8])
+        if flags & 1:
+            return struct.unpack('>I', data[xing + 8:xing + 12])[0]
+    vbri = i + 36
+    if data[vbri:vbri + 4] == b'VBRI' and len(data) >= vbri + 18:
+        return struct.unpack('>I', data[vbri + 14:vbri + 18])[0]
+    return None
+
+
+def _ffprobe_audio(path: Path) -> Optional[Dict]:
+    try:
+        result = subprocess.run(
+            [INGEST_SETTINGS['ffprobe'], '-v', 'error', '-print_format', 'json',
+             '-show_format', '-show_streams', '-select_streams', 'a:0', str(path)],
+            capture_output=True, text=True, timeout=INGEST_SETTINGS['probe_timeout']
+        )
+        data = json.loads(result.stdout or '{}')
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+    streams = data.get('streams', [])
+    if result.returncode != 0 or not streams:
+        return None
+
+    audio = streams[0]
+    duration = data.get('format', {}).get('duration') or audio.get('duration')
+    return {
+        'duration': float(duration) if duration else 0.0,
+        'sample_rate': int(audio.get('sample_rate') or 0),
+        'channels': int(audio.get('channels') or 1),
+        'codec': audio.get('codec_name'),
+    }
+
+
+def _frame_rate(value: Optional[str]) -> Optional[float]:
+    """'30000/1001' -> 29.97"""
+    try:
+        numerator, _, denominator = (value or '').partition('/')
+        rate = float(numerator) / float(denominator or 1)
+        return round(rate, 3) if rate > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _rotation(stream: Dict) -> int:
+    """Display rotation of a video stream (phone clips), in degrees 0-359"""
+    rotation = stream.get('tags', {}).get('rotate')
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            rotation = side_data['rotation']
+    try:
+        return int(float(rotation or 0)) % 360
+    except ValueError:
+        return 0
+
+
+if __name__ == "__main__":
+    import tempfile
+    from PIL import Image
+
+    print("\n🧪 Testing media probes...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        upright = Path(tmp) / "upright.jpg"
+        Image.new("RGB", (4000, 3000)).save(upright)
+
+        sideways = Path(tmp) / "phone.jpg"
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotate 90 CW on display
+        Image.new("RGB", (4000, 3000)).save(sideways, exif=exif)
+
+        print(f"✅ Images: {probe_all([upright, sideways, Path(tmp) / 'missing.png'])}")
+        print(f"✅ Frame rate 30000/1001: {_frame_rate('30000/1001')}")
+        print(f"✅ Video (ffprobe {'found' if probe_video(upright) is not None else 'rejects non-video / not installed'})")
+
+        narration = Path(tmp) / "narration.wav"
+        with wave.open(str(narration), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(24000)
+            wav.writeframes(bytes(2 * 24000 * 90))
+        print(f"✅ WAV: {probe_audio(narration)}")
+
+        # 10 minutes of constant-bitrate MPEG-2 Layer III frames behind an ID3 tag, like Edge-TTS output
+        from src.offline.tts import SILENT_FRAME, SILENT_FRAME_SECONDS
+        mp3 = Path(tmp) / "edge.mp3"
+        frames = int(600 / SILENT_FRAME_SECONDS)
+        mp3.write_bytes(b'ID3\x04\x00\x00\x00\x00\x00\x0a' + bytes(10) + SILENT_FRAME * frames)
+        print(f"✅ MP3 (frame headers): {audio_duration(mp3):.2f}s, expected {frames * SILENT_FRAME_SECONDS:.2f}s")
+
+        import time
+        start = time.perf_counter()
+        for _ in range(1000):
+            audio_duration(mp3)
+        print(f"✅ Memoized: 1000 lookups in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print("\n✅ Media probes working perfectly!\n")
@@ -0,0 +1,216 @@
+"""
+⏱️ NARRATION TIMELINE - Word and sentence timings captured during synthesis
+Edge-TTS reports a WordBoundary event for every spoken word. The TTS cache
+keeps them per sentence, shifts them by each sentence's offset when the
+narration is assembled and saves the table next to the narration
+(narration.timings.json). Captions and scene cuts read it instead of
+spreading the text evenly over the audio.
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import functools
+import json
+import os
+from typing import Dict, List, Optional
+
+
+TICKS_PER_SECOND = 10_000_000  # Edge-TTS offsets/durations are in 100-ns units
+
+
+@functools.lru_cache(maxsize=1)
+def edge_boundary_kwargs() -> Dict:
+    """Communicate() kwargs for word events (edge-tts 7+ sends sentence events unless asked)"""
+    try:
+        import inspect
+        import edge_tts
+        if 'boundary' in inspect.signature(edge_tts.Communicate.__init__).parameters:
+            return {'boundary': 'WordBoundary'}
+    except (ImportError, TypeError, ValueError):
+        pass
+    return {}
+
+
+async def stream_to_file(communicate, dest: Path) -> List[List]:
+    """
+    Write a Communicate's audio to dest and return its words
+
+    Replaces communicate.save(), which drops the boundary events. Each word
+    is [text, start, end] in seconds from the start of this audio.
+    """
+    words = []
+    with open(dest, 'wb') as audio:
+        async for message in communicate.stream():
+            if message['type'] == 'audio':
+                audio.write(message['data'])
+            elif message['type'] == 'WordBoundary':
+                start = message['offset'] / TICKS_PER_SECOND
+                end = start + message['duration'] / TICKS_PER_SECOND
+                words.append([message['text'], round(start, 3), round(end, 3)])
+    return words
+
+
+def build_timeline(segments: List[Dict]) -> Dict:
+    """
+    Timing table for assembled segments (after TTSCache.assemble set their offsets)
+
+    Sentences always have exact start/end; words are listed when the engine
+    reported them (Edge-TTS) and are shifted onto the narration's clock.
+    """
+    sentences = []
+    for segment in segments:
+        start = segment['offset']
+        words = segment.get('words')
+        sentences.append({
+            'text': segment['text'],
+            'start': round(start, 3),
+            'end': round(start + segment['duration'], 3),
+            'words': [[text, round(start + a, 3), round(start + b, 3)] for text, a, b in words or []],
+        })
+    duration = segments[-1]['offset'] + segments[-1]['duration'] if segments else 0.0
+    return {
+        'duration': round(duration, 3),
+        'word_timings': all(segment.get('words') is not None for segment in segments),
+        'sentences': sentences,
+    }
+
+
+def timeline_path(audio_path: Path) -> Path:
+    """narration.wav -> narration.timings.json"""
+    audio_path = Path(audio_path)
+    return audio_path.with_name(f"{audio_path.stem}.timings.json")
+
+
+def save_timeline(timeline: Dict, audio_path: Path) -> Path:
+    """Write the table next to its narration (compact JSON, atomic replace)"""
+    path = timeline_path(audio_path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(timeline, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_timeline(audio_path: Path) -> Optional[Dict]:
+    """
+    The timing table saved with a narration, or None
+
+    None when there is none, it's unreadable, or it's older than the audio
+    (the narration was replaced by something that didn't write a table).
+    """
+    path = timeline_path(audio_path)
+    try:
+        if path.stat().st_mtime < Path(audio_path).stat().st_mtime - 1:
+            return None
+        timeline = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    return timeline if timeline.get('sentences') else None
+
+
+def caption_groups(timeline: Dict, max_groups: Optional[int] = None) -> List[Dict]:
+    """
+    Captions timed to the narration: one per sentence, or max_groups runs of
+    consecutive sentences. Each lasts until the next one starts.
+
+    Returns dicts with text, start_time and duration (the caption modules' format).
+    """
+    sentences = timeline['sentences']
+    count = len(sentences) if not max_groups else min(max_groups, len(sentences))
+    if count == 0:
+        return []
+
+    # Even split by sentence count, rounded so every group gets at least one sentence
+    bounds = [round(i * len(sentences) / count) for i in range(count + 1)]
+    groups = [sentences[bounds[i]:bounds[i + 1]] for i in range(count)]
+
+    captions = []
+    for i, group in enumerate(groups):
+        start = 0.0 if i == 0 else group[0]['start']
+        end = groups[i + 1][0]['start'] if i + 1 < len(groups) else timeline['duration']
+        captions.append({
+            'text': " ".join(sentence['text'] for sentence in group),
+            'start_time': start,
+            'duration': max(0.0, end - start),
+        })
+    return captions
+
+
+def scene_durations(timeline: Dict, scene_texts: List[str], min_duration: float = 0.5) -> Optional[List[float]]:
+    """
+    How long each scene's image should stay up: cut where its narration ends
+
+    Scenes are matched to sentences by word count, so each cut lands on the
+    sentence boundary nearest the end of the scene's text. Returns None when
+    the scenes can't be placed (no text, more scenes than sentences, or a
+    scene shorter than min_duration) - use an even split then.
+    """
+    sentences = timeline['sentences']
+    scene_words = [len((text or '').split()) for text in scene_texts]
+    if not scene_texts or not all(scene_words) or len(sentences) < len(scene_texts):
+        return None
+
+    sentence_ends, total = [], 0
+    for sentence in sentences:
+        total += len(sentence['text'].split())
+        sentence_ends.append(total)
+    scale = total / sum(scene_words)  # Script cleanup can change the word count a little
+
+    cuts, target, last = [0.0], 0, -1
+    for k, words in enumerate(scene_words[:-1]):
+        target += words * scale
+        remaining = len(scene_texts) - k - 1  # Scenes after this one each need a sentence
+        candidates = range(last + 1, len(sentences) - remaining)
+        last = min(candidates, key=lambda j: abs(sentence_ends[j] - target))
+        cuts.append(sentences[last + 1]['start'])
+    cuts.append(timeline['duration'])
+
+    durations = [b - a for a, b in zip(cuts, cuts[1:])]
+    if min(durations) < min_duration:
+        return None
+    return durations
+
+
+if __name__ == "__main__":
+    import asyncio
+    import tempfile
+
+    from src.offline.tts import OfflineCommunicate
+
+    print("\n🧪 Testing narration timeline...\n")
+
+    sentences = [
+        "The lighthouse keeper counted the ships.",
+        "None came back.",
+        "The fog never lifted, and the radio stayed silent all winter.",
+        "In spring, a boat appeared.",
+    ]
+
+    async def narrate(tmp: Path) -> List[Dict]:
+        segments, offset = [], 0.0
+        for i, sentence in enumerate(sentences):
+            communicate = OfflineCommunicate(sentence, "en-US-GuyNeural", rate="+10%")
+            words = await stream_to_file(communicate, tmp / f"{i}.mp3")
+            duration = communicate.timeline()[-1][1] + communicate.timeline()[-1][2] + 0.3
+            segments.append({'text': sentence, 'words': words, 'offset': offset, 'duration': duration})
+            offset += duration
+        return segments
+
+    with tempfile.TemporaryDirectory() as tmp:
+        segments = asyncio.run(narrate(Path(tmp)))
+        timeline = build_timeline(segments)
+        audio = Path(tmp) / "narration.wav"
+        audio.write_bytes(b"")
+        saved = save_timeline(timeline, audio)
+        loaded = load_timeline(audio)
+
+        print(f"✅ {sum(len(s['words']) for s in loaded['sentences'])} words over {loaded['duration']:.2f}s "
+              f"({saved.stat().st_size} bytes)")
+        print(f"✅ First word of sentence 3 (shifted across joins): {loaded['sentences'][2]['words'][0]}")
+        print(f"✅ Captions (2 groups): {[(round(c['start_time'], 2), round(c['duration'], 2)) for c in caption_groups(loaded, 2)]}")
+        scenes = ["The lighthouse keeper counted the ships. None came back.",
+                  "The fog never lifted, and the radio stayed silent all winter. In spring, a boat appeared."]
+        print(f"✅ Scene cuts: {[round(d, 2) for d in scene_durations(loaded, scenes)]}")
+
+    print("\n✅ Narration timeline working perfectly!\n")
@@ -0,0 +1,255 @@
+"""
+🔎 PEXELS CLIENT - Concurrent, rate-limit-aware Pexels search with caching
+All keyword searches share one keep-alive session and run at the same
+time, paced by the X-Ratelimit-Remaining/Reset headers Pexels sends back.
+Responses are cached on disk by query + page for a day.
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+from config.settings import CACHE_DIR, PEXELS_SETTINGS
+from src.utils.api_manager import api_manager
+from src.utils.logger import logger
+
+
+ENDPOINTS = {
+    'photos': "https://api.pexels.com/v1/search",
+    'videos': "https://api.pexels.com/videos/search",
+}
+
+
+class PexelsClient:
+    """
+    Pexels search API client
+
+    Concurrency is capped by max_concurrency and by the remaining hourly
+    quota: once only rate_limit_reserve requests are left, new searches
+    wait for the reset time (up to max_rate_wait_seconds) instead of
+    burning the quota on 429s.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, cache_dir: Optional[Path] = None, settings: Optional[Dict] = None):
+        self.settings = dict(PEXELS_SETTINGS, **(settings or {}))
+        self.api_key = api_key or api_manager.get_key('pexels')
+        self.cache_dir = Path(cache_dir or CACHE_DIR / "pexels")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(
+            pool_connections=2, pool_maxsize=self.settings['max_concurrency']
+        ))
+        if self.api_key:
+            self.session.headers['Authorization'] = self.api_key
+
+        # Quota as last reported by Pexels (None until the first response)
+        self._quota = threading.Condition()
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self._in_flight = 0
+
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'rate_limited': 0, 'errors': 0}
+
+    def search(self, kind: str, query: str, per_page: int = 15, page: int = 1, **params) -> List[Dict]:
+        """
+        One page of results for a query ("photos" or "videos")
+
+        Returns [] without an API key, on errors or if the quota can't be
+        waited out in time.
+        """
+        if not self.api_key or not query or not query.strip():
+            return []
+
+        params = {'query': query.strip(), 'per_page': per_page, 'page': page, **params}
+        key = self._cache_key(kind, params)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._count('cache_hits')
+            return cached
+
+        data = self._get(ENDPOINTS[kind], params)
+        if data is None:
+            return []
+
+        results = data.get(kind, [])
+        self._cache_put(key, results)
+        return results
+
+    def search_many(self, kind: str, queries: List[str], per_page: int = 15, **params) -> Dict[str, List[Dict]]:
+        """Search every query at once; {query: results} in the order given"""
+        queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+        if not queries:
+            return {}
+
+        workers = min(len(queries), self.settings['max_concurrency'])
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pexels") as executor:
+            results = executor.map(lambda q: self.search(kind, q, per_page, **params), queries)
+            return dict(zip(queries, results))
+
+    def _get(self, url: str, params: Dict) -> Optional[Dict]:
+        """GET with quota pacing; retries 429s after the reset/Retry-After time"""
+        for attempt in range(1, self.settings['max_attempts'] + 1):
+            if not self._acquire():
+                logger.warning(f"   ⚠️ Pexels quota exhausted until reset - skipping '{params['query']}'")
+                return None
+
+            try:
+                response = self.session.get(url, params=params, timeout=self.settings['timeout'])
+            except requests.RequestException as e:
+                self._release(None)
+                self._count('errors')
+                logger.error(f"   Pexels search '{params['query']}' failed: {e}")
+                return None
+
+            self._count('requests')
+            api_manager.increment_usage('pexels')
+            self._release(response.headers)
+
+            if response.status_code == 200:
+                return response.json()
+
+            if response.status_code == 429 and attempt < self.settings['max_attempts']:
+                self._count('rate_limited')
+                with self._quota:
+                    self.remaining = 0
+                    retry_after = _number(response.headers.get('Retry-After'))
+                    if retry_after is not None:
+                        self.reset_at = time.time() + retry_after
+                continue
+
+            self._count('errors')
+            logger.error(f"   Pexels search '{params['query']}' returned HTTP {response.status_code}")
+            return None
+
+        return None
+
+    def _acquire(self) -> bool:
+        """Wait for a request slot within the quota; False if that would take too long"""
+        deadline = time.time() + self.settings['max_rate_wait_seconds']
+        with self._quota:
+            while True:
+                now = time.time()
+                if self.reset_at and now >= self.reset_at:
+                    self.remaining = self.reset_at = None  # Window has reset - the next response reports the new quota
+                # Unknown quota (first burst / new window): go - the responses will report it
+                if self.remaining is None or self.remaining - self._in_flight > self.settings['rate_limit_reserve']:
+                    self._in_flight += 1
+                    return True
+
+                # Low quota: wait for the reset (or for in-flight requests to report back)
+                wake_at = self.reset_at or now + 0.05
+                if wake_at > deadline:
+                    return False
+                self._quota.wait(max(0.01, wake_at - now))
+
+    def _release(self, headers: Optional[Dict]):
+        with self._quota:
+            self._in_flight -= 1
+            if headers:
+                remaining = _number(headers.get('X-Ratelimit-Remaining'))
+                reset = _number(headers.get('X-Ratelimit-Reset'))
+                if remaining is not None:
+                    self.remaining = int(remaining)
+                if reset is not None:
+                    self.reset_at = reset  # Unix timestamp
+            self._quota.notify_all()
+
+    def _cache_key(self, kind: str, params: Dict) -> str:
+        payload = json.dumps({'kind': kind, **params, 'query': params['query'].lower()}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[List[Dict]]:
+        filepath = self.cache_dir / f"{key}.json"
+        try:
+            if time.time() - filepath.stat().st_mtime > self.settings['cache_ttl_seconds']:
+                filepath.unlink()
+                return None
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _cache_put(self, key: str, results: List[Dict]):
+        filepath = self.cache_dir / f"{key}.json"
+        tmp_path = filepath.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f)
+            os.replace(tmp_path, filepath)
+        except OSError as e:
+            logger.warning(f"   Pexels cache write failed: {e}")
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Global instance
+pexels_client = PexelsClient()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("\n🧪 Testing PexelsClient...\n")
+
+    class FakeResponse:
+        def __init__(self, status_code, body, headers):
+            self.status_code = status_code
+            self._body = body
+            self.headers = headers
+
+        def json(self):
+            return self._body
+
+    quota = {'remaining': 40, 'reset_at': time.time() + 1.0, 'calls': 0}
+    quota_lock = threading.Lock()
+
+    def fake_get(url, params=None, timeout=None):
+        time.sleep(0.2)  # One round-trip
+        with quota_lock:
+            if time.time() >= quota['reset_at']:
+                quota['remaining'], quota['reset_at'] = 40, time.time() + 1.0
+            quota['calls'] += 1
+            quota['remaining'] -= 1
+            if quota['remaining'] < 0:
+                return FakeResponse(429, {}, {'Retry-After': '0.2'})
+            headers = {'X-Ratelimit-Remaining': str(quota['remaining']), 'X-Ratelimit-Reset': str(quota['reset_at'])}
+        return FakeResponse(200, {'videos': [{'id': hash(params['query']) % 1000}]}, headers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = PexelsClient(api_key="test", cache_dir=Path(tmp),
+                              settings={'max_concurrency': 32, 'rate_limit_reserve': 2, 'max_rate_wait_seconds': 5})
+        client.session.get = fake_get
+
+        queries = [f"scene {i}" for i in range(30)]
+        start = time.time()
+        results = client.search_many('videos', queries, per_page=3)
+        print(f"✅ {len(results)} keyword searches in {time.time() - start:.2f}s "
+              f"(sequential: {len(queries) * 0.2:.1f}s), quota left: {client.remaining}")
+
+        start = time.time()
+        client.search_many('videos', queries, per_page=3)
+        print(f"✅ Repeat served from cache in {time.time() - start:.3f}s, API calls: {quota['calls']}")
+        print(f"✅ Stats: {client.stats}")
+
+    print("\n✅ PexelsClient working perfectly!\n")
@@ -0,0 +1,263 @@
+"""
+🔀 STAGE GRAPH - Run pipeline stages as a dependency graph
+Independent stages (e.g. images and narration) run at the same time,
+and each stage starts as soon as everything it depends on is done
+(and, when it uses a limited resource like the renderer, a slot is free)
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.utils.logger import logger
+
+
+class StageFailed(Exception):
+    """Raised when a stage raises; the original error is kept as __cause__"""
+
+    def __init__(self, stage_name: str, error: Exception):
+        super().__init__(f"Stage '{stage_name}' failed: {error}")
+        self.stage_name = stage_name
+        self.error = error
+
+
+class Stage:
+    """One unit of pipeline work with its dependencies and timing"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Iterable[str] = (),
+        resource: Optional[str] = None
+    ):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.resource = resource
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds the stage ran for (None until finished)"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class StageGraph:
+    """
+    Small DAG executor for pipeline stages
+
+    Each stage function receives the results dict of everything finished
+    so far (stage name -> return value) and returns its own result.
+
+    Example:
+        graph = StageGraph("video")
+        graph.add_stage("script", lambda r: make_script())
+        graph.add_stage("images", lambda r: make_images(r["script"]), ["script"])
+        graph.add_stage("voice", lambda r: make_voice(r["script"]), ["script"])
+        graph.add_stage("video", lambda r: compile(r["images"], r["voice"]), ["images", "voice"])
+        results = graph.run()
+
+    Stages can name a resource; limits caps how many stages using each
+    resource run at once (e.g. {"render": 1}). Ready stages start in the
+    order they were added. With fail_fast=False a failed stage only skips
+    the stages that depend on it - the rest of the graph keeps running.
+    """
+
+    def __init__(
+        self,
+        name: str = "pipeline",
+        max_workers: Optional[int] = None,
+        limits: Optional[Dict[str, int]] = None,
+        fail_fast: bool = True
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.limits = dict(limits or {})
+        self.fail_fast = fail_fast
+        self.stages: Dict[str, Stage] = {}
+        self.failures: Dict[str, Exception] = {}
+        self.skipped: List[str] = []
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Iterable[str] = (),
+        resource: Optional[str] = None
+    ) -> 'StageGraph':
+        """Register a stage (returns self so calls can be chained)"""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, func, depends_on, resource)
+        return self
+
+    def run(self, initial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run all stages, overlapping any that don't depend on each other
+
+        Args:
+            initial: Pre-computed results that stages may depend on by name
+
+        Returns:
+            Results dict (stage name -> return value). With fail_fast=False,
+            failed and skipped stages are missing from it - see
+            self.failures and self.skipped.
+
+        Raises:
+            StageFailed: The first stage that raised (fail_fast only - no
+                further stage starts, and it's raised once the stages
+                already running have finished, so callers can clean up)
+        """
+        results: Dict[str, Any] = dict(initial or {})
+        self._validate(results)
+        self.failures = {}
+        self.skipped = []
+
+        pending = {name: stage for name, stage in self.stages.items() if name not in results}
+        workers = self.max_workers or max(1, len(pending))
+        in_use: Dict[str, int] = {}
+        started = time.time()
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{self.name}-stage")
+        try:
+            running = {}
+
+            while pending or running:
+                # Drop stages whose dependencies failed (fail_fast=False only)
+                self._skip_blocked(pending)
+
+                # Launch every stage whose dependencies are satisfied and whose resource has room
+                for name in [n for n, s in pending.items() if all(d in results for d in s.depends_on)]:
+                    stage = pending[name]
+                    if not self._has_capacity(stage, in_use):
+                        continue
+                    del pending[name]
+                    if stage.resource:
+                        in_use[stage.resource] = in_use.get(stage.resource, 0) + 1
+                    stage.started_at = time.time()
+                    logger.info(f"[{self.name}] Stage '{name}' started")
+                    running[executor.submit(stage.func, dict(results))] = stage
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage = running.pop(future)
+                    stage.finished_at = time.time()
+                    if stage.resource:
+                        in_use[stage.resource] -= 1
+
+                    try:
+                        results[stage.name] = future.result()
+                    except Exception as e:
+                        logger.error(f"[{self.name}] Stage '{stage.name}' failed after {stage.duration:.1f}s: {e}")
+                        if self.fail_fast:
+                            if running:
+                                logger.warning(f"[{self.name}] Waiting for {len(running)} running "
+                                               f"stage(s) before reporting the failure")
+                            raise StageFailed(stage.name, e) from e
+                        self.failures[stage.name] = e
+                        continue
+
+                    logger.success(f"[{self.name}] Stage '{stage.name}' done in {stage.duration:.1f}s")
+        finally:
+            # Queued stages are cancelled; running ones are joined, so nothing still
+            # writes to the job's files or holds a TTS/LLM slot once run() returns
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        logger.info(f"   [{self.name}] All stages done in {time.time() - started:.1f}s")
+        return results
+
+    def timings(self) -> Dict[str, float]:
+        """Per-stage durations in seconds (finished stages only)"""
+        return {
+            name: round(stage.duration, 2)
+            for name, stage in self.stages.items()
+            if stage.duration is not None
+        }
+
+    def _has_capacity(self, stage: Stage, in_use: Dict[str, int]) -> bool:
+        """True if the stage's resource (if limited) has a free slot"""
+        limit = self.limits.get(stage.resource) if stage.resource else None
+        return not limit or in_use.get(stage.resource, 0) < limit
+
+    def _skip_blocked(self, pending: Dict[str, Stage]):
+        """Remove pending stages that depend on a failed or skipped stage"""
+        blocked = set(self.failures) | set(self.skipped)
+        while blocked:
+            newly = [n for n, s in pending.items() if any(d in blocked for d in s.depends_on)]
+            for name in newly:
+                del pending[name]
+                self.skipped.append(name)
+                logger.warning(f"[{self.name}] Stage '{name}' skipped (a dependency failed)")
+            blocked = set(newly)
+
+    def _validate(self, initial: Dict[str, Any]):
+        """Reject unknown dependencies and cycles before running anything"""
+        known = set(self.stages) | set(initial)
+        for stage in self.stages.values():
+            missing = [d for d in stage.depends_on if d not in known]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {missing}")
+
+        # Kahn's algorithm - anything left over is part of a cycle
+        remaining: Dict[str, List[str]] = {
+            name: [d for d in stage.depends_on if d not in initial]
+            for name, stage in self.stages.items()
+        }
+        while True:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                break
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps[:] = [d for d in deps if d not in ready]
+
+        if remaining:
+            raise ValueError(f"Stage graph has a cycle: {sorted(remaining)}")
+
+
+if __name__ == "__main__":
+    print("\n🧪 Testing StageGraph...\n")
+
+    def slow(value, seconds):
+        time.sleep(seconds)
+        return value
+
+    graph = StageGraph("demo")
+    graph.add_stage("script", lambda r: slow("script", 0.2))
+    graph.add_stage("images", lambda r: slow(f"images({r['script']})", 0.5), ["script"])
+    graph.add_stage("voice", lambda r: slow(f"voice({r['script']})", 0.5), ["script"])
+    graph.add_stage("video", lambda r: f"video({r['images']}, {r['voice']})", ["images", "voice"])
+
+    start = time.time()
+    results = graph.run()
+    print(f"✅ Result: {results['video']}")
+    print(f"✅ Wall time: {time.time() - start:.2f}s (sequential would be 1.2s)")
+    print(f"✅ Timings: {graph.timings()}")
+
+    # Two pipelines sharing one renderer; the failing one doesn't stop the other
+    batch = StageGraph("batch", limits={"render": 1}, fail_fast=False)
+    for i, script_seconds in enumerate([0.1, 0.1]):
+        batch.add_stage(f"{i}:script", lambda r, s=script_seconds: slow("script", s), resource="script")
+        batch.add_stage(f"{i}:render", lambda r, i=i: slow(f"video {i}", 0.3), [f"{i}:script"], resource="render")
+    batch.add_stage("bad:script", lambda r: 1 / 0)
+    batch.add_stage("bad:render", lambda r: "never", ["bad:script"], resource="render")
+
+    start = time.time()
+    results = batch.run()
+    print(f"✅ Renders: {[results[k] for k in ('0:render', '1:render')]} in {time.time() - start:.2f}s (one at a time)")
+    print(f"✅ Failed: {list(batch.failures)}, skipped: {batch.skipped}")
+
+    print("\n✅ StageGraph working perfectly!\n")
@@ -0,0 +1,484 @@
+"""
+🗣️ TTS CACHE - Per-sentence narration segments shared by every voice engine
+Narration is synthesized one sentence at a time and each sentence is stored
+as a PCM WAV under the hash of (engine, voice, rate, pitch, style, text),
+with the engine's word timings (if it reports them) in a .words.json
+sidecar. A re-render - or a script with a few edited sentences - only
+synthesizes the sentences that changed and splices the rest from the cache.
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config.settings import CACHE_DIR, TTS_CACHE_SETTINGS
+from src.utils.audio_concat import is_pcm_wav, write_wav
+from src.utils.image_fetcher import AIMDLimiter
+from src.utils.logger import logger
+from src.utils.media_probe import audio_duration
+from src.utils.narration_timeline import build_timeline, save_timeline
+from src.utils.tts_scheduler import tts_scheduler
+
+
+# Sentence ends: punctuation (optionally followed by a closing quote/bracket), whitespace, then
+# anything but a lowercase letter ('"Where?" she asked.' stays one sentence)
+SENTENCE_SPLIT = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\'”’)\]]))\s+(?![a-z])')
+CLAUSE_SPLIT = re.compile(r'(?<=[,;:])\s+')
+QUOTES = str.maketrans({'‘': "'", '’': "'", '“': '"', '”': '"'})
+
+
+def normalize_text(text: str) -> str:
+    """Canonical spoken form: straight quotes, single spaces"""
+    return ' '.join(text.translate(QUOTES).split())
+
+
+def split_sentences(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Normalized sentences of a script, in order
+
+    Sentences longer than max_chars are split at commas/semicolons (then
+    spaces), so every piece fits in one engine request.
+    """
+    max_chars = max_chars or TTS_CACHE_SETTINGS['max_sentence_chars']
+    sentences = []
+    for sentence in SENTENCE_SPLIT.split(normalize_text(text)):
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            sentences.append(sentence)
+            continue
+
+        piece = ""
+        for part in _fit(CLAUSE_SPLIT.split(sentence), max_chars):
+            if piece and len(piece) + len(part) + 1 > max_chars:
+                sentences.append(piece)
+                piece = ""
+            piece = f"{piece} {part}".strip()
+        if piece:
+            sentences.append(piece)
+    return sentences
+
+
+def _fit(parts: List[str], max_chars: int) -> List[str]:
+    """Break any part still longer than max_chars at spaces"""
+    fitted = []
+    for part in parts:
+        while len(part) > max_chars:
+            cut = part.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            fitted.append(part[:cut].strip())
+            part = part[cut:].strip()
+        if part:
+            fitted.append(part)
+    return fitted
+
+
+class TTSCache:
+    """
+    On-disk store of synthesized sentences
+
+    Each sentence is stored once as 16-bit PCM WAV (the engine's own sample
+    rate) under the SHA-256 of its request, so durations come straight from
+    the header and segments splice without re-decoding. File mtimes double
+    as the last-used time for least-recently-used eviction.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_size_mb: Optional[float] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.cache_dir = Path(cache_dir or CACHE_DIR / "tts")
+        self.max_bytes = int((max_size_mb or TTS_CACHE_SETTINGS['max_size_mb']) * 1024 * 1024)
+        self.enabled = TTS_CACHE_SETTINGS['enabled'] if enabled is None else enabled
+        self.scratch_dir = self.cache_dir / "tmp"  # Same filesystem, so finished segments move in atomically
+
+        self.scratch_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'seconds_reused': 0.0}
+
+    @staticmethod
+    def make_key(engine: str, voice: str, text: str, rate: str = "", pitch: str = "", style: str = "", **options) -> str:
+        """SHA-256 of the canonical sentence request"""
+        payload = json.dumps(
+            {'engine': engine, 'voice': voice, 'rate': rate, 'pitch': pitch, 'style': style,
+             'options': options, 'text': normalize_text(text)},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def segments(
+        self,
+        text: str,
+        engine: str,
+        voice: str,
+        rate: str = "",
+        pitch: str = "",
+        style: str = "",
+        **options
+    ) -> List[Dict]:
+        """
+        One segment per sentence: text, key, and path/duration/words if already cached
+
+        Pass the result to fill()/fill_async() and then assemble().
+        """
+        segments = []
+        for sentence in split_sentences(text):
+            key = self.make_key(engine, voice, sentence, rate, pitch, style, **options)
+            segment = {'text': sentence, 'key': key, 'path': None, 'duration': None, 'words': None}
+            cached = self._lookup(key)
+            if cached is not None:
+                segment['path'], segment['duration'] = cached, audio_duration(cached)
+                segment['words'] = self._load_words(key)
+                self._count('hits')
+                self._count('seconds_reused', segment['duration'])
+            else:
+                self._count('misses')
+            segments.append(segment)
+        return segments
+
+    def fill(self, segments: List[Dict], synth: Callable[[str, Path], None], max_workers: Optional[int] = None):
+        """
+        Synthesize every segment that has no audio yet, on worker threads
+
+        synth(text, dest) writes the sentence's audio (any format ffmpeg
+        reads) to dest and may return its word timings as [word, start, end]
+        seconds. Finished sentences are cached even if others fail, so a
+        retry only redoes the failures.
+        """
+        pending = self._pending(segments)
+        if not pending:
+            return
+
+        def run(key: str):
+            dest = self._scratch_path(key)
+            try:
+                words = synth(pending[key][0]['text'], dest)
+                self._finish(key, dest, pending[key], words)
+            finally:
+                _unlink(dest)
+
+        workers = min(len(pending), max_workers or TTS_CACHE_SETTINGS['max_workers'])
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-sentence") as executor:
+            for future in [executor.submit(run, key) for key in pending]:
+                future.result()
+
+    async def fill_async(
+        self,
+        segments: List[Dict],
+        synth: Callable[[str, Path], Awaitable[None]],
+        max_workers: Optional[int] = None,
+        limiter: Optional[AIMDLimiter] = None
+    ):
+        """
+        fill() for async engines (Edge-TTS), one scheduled request per sentence
+
+        Requests run under the TTS scheduler: adaptive concurrency (at most
+        max_workers), a timeout per attempt and jittered retries per
+        sentence. Pass a shared limiter to bound several fill_async calls
+        together. Completion order doesn't matter - assemble() splices in
+        script order.
+        """
+        pending = self._pending(segments)
+        if not pending:
+            return
+        limiter = limiter or tts_scheduler.limiter(max_workers)
+        loop = asyncio.get_running_loop()
+
+        async def run(key: str):
+            text = pending[key][0]['text']
+            dest = self._scratch_path(key)
+            try:
+                words = await tts_scheduler.run(f"sentence {text[:30]!r}", lambda: synth(text, dest), limiter)
+                # PCM conversion is a subprocess - keep it off the event loop
+                await loop.run_in_executor(None, self._finish, key, dest, pending[key], words)
+            finally:
+                _unlink(dest)
+
+        # Let every sentence finish (and be cached) before reporting the first failure
+        results = await asyncio.gather(*(run(key) for key in pending), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+
+    def assemble(self, segments: List[Dict], output_path: Path) -> Path:
+        """
+        Splice the segments into one narration file and set each segment's offset
+
+        PCM is copied frame-for-frame into a WAV, which the final mux encodes
+        once. A non-WAV output path is encoded from that WAV here instead.
+        The word/sentence timing table is saved next to the output
+        (see narration_timeline).
+        """
+        if not segments:
+            raise ValueError("No narration segments to assemble")
+        missing = [s['text'][:40] for s in segments if s['path'] is None]
+        if missing:
+            raise ValueError(f"{len(missing)} sentences were never synthesized (first: {missing[0]!r})")
+
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        wav_path = output_path if output_path.suffix.lower() == '.wav' else self._scratch_path("assembled", ".wav")
+
+        offset = 0.0
+        for segment in segments:
+            segment['offset'] = offset
+            offset += segment['duration']
+
+        try:
+            write_wav([segment['path'] for segment in segments], wav_path)
+            if wav_path != output_path:
+                _run_ffmpeg(['-i', str(wav_path), '-b:a', '192k', str(output_path)])
+            save_timeline(build_timeline(segments), output_path)
+        finally:
+            if wav_path != output_path:
+                _unlink(wav_path)
+            if not self.enabled:
+                for segment in segments:
+                    _unlink(Path(segment['path']))
+
+        return output_path
+
+    def synthesize(
+        self,
+        text: str,
+        engine: str,
+        voice: str,
+        synth: Callable[[str, Path], None],
+        output_path: Path,
+        rate: str = "",
+        pitch: str = "",
+        style: str = "",
+        max_workers: Optional[int] = None,
+        **options
+    ) -> Path:
+        """segments() + fill() + assemble() for a whole script"""
+        segments = self.segments(text, engine, voice, rate, pitch, style, **options)
+        self._log_plan(segments)
+        self.fill(segments, synth, max_workers)
+        return self.assemble(segments, output_path)
+
+    async def synthesize_async(
+        self,
+        text: str,
+        engine: str,
+        voice: str,
+        synth: Callable[[str, Path], Awaitable[None]],
+        output_path: Path,
+        rate: str = "",
+        pitch: str = "",
+        style: str = "",
+        max_workers: Optional[int] = None,
+        **options
+    ) -> Path:
+        """synthesize() for async engines"""
+        segments = self.segments(text, engine, voice, rate, pitch, style, **options)
+        self._log_plan(segments)
+        limiter = tts_scheduler.limiter(max_workers)
+        await self.fill_async(segments, synth, limiter=limiter)
+        tts_scheduler.finish(limiter)
+        return await asyncio.get_running_loop().run_in_executor(None, self.assemble, segments, output_path)
+
+    def clear(self):
+        """Delete every cached segment"""
+        for filepath in self.cache_dir.glob("*.wav"):
+            _unlink(filepath)
+            _unlink(self._words_path(filepath.stem))
+
+    def usage(self) -> dict:
+        """Stats plus current size on disk"""
+        files = list(self.cache_dir.glob("*.wav"))
+        total = sum(f.stat().st_size for f in files if f.exists())
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'seconds_reused': round(self.stats['seconds_reused'], 1),
+            'entries': len(files),
+            'size_mb': round(total / 1024 / 1024, 1),
+            'max_size_mb': round(self.max_bytes / 1024 / 1024, 1),
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+        }
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.wav"
+
+    def _words_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.words.json"
+
+    def _load_words(self, key: str) -> Optional[List]:
+        """Word timings stored with a cached sentence (None if the engine didn't report any)"""
+        try:
+            return json.loads(self._words_path(key).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _store_words(self, key: str, words: Optional[List]):
+        if words is None:
+            _unlink(self._words_path(key))
+            return
+        tmp_path = self._scratch_path(key, ".json")
+        try:
+            tmp_path.write_text(json.dumps(words, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+            os.replace(tmp_path, self._words_path(key))
+        finally:
+            _unlink(tmp_path)
+
+    def _scratch_path(self, key: str, suffix: str = ".part") -> Path:
+        return self.scratch_dir / f"{key}.{uuid.uuid4().hex[:8]}{suffix}"
+
+    def _lookup(self, key: str) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        filepath = self._path(key)
+        try:
+            os.utime(filepath, None)  # Touch so LRU eviction keeps recently used segments
+        except OSError:
+            return None
+        return filepath
+
+    def _pending(self, segments: List[Dict]) -> Dict[str, List[Dict]]:
+        """Segments still without audio, grouped by key (a repeated sentence is synthesized once)"""
+        pending: Dict[str, List[Dict]] = {}
+        for segment in segments:
+            if segment['path'] is None:
+                pending.setdefault(segment['key'], []).append(segment)
+        return pending
+
+    def _finish(self, key: str, source: Path, segments: List[Dict], words: Optional[List] = None):
+        """Store an engine's output as PCM WAV (and its word timings) and point its segments at it"""
+        if not source.exists() or source.stat().st_size == 0:
+            raise RuntimeError(f"TTS engine produced no audio for: {segments[0]['text'][:60]!r}")
+
+        # Disabled cache: keep the segment only until assemble() has used it
+        filepath = self._path(key) if self.enabled else self._scratch_path(key, ".wav")
+        tmp_path = self._scratch_path(key, ".wav")
+        try:
+            if is_pcm_wav(source):
+                shutil.copyfile(source, tmp_path)
+            else:
+                _run_ffmpeg(['-i', str(source), '-vn', '-acodec', 'pcm_s16le', '-f', 'wav', str(tmp_path)])
+            if self.enabled:
+                # Timings land before the audio, so a cache hit never finds audio without them
+                self._store_words(key, words)
+            os.replace(tmp_path, filepath)
+        finally:
+            _unlink(tmp_path)
+
+        duration = audio_duration(filepath)
+        for segment in segments:
+            segment['path'], segment['duration'], segment['words'] = filepath, duration, words
+        self._count('stored')
+        if self.enabled:
+            self._evict()
+
+    def _log_plan(self, segments: List[Dict]):
+        cached = sum(1 for s in segments if s['path'] is not None)
+        if cached:
+            seconds = sum(s['duration'] for s in segments if s['path'] is not None)
+            logger.info(f"   ♻️ TTS cache: {cached}/{len(segments)} sentences reused ({seconds:.0f}s of audio), "
+                        f"synthesizing {len(segments) - cached}")
+        else:
+            logger.info(f"   🗣️ Synthesizing {len(segments)} sentences")
+
+    def _count(self, stat: str, amount: float = 1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def _evict(self):
+        """Drop least recently used segments until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for filepath in self.cache_dir.glob("*.wav"):
+                try:
+                    stat = filepath.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, filepath))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            if total_bytes <= self.max_bytes:
+                return
+
+            for mtime, size, filepath in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                _unlink(filepath)
+                _unlink(self._words_path(filepath.stem))
+                total_bytes -= size
+                self.stats['evicted'] += 1
+
+
+def _run_ffmpeg(args: List[str]):
+    result = subprocess.run(['ffmpeg', '-v', 'error', '-y'] + args, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='ignore')[-300:]}")
+
+
+def _unlink(path: Path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+# Global instance
+tts_cache = TTSCache()
+
+
+if __name__ == "__main__":
+    import math
+    import struct
+    import tempfile
+    import time
+
+    print("\n🧪 Testing TTSCache...\n")
+
+    script = ("The lighthouse keeper counted the ships. None came back! "
+              "“Where are they?” she asked. The fog, thick and cold, never lifted.")
+    print(f"✅ Sentences: {split_sentences(script)}")
+
+    calls = []
+
+    def fake_engine(text: str, dest: Path):
+        """0.2s of tone per word, written as 24 kHz WAV"""
+        calls.append(text)
+        time.sleep(0.05)
+        frames = b"".join(struct.pack('<h', int(8000 * math.sin(i / 10))) for i in range(4800 * len(text.split())))
+        with wave.open(str(dest), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(24000)
+            wav.writeframes(frames)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSCache(cache_dir=Path(tmp) / "store", enabled=True)
+
+        out = cache.synthesize(script, "fake", "narrator", fake_engine, Path(tmp) / "first.wav")
+        print(f"✅ First render: {len(calls)} sentences synthesized, {audio_duration(out):.1f}s")
+
+        calls.clear()
+        edited = script.replace("None came back!", "Only one came back!")
+        out = cache.synthesize(edited, "fake", "narrator", fake_engine, Path(tmp) / "second.wav")
+        print(f"✅ Edited one sentence: {len(calls)} synthesized ({calls}), {audio_duration(out):.1f}s")
+
+        calls.clear()
+        cache.synthesize(edited, "fake", "narrator", fake_engine, Path(tmp) / "third.wav", rate="+10%")
+        print(f"✅ New rate is a new key: {len(calls)} synthesized")
+        print(f"✅ Stats: {cache.usage()}")
+
+    print("\n✅ TTSCache working perfectly!\n")
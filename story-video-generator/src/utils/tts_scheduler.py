@@ -0,0 +1,169 @@
+"""
+📶 TTS SCHEDULER - Bounded, retrying runner for Edge-TTS requests
+Every uncached sentence is one request. Requests share an AIMD concurrency
+limit (grows while the service keeps up, halves when it errors or stalls),
+each attempt has a timeout, and a failed request is retried on its own with
+jittered backoff instead of failing the whole narration.
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+from config.settings import TTS_SCHEDULER_SETTINGS
+from src.utils.image_fetcher import AIMDLimiter
+from src.utils.logger import logger
+
+
+class ChunkTimeout(TimeoutError):
+    """One TTS request didn't finish within chunk_timeout"""
+
+
+class TTSScheduler:
+    """Runs TTS requests under a shared limiter and keeps per-request latency metrics"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = dict(TTS_SCHEDULER_SETTINGS, **(settings or {}))
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=self.settings['latency_window'])
+        self.stats = {
+            'requests': 0, 'succeeded': 0, 'retried': 0, 'timeouts': 0, 'failed': 0,
+            'peak_concurrency': 0, 'last_concurrency': 0,
+        }
+
+    def limiter(self, max_concurrency: Optional[int] = None) -> AIMDLimiter:
+        """Concurrency limit for one narration (share it across every request of that narration)"""
+        maximum = min(self.settings['max_concurrency'], max_concurrency or self.settings['max_concurrency'])
+        return AIMDLimiter(
+            self.settings['initial_concurrency'],
+            self.settings['min_concurrency'],
+            maximum,
+            self.settings['latency_tolerance']
+        )
+
+    async def run(self, label: str, request: Callable[[], Awaitable[None]], limiter: AIMDLimiter):
+        """
+        Await request() until it succeeds, with a timeout per attempt
+
+        Returns what request() returned; raises the last error once
+        max_attempts are used up.
+        """
+        max_attempts = self.settings['max_attempts']
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(1, max_attempts + 1):
+            await limiter.acquire()
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(request(), timeout=self.settings['chunk_timeout'])
+            except asyncio.TimeoutError:
+                limiter.on_error()
+                self._count('timeouts')
+                last_error = ChunkTimeout(f"no audio after {self.settings['chunk_timeout']:g}s")
+            except Exception as e:
+                limiter.on_error()
+                last_error = e
+            else:
+                latency = time.monotonic() - started
+                limiter.on_success(latency)
+                with self._lock:
+                    self._latencies.append(latency)
+                    self.stats['succeeded'] += 1
+                return result
+            finally:
+                self._count('requests')
+                await limiter.release()
+
+            if attempt < max_attempts:
+                # The slot is free for other sentences while this one waits
+                delay = self._backoff(attempt)
+                self._count('retried')
+                logger.warning(f"      ⚠️ TTS {label} failed ({last_error}) - retrying in {delay:.1f}s "
+                               f"(attempt {attempt + 1}/{max_attempts})")
+                await asyncio.sleep(delay)
+
+        self._count('failed')
+        raise last_error
+
+    def finish(self, limiter: AIMDLimiter):
+        """Record how far the narration's limiter went and log a one-line summary"""
+        if limiter.best_latency is None:
+            return  # Nothing was requested (all sentences cached)
+        with self._lock:
+            self.stats['peak_concurrency'] = max(self.stats['peak_concurrency'], int(limiter.peak))
+            self.stats['last_concurrency'] = int(limiter.limit)
+        metrics = self.metrics()
+        logger.info(f"   📶 TTS requests: p50 {metrics['p50']:.2f}s, p95 {metrics['p95']:.2f}s, "
+                    f"concurrency peaked at {int(limiter.peak)}, {self.stats['retried']} retries so far")
+
+    def metrics(self) -> Dict:
+        """Counters plus the latency distribution of recent requests"""
+        with self._lock:
+            samples = sorted(self._latencies)
+            stats = dict(self.stats)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))], 3)
+
+        return {**stats, 'samples': len(samples), 'p50': percentile(0.5), 'p95': percentile(0.95),
+                'max': percentile(1.0)}
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with jitter, so retried sentences don't return in lockstep"""
+        delay = min(self.settings['max_backoff_seconds'], self.settings['base_backoff_seconds'] * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+
+# Global instance
+tts_scheduler = TTSScheduler()
+
+
+if __name__ == "__main__":
+    print("\n🧪 Testing TTSScheduler...\n")
+
+    scheduler = TTSScheduler({'chunk_timeout': 0.3, 'base_backoff_seconds': 0.05, 'initial_concurrency': 4})
+    attempts: Dict[int, int] = {}
+    active = {'now': 0, 'max': 0}
+    finished = []
+
+    async def fake_request(i: int):
+        attempts[i] = attempts.get(i, 0) + 1
+        active['now'] += 1
+        active['max'] = max(active['max'], active['now'])
+        try:
+            if i == 3 and attempts[i] == 1:
+                await asyncio.sleep(5)  # Hangs: the timeout retries it
+            if i == 7 and attempts[i] < 3:
+                raise ConnectionError("WebSocket closed")
+            await asyncio.sleep(random.uniform(0.02, 0.08))
+            finished.append(i)
+        finally:
+            active['now'] -= 1
+
+    async def narrate():
+        limiter = scheduler.limiter()
+        await asyncio.gather(*(scheduler.run(f"sentence {i}", lambda i=i: fake_request(i), limiter)
+                               for i in range(40)))
+        scheduler.finish(limiter)
+
+    start = time.time()
+    asyncio.run(narrate())
+    print(f"✅ 40 sentences in {time.time() - start:.2f}s, at most {active['max']} in flight")
+    print(f"✅ Hung sentence retried: {attempts[3]} attempts; flaky sentence: {attempts[7]} attempts")
+    print(f"✅ Completion order differs from script order: {finished[:8]}")
+    print(f"✅ Metrics: {scheduler.metrics()}")
+
+    print("\n✅ TTSScheduler working perfectly!\n")
@@ -0,0 +1,48 @@
+"""
+📁 JOB WORKSPACE - Private temp directory for each generation job
+Concurrent jobs never share narration, chunk, image or concat files
+"""
+
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional
+
+
+class JobWorkspace:
+    """Isolated temp directory for one job, removed when the job finishes"""
+
+    def __init__(self, root: Path, job_id: Optional[str] = None):
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.temp_dir = Path(root) / self.job_id
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, filename: str) -> Path:
+        """Path for a file inside this workspace"""
+        filepath = self.temp_dir / filename
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        return filepath
+
+    def subdir(self, name: str) -> Path:
+        """Create (if needed) and return a sub-directory of this workspace"""
+        directory = self.temp_dir / name
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def cleanup(self):
+        """Delete the workspace and everything in it"""
+        try:
+            if self.temp_dir.exists():
+                shutil.rmtree(self.temp_dir)
+        except Exception as e:
+            print(f"Error cleaning workspace {self.job_id}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.cleanup()
+        return False
+
+    def __repr__(self):
+        return f"JobWorkspace({self.temp_dir})"
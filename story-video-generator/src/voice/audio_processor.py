@@ -11,7 +11,9 @@ from pydub.effects import normalize
 from typing import Optional, List
 import numpy as np
 
+from src.utils.audio_concat import concat_audio, concat_suffix
 from src.utils.file_handler import file_handler
+from src.utils.media_probe import audio_duration
 
 
 class AudioProcessor:
@@ -47,23 +49,17 @@ class AudioProcessor:
         return output_path
     
     def merge_audio(self, audio_files: List[Path], crossfade: int = 0) -> Path:
-        """Merge multiple audio files"""
+        """
+        Merge multiple audio files without re-encoding them
+
+        Same-format chunks are stream-copied; otherwise (or with a crossfade)
+        the result is a WAV that the final mux encodes.
+        """
         if not audio_files:
             return None
         
-        combined = AudioSegment.from_file(str(audio_files[0]))
-        
-        for audio_file in audio_files[1:]:
-            next_audio = AudioSegment.from_file(str(audio_file))
-            if crossfade > 0:
-                combined = combined.append(next_audio, crossfade=crossfade)
-            else:
-                combined = combined + next_audio
-        
-        output_path = file_handler.get_temp_path("merged_audio.mp3")
-        combined.export(str(output_path), format=self.default_format, bitrate=self.default_bitrate)
-        
-        return output_path
+        output_path = file_handler.get_temp_path(f"merged_audio{concat_suffix(audio_files, crossfade)}")
+        return concat_audio(audio_files, output_path, crossfade)
     
     def overlay_audio(
         self,
@@ -124,9 +120,8 @@ class AudioProcessor:
         return output_path
     
     def get_duration(self, audio_path: Path) -> float:
-        """Get audio duration in seconds"""
-        audio = AudioSegment.from_file(str(audio_path))
-        return len(audio) / 1000.0
+        """Get audio duration in seconds (header read, no decode)"""
+        return audio_duration(audio_path)
     
     def convert_format(self, audio_path: Path, output_format: str = "mp3") -> Path:
         """Convert audio to different format"""
@@ -9,6 +9,9 @@ from pathlib import Path
 from typing import Optional, List, Dict
 import time
 
+from src.utils.tts_cache import tts_cache
+from src.utils.workspace import JobWorkspace
+
 class ElevenLabsTTS:
     """ElevenLabs TTS Engine - 99% Human-Like Quality!"""
     
@@ -75,12 +78,14 @@ class ElevenLabsTTS:
         },
     }
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, workspace: Optional[JobWorkspace] = None):
         """Initialize ElevenLabs TTS
         
         Args:
             api_key: ElevenLabs API key (or set ELEVENLABS_API_KEY env var)
+            workspace: Per-job temp dir for default output paths
         """
+        self.workspace = workspace
         self.api_key = api_key or os.getenv('ELEVENLABS_API_KEY')
         if not self.api_key:
             raise ValueError("ElevenLabs API key required! Get free key at: https://elevenlabs.io/")
@@ -131,66 +136,28 @@ class ElevenLabsTTS:
             print(f"   Using: {voice_name} ({voice_info['style']})")
             print(f"   Best for: {voice_info['best_for']}")
             
-            # Prepare API request
-            url = f"{self.api_url}/{voice_id}"
-            
-            headers = {
-                'xi-api-key': self.api_key,
-                'Content-Type': 'application/json'
-            }
-            
-            payload = {
-                'text': text,
-                'model_id': 'eleven_monolingual_v1',  # Fast & high quality
-                'voice_settings': {
-                    'stability': stability,
-                    'similarity_boost': similarity_boost
-                }
-            }
-            
-            # Make API call
-            print(f"   📡 Calling ElevenLabs API...")
-            response = requests.post(url, json=payload, headers=headers, timeout=120)
-            
-            if not response.ok:
-                error_msg = response.text[:500]
-                print(f"   ❌ API Error: {response.status_code}")
-                print(f"   Details: {error_msg}")
-                
-                # Check for common errors
-                if response.status_code == 401:
-                    raise Exception("❌ Invalid API key! Get your key at: https://elevenlabs.io/")
-                elif response.status_code == 429:
-                    raise Exception("❌ Rate limit exceeded! Upgrade plan or wait.")
-                elif response.status_code == 400:
-                    raise Exception(f"❌ Bad request: {error_msg}")
-                else:
-                    raise Exception(f"❌ API error {response.status_code}: {error_msg}")
-            
-            # Save audio
-            audio_data = response.content
-            
-            if len(audio_data) == 0:
-                raise Exception("❌ No audio data received from API!")
-            
             # Default output path
             if output_path is None:
-                output_dir = Path("output/temp")
+                output_dir = self.workspace.temp_dir if self.workspace is not None else Path("output/temp")
                 output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = output_dir / "elevenlabs_narration.mp3"
+                output_path = output_dir / "elevenlabs_narration.wav"
             
-            output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+            def synth(sentence: str, dest: Path):
+                dest.write_bytes(self._speak(sentence, voice_id, stability, similarity_boost))
             
-            # Write MP3 file
-            with open(output_path, 'wb') as f:
-                f.write(audio_data)
+            # Sentence by sentence through the TTS cache - unchanged sentences cost no credits
+            # (2 requests at a time stays inside the free tier's concurrency limit)
+            print(f"   📡 Calling ElevenLabs API...")
+            output_path = tts_cache.synthesize(
+                text, "elevenlabs", voice_id, synth, Path(output_path),
+                stability=stability, similarity_boost=similarity_boost, max_workers=2
+            )
             
             duration = time.time() - start_time
             
             print(f"✅ Human-like audio generated!")
             print(f"   File: {output_path}")
-            print(f"   Size: {len(audio_data) / 1024:.1f} KB")
+            print(f"   Size: {output_path.stat().st_size / 1024:.1f} KB")
             print(f"   Generation time: {duration:.1f} seconds")
             print(f"   🎬 YouTube-ready quality!")
             
@@ -209,6 +176,44 @@ class ElevenLabsTTS:
             print(f"{'='*60}\n")
             raise
     
+    def _speak(self, text: str, voice_id: str, stability: float, similarity_boost: float) -> bytes:
+        """One ElevenLabs request - MP3 bytes for the text"""
+        headers = {
+            'xi-api-key': self.api_key,
+            'Content-Type': 'application/json'
+        }
+        
+        payload = {
+            'text': text,
+            'model_id': 'eleven_monolingual_v1',  # Fast & high quality
+            'voice_settings': {
+                'stability': stability,
+                'similarity_boost': similarity_boost
+            }
+        }
+        
+        response = requests.post(f"{self.api_url}/{voice_id}", json=payload, headers=headers, timeout=120)
+        
+        if not response.ok:
+            error_msg = response.text[:500]
+            print(f"   ❌ API Error: {response.status_code}")
+            print(f"   Details: {error_msg}")
+            
+            # Check for common errors
+            if response.status_code == 401:
+                raise Exception("❌ Invalid API key! Get your key at: https://elevenlabs.io/")
+            elif response.status_code == 429:
+                raise Exception("❌ Rate limit exceeded! Upgrade plan or wait.")
+            elif response.status_code == 400:
+                raise Exception(f"❌ Bad request: {error_msg}")
+            else:
+                raise Exception(f"❌ API error {response.status_code}: {error_msg}")
+        
+        if len(response.content) == 0:
+            raise Exception("❌ No audio data received from API!")
+        
+        return response.content
+    
     def get_voices(self, gender: Optional[str] = None) -> List[Dict]:
         """Get available voices
         
@@ -254,9 +259,9 @@ class ElevenLabsTTS:
         print("="*60 + "\n")
 
 
-def create_elevenlabs_tts(api_key: Optional[str] = None) -> ElevenLabsTTS:
+def create_elevenlabs_tts(api_key: Optional[str] = None, workspace: Optional[JobWorkspace] = None) -> ElevenLabsTTS:
     """Create ElevenLabs TTS instance"""
-    return ElevenLabsTTS(api_key=api_key)
+    return ElevenLabsTTS(api_key=api_key, workspace=workspace)
 
 
 # Test if module is run directly
@@ -9,9 +9,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 import requests
 import time
 from typing import Optional, List, Dict
-from pydub import AudioSegment
 
+from src.utils.audio_concat import concat_audio
 from src.utils.file_handler import file_handler
+from src.utils.media_probe import audio_duration
+from src.utils.workspace import JobWorkspace
 from src.utils.logger import logger
 
 
@@ -85,9 +87,11 @@ class FishAudioTTS:
         }
     }
     
-    def __init__(self, voice_id: str = "male_narrator_deep"):
+    def __init__(self, voice_id: str = "male_narrator_deep", workspace: Optional[JobWorkspace] = None):
         """Initialize with voice choice"""
         
+        self.workspace = workspace  # Per-job temp dir (None = shared temp dir)
+        
         if voice_id not in self.VOICES:
             logger.warning(f"Unknown voice: {voice_id}, using default")
             voice_id = "male_narrator_deep"
@@ -115,7 +119,7 @@ class FishAudioTTS:
             return self._generate_long_audio(text, output_filename)
         
         # Generate
-        output_path = file_handler.get_temp_path(output_filename)
+        output_path = file_handler.get_temp_path(output_filename, self.workspace)
         
         try:
             response = requests.post(
@@ -158,7 +162,7 @@ class FishAudioTTS:
         for i, chunk in enumerate(chunks):
             logger.info(f"   Chunk {i+1}/{len(chunks)}...")
             
-            chunk_path = file_handler.get_temp_path(f"chunk_{i+1:03d}.mp3")
+            chunk_path = file_handler.get_temp_path(f"chunk_{i+1:03d}.mp3", self.workspace)
             
             response = requests.post(
                 self.api_url,
@@ -194,7 +198,7 @@ class FishAudioTTS:
         import asyncio
         import edge_tts
         
-        output_path = file_handler.get_temp_path(output_filename)
+        output_path = file_handler.get_temp_path(output_filename, self.workspace)
         
         voice_map = {
             "male_narrator_deep": "en-US-GuyNeural",
@@ -215,18 +219,10 @@ class FishAudioTTS:
         return output_path
     
     def _merge_audio(self, files: List[Path], output_filename: str) -> Path:
-        """Merge audio files"""
-        
-        combined = AudioSegment.empty()
-        
-        for audio_file in files:
-            audio = AudioSegment.from_mp3(str(audio_file))
-            combined = combined.append(audio, crossfade=100)
+        """Merge audio files into a WAV (100 ms crossfade) - the final mux encodes it once"""
         
-        output_path = file_handler.get_temp_path(output_filename)
-        combined.export(str(output_path), format="mp3", bitrate="192k")
-        
-        return output_path
+        output_path = file_handler.get_temp_path(Path(output_filename).with_suffix('.wav').name, self.workspace)
+        return concat_audio(files, output_path, crossfade_ms=100)
     
     def _split_text(self, text: str, max_chars: int) -> List[str]:
         """Split text intelligently"""
@@ -265,9 +261,8 @@ class FishAudioTTS:
         return text
     
     def get_audio_duration(self, audio_path: Path) -> float:
-        """Get audio duration"""
-        audio = AudioSegment.from_mp3(str(audio_path))
-        return len(audio) / 1000.0
+        """Get audio duration (header read, no decode)"""
+        return audio_duration(audio_path)
     
     @classmethod
     def list_voices(cls) -> List[Dict]:
@@ -7,9 +7,11 @@ import base64
 import requests
 from pathlib import Path
 from typing import Optional
-from concurrent.futures import ThreadPoolExecutor
 import time
 
+from src.utils.tts_cache import tts_cache
+from src.utils.workspace import JobWorkspace
+
 class InworldTTS:
     """Inworld AI TTS Engine - Fast & Professional"""
     
@@ -29,12 +31,14 @@ class InworldTTS:
         'ethan': {'name': 'Ethan', 'gender': 'male', 'style': 'casual, friendly'},
     }
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, workspace: Optional[JobWorkspace] = None):
         """Initialize Inworld TTS
         
         Args:
             api_key: Base64 encoded API key (or set INWORLD_API_KEY env var)
+            workspace: Per-job temp dir for chunks and default output paths
         """
+        self.workspace = workspace
         self.api_key = api_key or os.getenv('INWORLD_API_KEY')
         if not self.api_key:
             raise ValueError("Inworld API key required! Set INWORLD_API_KEY environment variable")
@@ -51,7 +55,7 @@ class InworldTTS:
         voice: str = 'ashley',
         output_path: Optional[str] = None
     ) -> str:
-        """Generate audio from text with automatic parallel chunking
+        """Generate audio sentence by sentence, in parallel (sentences in the TTS cache are reused)
         
         Args:
             text: Text to convert to speech
@@ -77,29 +81,22 @@ class InworldTTS:
         print(f"   Voice: {voice_name} ({voice_info['gender']}, {voice_info['style']})")
         print(f"   Text: {len(text)} characters")
         
-        # For long text (>1000 chars), use parallel chunking for SPEED
-        if len(text) > 1000:
-            return self._generate_long_audio_parallel(text, voice_name, output_path)
+        # Default output path
+        if output_path is None:
+            output_dir = self.workspace.temp_dir if self.workspace is not None else Path("output/temp")
+            output_dir.mkdir(parents=True, exist_ok=True)
+            output_path = output_dir / "inworld_narration.wav"
         
-        # For short text, generate directly
         start_time = time.time()
         
+        def synth(sentence: str, dest: Path):
+            dest.write_bytes(self._generate_chunk(sentence, voice_name, 0))
+        
         try:
-            audio_content = self._generate_single(text, voice_name)
-            
-            # Default output path
-            if output_path is None:
-                output_dir = Path("output/temp")
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = output_dir / "inworld_narration.mp3"
-            
-            output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Save audio
-            audio_buffer = base64.b64decode(audio_content)
-            with open(output_path, 'wb') as f:
-                f.write(audio_buffer)
+            # Sentence by sentence through the TTS cache
+            # ⚡ 6 workers: fast without tripping Inworld's rate limits
+            output_path = tts_cache.synthesize(text, "inworld", voice_name, synth, Path(output_path),
+                                               model=self.model_id, max_workers=6)
             
             duration = time.time() - start_time
             print(f"✅ Audio generated: {output_path}")
@@ -154,115 +151,8 @@ class InworldTTS:
             print(f"   ❌ Unexpected error: {type(e).__name__}: {e}")
             raise
     
-    def _generate_long_audio_parallel(
-        self,
-        text: str,
-        voice_name: str,
-        output_path: Optional[str]
-    ) -> str:
-        """Generate audio for long text using parallel processing - SUPER FAST!"""
-        
-        print(f"   🚀 Text is long, using ULTRA-FAST parallel processing...")
-        
-        # Split text into chunks at sentence boundaries
-        # ⚡ SMALLER CHUNKS for Inworld API limits (500 chars max for reliability)
-        chunks = self._split_text_smart(text, max_chars=500)
-        print(f"   Split into {len(chunks)} chunks (500 chars each for API reliability)")
-        print(f"   🚀 Processing {len(chunks)} chunks in PARALLEL for 10x+ speedup...")
-        
-        start_time = time.time()
-        
-        # Generate audio for each chunk in parallel
-        # ⚡ ADAPTIVE WORKERS: Fewer workers for reliability, more for speed
-        # For Inworld API: 4-6 workers prevents rate limiting while staying fast
-        num_workers = min(6, len(chunks))  # Max 6 workers to avoid API rate limits
-        print(f"   ⚡ Using {num_workers} parallel workers (prevents API rate limiting)")
-        
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            futures = []
-            for i, chunk in enumerate(chunks):
-                future = executor.submit(self._generate_chunk, chunk, voice_name, i)
-                futures.append(future)
-            
-            # Wait for all chunks to complete and verify we got them all
-            chunk_audios = []
-            failed_chunks = []
-            
-            for i, future in enumerate(futures):
-                try:
-                    chunk_data = future.result(timeout=180)  # 3-minute timeout per chunk
-                    if chunk_data and len(chunk_data) > 0:
-                        chunk_audios.append(chunk_data)
-                    else:
-                        print(f"   ❌ Chunk {i} returned empty data!")
-                        failed_chunks.append(i)
-                except Exception as e:
-                    print(f"   ❌ Chunk {i} completely failed: {e}")
-                    failed_chunks.append(i)
-            
-            # Verify we got all chunks
-            if failed_chunks:
-                print(f"   ⚠️  WARNING: {len(failed_chunks)} chunks failed: {failed_chunks}")
-                print(f"   ⚠️  Audio will be INCOMPLETE! Got {len(chunk_audios)}/{len(chunks)} chunks")
-            else:
-                print(f"   ✅ All {len(chunk_audios)} chunks generated successfully!")
-        
-        # ✅ FIX: Use PyDub to properly concatenate MP3 chunks (not raw bytes!)
-        # Raw byte concatenation breaks MP3 headers!
-        
-        if len(chunk_audios) == 0:
-            raise Exception("❌ No audio data generated! All chunks failed!")
-        
-        from pydub import AudioSegment
-        
-        # Default output path
-        if output_path is None:
-            output_dir = Path("output/temp")
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_path = output_dir / "inworld_narration.mp3"
-        
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Save chunks as temporary files first
-        temp_dir = Path("output/temp/audio_chunks")
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        
-        print(f"   🔧 Combining {len(chunk_audios)} audio chunks using PyDub...")
-        
-        chunk_files = []
-        for i, chunk_data in enumerate(chunk_audios):
-            chunk_file = temp_dir / f"chunk_{i:03d}.mp3"
-            with open(chunk_file, 'wb') as f:
-                f.write(chunk_data)
-            chunk_files.append(chunk_file)
-        
-        # Combine using PyDub (proper MP3 handling!)
-        combined = AudioSegment.empty()
-        for chunk_file in chunk_files:
-            try:
-                audio_chunk = AudioSegment.from_mp3(str(chunk_file))
-                combined += audio_chunk
-            except Exception as e:
-                print(f"   ⚠️  Failed to load chunk {chunk_file}: {e}")
-        
-        # Export as proper MP3
-        combined.export(str(output_path), format="mp3", bitrate="192k")
-        
-        # Clean up temp files
-        for chunk_file in chunk_files:
-            chunk_file.unlink()
-        
-        print(f"   ✅ MP3 properly combined with headers!")
-        
-        duration = time.time() - start_time
-        print(f"✅ Audio generated: {output_path}")
-        print(f"   Generation time: {duration:.1f} seconds ⚡")
-        
-        return str(output_path)
-    
     def _generate_chunk(self, text: str, voice_name: str, chunk_id: int) -> bytes:
-        """Generate audio for a single chunk (used in parallel processing)"""
+        """Generate audio for one sentence, with retries (called from the TTS cache's worker threads)"""
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -278,28 +168,6 @@ class InworldTTS:
                     print(f"   ❌ Chunk {chunk_id} failed after {max_retries} attempts: {e}")
                     raise  # Re-raise on final failure
     
-    def _split_text_smart(self, text: str, max_chars: int = 1000) -> list:
-        """Split text at sentence boundaries"""
-        # Split by sentences
-        sentences = text.replace('!', '.').replace('?', '.').split('.')
-        sentences = [s.strip() + '.' for s in sentences if s.strip()]
-        
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= max_chars:
-                current_chunk += " " + sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
-    
     def get_voices(self, gender: Optional[str] = None):
         """Get available voices with optional filtering
         
@@ -333,7 +201,7 @@ class InworldTTS:
         print("=" * 60 + "\n")
 
 
-def create_inworld_tts(api_key: Optional[str] = None) -> InworldTTS:
+def create_inworld_tts(api_key: Optional[str] = None, workspace: Optional[JobWorkspace] = None) -> InworldTTS:
     """Factory function to create Inworld TTS instance
     
     Args:
@@ -342,7 +210,7 @@ def create_inworld_tts(api_key: Optional[str] = None) -> InworldTTS:
     Returns:
         InworldTTS instance
     """
-    return InworldTTS(api_key=api_key)
+    return InworldTTS(api_key=api_key, workspace=workspace)
 
 
 # Test
@@ -9,6 +9,10 @@ from typing import Optional
 import soundfile as sf
 import numpy as np
 
+from src.utils.media_probe import audio_duration
+from src.utils.tts_cache import tts_cache
+from src.utils.workspace import JobWorkspace
+
 try:
     from kokoro import KPipeline
     KOKORO_AVAILABLE = True
@@ -57,12 +61,14 @@ class KokoroTTS:
         'c': 'Mandarin Chinese'
     }
     
-    def __init__(self, device: str = 'cpu'):
+    def __init__(self, device: str = 'cpu', workspace: Optional[JobWorkspace] = None):
         """Initialize Kokoro TTS
         
         Args:
             device: 'cpu' or 'cuda' for GPU acceleration
+            workspace: Per-job temp dir for default output paths
         """
+        self.workspace = workspace
         if not KOKORO_AVAILABLE:
             raise RuntimeError("Kokoro TTS not installed. Run: pip install kokoro soundfile")
         
@@ -93,7 +99,7 @@ class KokoroTTS:
         speed: float = 1.0,
         output_path: Optional[str] = None
     ) -> str:
-        """Generate audio from text with automatic chunking for long texts
+        """Generate audio sentence by sentence (sentences in the TTS cache are reused)
         
         Args:
             text: Text to convert to speech
@@ -124,41 +130,23 @@ class KokoroTTS:
         print(f"   Speed: {speed}x")
         print(f"   Text: {len(text)} characters")
         
-        # ⚡ AGGRESSIVE PARALLEL: Use parallel for ANY text >800 chars (was 5000)
-        # Smaller threshold = more parallelism = MUCH FASTER!
-        if len(text) > 800:
-            return self._generate_long_audio_parallel(text, voice, speed, output_path)
+        # Default output path
+        if output_path is None:
+            output_dir = self.workspace.temp_dir if self.workspace is not None else Path("output/temp")
+            output_dir.mkdir(parents=True, exist_ok=True)
+            output_path = output_dir / "kokoro_narration.wav"
+        
+        def synth(sentence: str, dest: Path):
+            audio = self._generate_chunk(sentence, voice, speed, 0)
+            sf.write(str(dest), audio, self.sample_rate, format='WAV', subtype='PCM_16')
         
         try:
-            # Generate audio
-            generator = self.pipeline(text, voice=voice, speed=speed)
-            
-            # Collect all audio segments
-            audio_segments = []
-            for i, (gs, ps, audio) in enumerate(generator):
-                audio_segments.append(audio)
-            
-            # Concatenate all segments
-            if len(audio_segments) > 0:
-                full_audio = np.concatenate(audio_segments)
-            else:
-                raise RuntimeError("No audio generated")
-            
-            # Default output path
-            if output_path is None:
-                output_dir = Path("output/temp")
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = output_dir / "kokoro_narration.wav"
+            # Sentence by sentence through the TTS cache - 8 workers keep the CPU busy
+            output_path = tts_cache.synthesize(text, "kokoro", voice, synth, Path(output_path),
+                                               rate=f"{speed}x", max_workers=8)
             
-            output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Save audio
-            sf.write(str(output_path), full_audio, self.sample_rate)
-            
-            duration = len(full_audio) / self.sample_rate
             print(f"✅ Audio generated: {output_path}")
-            print(f"   Duration: {duration:.1f} seconds")
+            print(f"   Duration: {audio_duration(output_path):.1f} seconds")
             
             return str(output_path)
         
@@ -166,59 +154,8 @@ class KokoroTTS:
             print(f"❌ Audio generation failed: {e}")
             raise
     
-    def _generate_long_audio_parallel(
-        self,
-        text: str,
-        voice: str,
-        speed: float,
-        output_path: Optional[str]
-    ) -> str:
-        """Generate audio for long text using parallel processing"""
-        from concurrent.futures import ThreadPoolExecutor
-        import soundfile as sf
-        
-        print(f"   🚀 Using AGGRESSIVE parallel chunk processing...")
-        
-        # ⚡ EVEN SMALLER CHUNKS = MORE PARALLEL TASKS = FASTER!
-        # Changed from 2000 to 1000 chars per chunk for MAXIMUM parallelism
-        chunks = self._split_text_smart(text, max_chars=1000)
-        print(f"   Split into {len(chunks)} chunks")
-        print(f"   🚀 Processing chunks in PARALLEL for 5-10x speedup...")
-        
-        # ⚡ MORE WORKERS = MORE SPEED!
-        # Increased from 4 to 8 workers for better CPU utilization
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            futures = []
-            for i, chunk in enumerate(chunks):
-                future = executor.submit(self._generate_chunk, chunk, voice, speed, i)
-                futures.append(future)
-            
-            # Wait for all chunks to complete
-            chunk_audios = [f.result() for f in futures]
-        
-        # Concatenate all audio chunks
-        full_audio = np.concatenate(chunk_audios)
-        
-        # Default output path
-        if output_path is None:
-            output_dir = Path("output/temp")
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_path = output_dir / "kokoro_narration.wav"
-        
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Save audio
-        sf.write(str(output_path), full_audio, self.sample_rate)
-        
-        duration = len(full_audio) / self.sample_rate
-        print(f"✅ Audio generated: {output_path}")
-        print(f"   Duration: {duration:.1f} seconds")
-        
-        return str(output_path)
-    
     def _generate_chunk(self, text: str, voice: str, speed: float, chunk_id: int) -> np.ndarray:
-        """Generate audio for a single chunk (used in parallel processing)"""
+        """Generate audio for one sentence (called from the TTS cache's worker threads)"""
         generator = self.pipeline(text, voice=voice, speed=speed)
         
         audio_segments = []
@@ -230,28 +167,6 @@ class KokoroTTS:
         else:
             raise RuntimeError(f"No audio generated for chunk {chunk_id}")
     
-    def _split_text_smart(self, text: str, max_chars: int = 1000) -> list:
-        """Split text at sentence boundaries"""
-        # Split by sentences
-        sentences = text.replace('!', '.').replace('?', '.').split('.')
-        sentences = [s.strip() + '.' for s in sentences if s.strip()]
-        
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= max_chars:
-                current_chunk += " " + sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
-    
     def get_voices(self, language: Optional[str] = None, gender: Optional[str] = None):
         """Get available voices with optional filtering
         
@@ -293,7 +208,7 @@ class KokoroTTS:
         print("=" * 60 + "\n")
 
 
-def create_kokoro_tts(device: str = 'cpu') -> KokoroTTS:
+def create_kokoro_tts(device: str = 'cpu', workspace: Optional[JobWorkspace] = None) -> KokoroTTS:
     """Factory function to create Kokoro TTS instance
     
     Args:
@@ -302,7 +217,7 @@ def create_kokoro_tts(device: str = 'cpu') -> KokoroTTS:
     Returns:
         KokoroTTS instance
     """
-    return KokoroTTS(device=device)
+    return KokoroTTS(device=device, workspace=workspace)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -9,34 +9,37 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 import asyncio
 import edge_tts
 from typing import Optional, List
-from pydub import AudioSegment
-import io
 
 from config.settings import VOICE_SETTINGS
 from src.utils.file_handler import file_handler
+from src.utils.media_probe import audio_duration
+from src.utils.narration_timeline import edge_boundary_kwargs, stream_to_file
+from src.utils.tts_cache import tts_cache
+from src.utils.workspace import JobWorkspace
 
 
 class TTSEngine:
     """Text-to-Speech engine using Microsoft Edge-TTS (FREE, unlimited)"""
     
-    def __init__(self, voice: Optional[str] = None):
+    def __init__(self, voice: Optional[str] = None, workspace: Optional[JobWorkspace] = None):
         self.voice = voice or VOICE_SETTINGS['default_voice']
+        self.workspace = workspace  # Per-job temp dir (None = shared temp dir)
         self.rate = VOICE_SETTINGS['rate']
         self.volume = VOICE_SETTINGS['volume']
-        self.chunk_size = 1000  # ⚡ ULTRA-SMALL chunks for MAXIMUM parallelism = SUPER FAST!
     
-    async def _generate_audio_async(self, text: str, output_path: str):
-        """Generate audio asynchronously"""
+    async def _synth_sentence(self, text: str, output_path: Path):
+        """One sentence through Edge-TTS (called by the TTS cache for uncached sentences)"""
         communicate = edge_tts.Communicate(
             text,
             self.voice,
             rate=self.rate,
-            volume=self.volume
+            volume=self.volume,
+            **edge_boundary_kwargs()
         )
-        await communicate.save(output_path)
+        return await stream_to_file(communicate, output_path)
     
-    def generate_audio(self, text: str, filename: str = "narration.mp3") -> Path:
-        """Generate audio from text"""
+    def generate_audio(self, text: str, filename: str = "narration.wav") -> Path:
+        """Generate audio from text (sentences already in the TTS cache are reused)"""
         
         print(f"🎤 Generating voice narration...")
         print(f"   Voice: {self.voice}")
@@ -45,98 +48,14 @@ class TTSEngine:
         # Clean text for TTS
         text = self._clean_text(text)
         
-        # ⚡ AGGRESSIVE PARALLEL: Always use parallel for texts >800 chars
-        if len(text) > 800:
-            return self._generate_long_audio(text, filename)
-        
-        # For very short text (<800 chars), generate directly
-        output_path = file_handler.get_temp_path(filename)
-        asyncio.run(self._generate_audio_async(text, str(output_path)))
+        output_path = file_handler.get_temp_path(filename, self.workspace)
+        asyncio.run(tts_cache.synthesize_async(
+            text, "edge", self.voice, self._synth_sentence, output_path,
+            rate=self.rate, volume=self.volume
+        ))
         print(f"   ✅ Audio saved: {filename}")
         return output_path
     
-    def _generate_long_audio(self, text: str, filename: str) -> Path:
-        """Generate audio for long text by chunking - PARALLEL VERSION"""
-        
-        print(f"   🚀 Using ULTRA-AGGRESSIVE parallel processing...")
-        
-        # Split text into chunks
-        chunks = self._split_text(text, self.chunk_size)
-        print(f"   Generated {len(chunks)} chunks")
-        print(f"   🚀 Generating {len(chunks)} chunks in PARALLEL for 10x+ speedup...")
-        
-        # Generate audio for all chunks in parallel
-        chunk_files = asyncio.run(self._generate_chunks_parallel(chunks))
-        
-        # Merge all chunks
-        print(f"   Merging {len(chunk_files)} audio chunks...")
-        merged_path = self._merge_audio_files(chunk_files, filename)
-        
-        # Clean up chunk files
-        for chunk_file in chunk_files:
-            file_handler.delete_file(chunk_file)
-        
-        print(f"   ✅ Long audio generated and merged")
-        return merged_path
-    
-    async def _generate_chunks_parallel(self, chunks: List[str]) -> List[Path]:
-        """Generate multiple audio chunks in parallel using asyncio.gather"""
-        
-        # Create tasks for all chunks
-        tasks = []
-        chunk_paths = []
-        
-        for i, chunk in enumerate(chunks):
-            chunk_filename = f"chunk_{i+1:03d}.mp3"
-            chunk_path = file_handler.get_temp_path(chunk_filename)
-            chunk_paths.append(chunk_path)
-            
-            # Create async task
-            task = self._generate_audio_async(chunk, str(chunk_path))
-            tasks.append(task)
-        
-        # Execute all tasks in parallel
-        await asyncio.gather(*tasks)
-        
-        return chunk_paths
-    
-    def _merge_audio_files(self, audio_files: List[Path], output_filename: str) -> Path:
-        """Merge multiple audio files into one"""
-        
-        combined = AudioSegment.empty()
-        
-        for audio_file in audio_files:
-            audio = AudioSegment.from_mp3(str(audio_file))
-            combined += audio
-        
-        output_path = file_handler.get_temp_path(output_filename)
-        combined.export(str(output_path), format="mp3")
-        
-        return output_path
-    
-    def _split_text(self, text: str, max_chars: int) -> List[str]:
-        """Split text into chunks at sentence boundaries"""
-        
-        # Split by sentences
-        sentences = text.replace('!', '.').replace('?', '.').split('.')
-        sentences = [s.strip() + '.' for s in sentences if s.strip()]
-        
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= max_chars:
-                current_chunk += " " + sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
-    
     def _clean_text(self, text: str) -> str:
         """Clean text for better TTS output"""
         
@@ -156,9 +75,8 @@ class TTSEngine:
         return text
     
     def get_audio_duration(self, audio_path: Path) -> float:
-        """Get duration of audio file in seconds"""
-        audio = AudioSegment.from_mp3(str(audio_path))
-        return len(audio) / 1000.0  # Convert ms to seconds
+        """Get duration of audio file in seconds (header read, no decode)"""
+        return audio_duration(audio_path)
     
     def set_voice(self, voice: str):
         """Change the voice"""
@@ -182,7 +100,7 @@ class TTSEngine:
 tts_engine = TTSEngine()
 
 
-def generate_audio(text: str, filename: str = "narration.mp3") -> Path:
+def generate_audio(text: str, filename: str = "narration.wav") -> Path:
     """Quick function to generate audio"""
     return tts_engine.generate_audio(text, filename)
 
@@ -11,9 +11,12 @@ import asyncio
 import edge_tts
 import requests
 from typing import Optional, List
-from pydub import AudioSegment
 
 from src.utils.file_handler import file_handler
+from src.utils.media_probe import audio_duration
+from src.utils.narration_timeline import edge_boundary_kwargs, stream_to_file
+from src.utils.tts_cache import tts_cache
+from src.utils.workspace import JobWorkspace
 from src.utils.logger import logger
 
 
@@ -119,9 +122,11 @@ class UltraVoiceEngine:
         }
     }
     
-    def __init__(self, story_type: str = "scary_horror"):
+    def __init__(self, story_type: str = "scary_horror", workspace: Optional[JobWorkspace] = None):
         """Initialize with story-appropriate voice"""
         
+        self.workspace = workspace  # Per-job temp dir (None = shared temp dir)
+        
         if story_type in self.VOICE_PROFILES:
             self.profile = self.VOICE_PROFILES[story_type]
         else:
@@ -133,7 +138,7 @@ class UltraVoiceEngine:
     def generate_audio(
         self,
         text: str,
-        output_filename: str = "narration.mp3",
+        output_filename: str = "narration.wav",
         custom_voice: Optional[str] = None
     ) -> Path:
         """Generate professional narration"""
@@ -174,19 +179,19 @@ class UltraVoiceEngine:
         voice: str,
         output_filename: str
     ) -> Path:
-        """Generate with Edge-TTS (with style support)"""
-        
-        output_path = file_handler.get_temp_path(output_filename)
+        """Generate with Edge-TTS (with style support), sentence by sentence through the TTS cache"""
         
-        # Check if text is too long
-        if len(text) > 5000:
-            return self._generate_long_audio(text, voice, output_filename)
+        output_path = file_handler.get_temp_path(output_filename, self.workspace)
         
-        # Build SSML with style
-        ssml = self._build_ssml(text, voice)
+        async def synth(sentence: str, dest: Path):
+            return await self._edge_generate_async(self._build_ssml(sentence, voice), dest)
         
-        # Generate
-        asyncio.run(self._edge_generate_async(ssml, output_path))
+        asyncio.run(tts_cache.synthesize_async(
+            text, "edge-ssml", voice, synth, output_path,
+            rate=self.profile.get('rate', '+0%'),
+            pitch=self.profile.get('pitch', '+0Hz'),
+            style=self.profile.get('style', 'Default')
+        ))
         
         return output_path
     
@@ -214,91 +219,9 @@ class UltraVoiceEngine:
         return ssml
     
     async def _edge_generate_async(self, ssml: str, output_path: Path):
-        """Async Edge-TTS generation"""
-        communicate = edge_tts.Communicate(ssml)
-        await communicate.save(str(output_path))
-    
-    def _generate_long_audio(
-        self,
-        text: str,
-        voice: str,
-        output_filename: str
-    ) -> Path:
-        """Generate long audio by chunking"""
-        
-        logger.info("   Text is long, splitting into chunks...")
-        
-        # Split into chunks
-        chunks = self._split_text(text, 4000)
-        logger.info(f"   Generated {len(chunks)} chunks")
-        
-        chunk_files = []
-        
-        for i, chunk in enumerate(chunks):
-            logger.info(f"   Processing chunk {i+1}/{len(chunks)}...")
-            
-            chunk_filename = f"chunk_{i+1:03d}.mp3"
-            chunk_path = file_handler.get_temp_path(chunk_filename)
-            
-            # Generate chunk with SSML
-            ssml = self._build_ssml(chunk, voice)
-            asyncio.run(self._edge_generate_async(ssml, chunk_path))
-            
-            chunk_files.append(chunk_path)
-        
-        # Merge chunks
-        logger.info(f"   Merging {len(chunk_files)} audio chunks...")
-        merged_path = self._merge_audio_files(chunk_files, output_filename)
-        
-        # Clean up
-        for chunk_file in chunk_files:
-            file_handler.delete_file(chunk_file)
-        
-        logger.success("   ✅ Long audio generated and merged")
-        
-        return merged_path
-    
-    def _merge_audio_files(self, audio_files: List[Path], output_filename: str) -> Path:
-        """Merge audio files with crossfade"""
-        
-        combined = AudioSegment.empty()
-        
-        for i, audio_file in enumerate(audio_files):
-            audio = AudioSegment.from_mp3(str(audio_file))
-            
-            if i > 0:
-                # Add small crossfade between chunks
-                combined = combined.append(audio, crossfade=100)
-            else:
-                combined = combined + audio
-        
-        output_path = file_handler.get_temp_path(output_filename)
-        combined.export(str(output_path), format="mp3", bitrate="192k")
-        
-        return output_path
-    
-    def _split_text(self, text: str, max_chars: int) -> List[str]:
-        """Split text at sentence boundaries"""
-        
-        # Split by sentences
-        sentences = text.replace('!', '.').replace('?', '.').split('.')
-        sentences = [s.strip() + '.' for s in sentences if s.strip()]
-        
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= max_chars:
-                current_chunk += " " + sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
+        """Async Edge-TTS generation (returns the word timings)"""
+        communicate = edge_tts.Communicate(ssml, **edge_boundary_kwargs())
+        return await stream_to_file(communicate, output_path)
     
     def _clean_text(self, text: str) -> str:
         """Clean text for TTS"""
@@ -320,9 +243,8 @@ class UltraVoiceEngine:
         return text
     
     def get_audio_duration(self, audio_path: Path) -> float:
-        """Get audio duration in seconds"""
-        audio = AudioSegment.from_mp3(str(audio_path))
-        return len(audio) / 1000.0
+        """Get audio duration in seconds (header read, no decode)"""
+        return audio_duration(audio_path)
     
     def list_available_voices(self) -> List[str]:
         """List all professional voices"""
@@ -342,9 +264,9 @@ class UltraVoiceEngine:
 
 
 # Create voice engine for story type
-def create_voice_engine(story_type: str) -> UltraVoiceEngine:
+def create_voice_engine(story_type: str, workspace: Optional[JobWorkspace] = None) -> UltraVoiceEngine:
     """Create voice engine optimized for story type"""
-    return UltraVoiceEngine(story_type)
+    return UltraVoiceEngine(story_type, workspace)
 
 
 if __name__ == "__main__":